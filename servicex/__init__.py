@@ -25,17 +25,49 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
-from servicex.databinder_models import Sample, General, ServiceXSpec
-from servicex.servicex_client import deliver, ProgressBarFormat
-from .models import ResultDestination
-import servicex.dataset as dataset
-import servicex.query as query
-import importlib.metadata
+"""
+The names below are imported when first used, so that ``import servicex`` (and the
+``servicex`` command line) doesn't pay for the S3, HTTP and query-language libraries
+until they are needed.
+"""
 
-OutputFormat = General.OutputFormatEnum
-Delivery = General.DeliveryEnum
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
-__version__ = importlib.metadata.version("servicex")
+if TYPE_CHECKING:  # pragma: no cover
+    from servicex.databinder_models import Sample, General, ServiceXSpec
+    from servicex.servicex_client import deliver, ProgressBarFormat
+    from servicex.polling import AdaptivePolling, FixedPolling, PollingStrategy
+    from servicex.download_scheduler import (
+        AdaptiveConcurrency,
+        DownloadScheduler,
+        SchedulingPolicy,
+    )
+    from servicex.models import ResultDestination
+    import servicex.dataset as dataset
+    import servicex.query as query
+
+    OutputFormat = General.OutputFormatEnum
+    Delivery = General.DeliveryEnum
+    __version__: str
+
+# Module each public name is imported from
+_LAZY_NAMES = {
+    "Sample": "servicex.databinder_models",
+    "General": "servicex.databinder_models",
+    "ServiceXSpec": "servicex.databinder_models",
+    "deliver": "servicex.servicex_client",
+    "ProgressBarFormat": "servicex.servicex_client",
+    "AdaptivePolling": "servicex.polling",
+    "FixedPolling": "servicex.polling",
+    "PollingStrategy": "servicex.polling",
+    "AdaptiveConcurrency": "servicex.download_scheduler",
+    "DownloadScheduler": "servicex.download_scheduler",
+    "SchedulingPolicy": "servicex.download_scheduler",
+    "ResultDestination": "servicex.models",
+    "__version__": "servicex._version",
+}
+_LAZY_SUBMODULES = {"dataset", "query"}
 
 __all__ = [
     "OutputFormat",
@@ -48,5 +80,31 @@ __all__ = [
     "dataset",
     "query",
     "ProgressBarFormat",
+    "PollingStrategy",
+    "AdaptivePolling",
+    "FixedPolling",
+    "DownloadScheduler",
+    "SchedulingPolicy",
+    "AdaptiveConcurrency",
     "__version__",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_NAMES:
+        value = getattr(importlib.import_module(_LAZY_NAMES[name]), name)
+    elif name in _LAZY_SUBMODULES:
+        value = importlib.import_module(f"{__name__}.{name}")
+    elif name == "OutputFormat":
+        value = __getattr__("General").OutputFormatEnum
+    elif name == "Delivery":
+        value = __getattr__("General").DeliveryEnum
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Imported once: later lookups find it in the module
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
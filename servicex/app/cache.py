@@ -25,17 +25,21 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import csv
 import shutil
+import sys
+from enum import Enum
 
 import rich
 import typer
-from pathlib import Path
 from rich.prompt import Confirm
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from servicex.app import pipeable_table
 from servicex.app.cli_options import cache_dir_option
+from servicex.configuration import parse_size
 from servicex.models import TransformedResults
+from servicex.query_cache import QueryCache, measure_transforms
 from servicex.servicex_client import ServiceXClient
 
 
@@ -53,6 +57,31 @@ def _format_size(size_bytes: int) -> str:
     return f"{size:,.2f} {unit}"
 
 
+class ListFormat(str, Enum):
+    r"""
+    Output of the cache list command: a table, or JSON or CSV for scripts
+    """
+
+    table = "table"
+    json = "json"
+    csv = "csv"
+
+
+def _total_sizes(cache: QueryCache, runs: List[TransformedResults]):
+    """
+    Fill in the size of the transforms whose size wasn't recorded at download time,
+    measuring their files and saving the result for the next time
+    """
+    unknown = {r.hash for r in runs if r.total_size is None}
+    if not unknown:
+        return
+    sizes = measure_transforms(cache.get_transforms_by_hash(unknown))
+    cache.save_total_sizes(sizes)
+    for r in runs:
+        if r.total_size is None:
+            r.total_size = sizes.get(r.hash, 0)
+
+
 cache_app = typer.Typer(name="cache", no_args_is_help=True)
 force_opt = typer.Option(False, "-y", help="Force, don't ask for permission")
 transform_id_arg = typer.Argument(help="Transform ID")
@@ -71,6 +100,9 @@ def list(
     show_size: bool = typer.Option(
         False, "--size", help="Include size of cached files"
     ),
+    output_format: ListFormat = typer.Option(
+        ListFormat.table, "--format", help="Output as a table, JSON or CSV"
+    ),
     cache_dir: Optional[str] = cache_dir_option,
 ) -> None:
     """
@@ -78,6 +110,48 @@ def list(
     """
     sx = ServiceXClient(cache_dir=cache_dir)
     cache = sx.query_cache
+
+    runs: List[TransformedResults] = cache.cached_queries(with_files=False)
+    submitted = cache.queries_in_state("SUBMITTED")
+    if show_size:
+        _total_sizes(cache, runs)
+
+    if output_format != ListFormat.table:
+        rows: List[Dict[str, Any]] = [
+            {
+                "title": r.title,
+                "codegen": r.codegen,
+                "request_id": r.request_id,
+                "status": "complete",
+                "submit_time": r.submit_time.isoformat(),
+                "files": r.files,
+                "result_format": r.result_format.value,
+                **({"size": r.total_size} if show_size else {}),
+            }
+            for r in runs
+        ] + [
+            {
+                "title": r.get("title", ""),
+                "codegen": r.get("codegen", ""),
+                "request_id": r.get("request_id", ""),
+                "status": "submitted",
+                "submit_time": None,
+                "files": None,
+                "result_format": str(r.get("result_format", "")),
+                **({"size": None} if show_size else {}),
+            }
+            for r in submitted
+        ]
+        if output_format == ListFormat.json:
+            rich.print_json(data=rows)
+        else:
+            fields = ["title", "codegen", "request_id", "status", "submit_time"]
+            fields += ["files", "result_format"] + (["size"] if show_size else [])
+            writer = csv.DictWriter(sys.stdout, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+        return
+
     table = pipeable_table(title="Cached Queries")
     table.add_column("Title")
     table.add_column("Codegen")
@@ -88,9 +162,6 @@ def list(
     if show_size:
         table.add_column("Size")
 
-    runs: List[TransformedResults] = cache.cached_queries()
-    submitted = cache.queries_in_state("SUBMITTED")
-
     for r in runs:
         row = [
             r.title,
@@ -101,11 +172,8 @@ def list(
             r.result_format,
         ]
         if show_size:
-            total_size: int = sum(
-                Path(f).stat().st_size for f in r.file_list if Path(f).exists()
-            )
             # Convert to human readable string, keeping two decimal places
-            row.append(_format_size(total_size))
+            row.append(_format_size(r.total_size or 0))
         table.add_row(*row)
     for r in submitted:
         row = [
@@ -135,6 +203,39 @@ def clear(force: bool = force_opt, cache_dir: Optional[str] = cache_dir_option):
         rich.print("Cache cleared")
 
 
+@cache_app.command()
+def gc(
+    max_size: Optional[str] = typer.Option(
+        None,
+        "--max-size",
+        help="Total size to keep, e.g. 20GB (default: cache_max_size from the config)",
+    ),
+    max_age: Optional[float] = typer.Option(
+        None,
+        "--max-age",
+        help="Days a query may go unused (default: cache_max_age from the config)",
+    ),
+    cache_dir: Optional[str] = cache_dir_option,
+):
+    """
+    Delete the least recently used cached queries until the cache is within its limits
+    """
+    sx = ServiceXClient(cache_dir=cache_dir)
+    size = parse_size(max_size) if max_size is not None else None
+    if (
+        size is None
+        and max_age is None
+        and sx.config.cache_max_size is None
+        and sx.config.cache_max_age is None
+    ):
+        rich.print("No cache limits given or configured, nothing to do")
+        return
+    evicted = sx.query_cache.collect_garbage(max_size=size, max_age=max_age)
+    for r in evicted:
+        rich.print(f"Deleted {r.title} ({r.request_id})")
+    rich.print(f"{len(evicted)} cached queries deleted")
+
+
 @cache_app.command(no_args_is_help=True)
 def delete(
     transform_id: str = transform_id_arg, cache_dir: Optional[str] = cache_dir_option
@@ -0,0 +1,176 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
+import threading
+import weakref
+from concurrent.futures import Future
+from functools import wraps
+from typing import Any, Awaitable, Callable, Coroutine, Optional, TypeVar
+
+from make_it_sync import make_sync
+
+from servicex.minio_adapter import shared_s3_clients
+
+R = TypeVar("R")
+
+# Loops of the open BackgroundLoops: work started on one of them can finish after the
+# call that started it returns
+_background_loops: "weakref.WeakSet[asyncio.AbstractEventLoop]" = weakref.WeakSet()
+
+
+def in_background_loop() -> bool:
+    "Is the running event loop a :py:class:`BackgroundLoop`, alive between calls?"
+    return asyncio.get_running_loop() in _background_loops
+
+
+class BackgroundLoop:
+    r"""
+    An event loop running for as long as it is open in a thread of its own. The
+    synchronous API of a :py:class:`~servicex.servicex_client.ServiceXClient` made with
+    ``background_loop=True`` runs every call on it, instead of on a new event loop per
+    call, so the HTTP connection pool, the pooled S3 clients, the access token and the
+    server information all stay warm from one call to the next. As the calling thread
+    only waits on a future, this also works where a loop is already running, as in
+    Jupyter.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        _background_loops.add(self.loop)
+        self._thread = threading.Thread(
+            target=self._run_forever, name="servicex-event-loop", daemon=True
+        )
+        self._thread.start()
+        # Holding a shared client context open keeps the S3 clients between calls
+        self._s3_clients = shared_s3_clients()
+        self.run(self._s3_clients.__aenter__())
+
+    def _run_forever(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @property
+    def closed(self) -> bool:
+        "Has the loop been stopped by :py:meth:`close`?"
+        return self.loop.is_closed()
+
+    def run(self, coro: Coroutine[Any, Any, R]) -> R:
+        r"""
+        Run a coroutine on the loop and wait for its result
+
+        :param coro: Coroutine to run
+        :return: What the coroutine returns
+        """
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError(
+                "Synchronous ServiceX calls cannot be made from the client's own event "
+                "loop; await the async version instead"
+            )
+        if self.closed:
+            coro.close()
+            raise RuntimeError("The ServiceX client's event loop is closed")
+        future: Future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result()
+        except BaseException:
+            # e.g. KeyboardInterrupt while waiting: don't leave the work running
+            future.cancel()
+            raise
+
+    def close(self, *cleanups: Awaitable):
+        r"""
+        Close the S3 clients, cancel anything still running and stop the loop
+
+        :param cleanups: Awaitables to run on the loop first, e.g. closing adapters
+        """
+        if self.closed:
+            for cleanup in cleanups:
+                if asyncio.iscoroutine(cleanup):
+                    cleanup.close()
+            return
+
+        async def shutdown():
+            for cleanup in cleanups:
+                await cleanup
+            await self._s3_clients.__aexit__(None, None, None)
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.loop.shutdown_asyncgens()
+
+        try:
+            self.run(shutdown())
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+            _background_loops.discard(self.loop)
+            self.loop.close()
+
+
+async def close_adapters(owner: Any):
+    r"""
+    Close the connections of the ServiceX adapters used by a client, a query, or each
+    query of a group (its ``datasets``)
+    """
+    members = getattr(owner, "datasets", None) or [owner]
+    adapters = {}
+    for member in members:
+        adapter = getattr(member, "servicex", None)
+        if asyncio.iscoroutinefunction(getattr(adapter, "close", None)):
+            adapters[id(adapter)] = adapter
+    for adapter in adapters.values():
+        await adapter.close()
+
+
+def make_sync_method(fn: Callable[..., Awaitable[R]]) -> Callable[..., R]:
+    r"""
+    Same as ``make_sync`` for a method, except that the call runs on the instance's
+    :py:class:`BackgroundLoop` (its ``background_loop`` attribute) when it has one.
+    """
+
+    async def call_and_close(self, *args, **kwargs):
+        try:
+            return await fn(self, *args, **kwargs)
+        finally:
+            # The new loop ends with the call: so must the connections opened on it
+            await close_adapters(self)
+
+    run_in_new_loop = make_sync(call_and_close)
+
+    @wraps(fn)
+    def wrapped_call(self, *args, **kwargs):
+        background_loop: Optional[BackgroundLoop] = getattr(
+            self, "background_loop", None
+        )
+        if background_loop is not None:
+            return background_loop.run(fn(self, *args, **kwargs))
+        return run_in_new_loop(self, *args, **kwargs)
+
+    return wrapped_call
@@ -0,0 +1,118 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import base64
+import binascii
+import os
+import re
+from hashlib import sha1
+from pathlib import Path
+from typing import Optional
+
+
+class BlobStore:
+    r"""
+    Content-addressed store for downloaded files, shared by every transform in a cache
+    directory. Each distinct object is kept once, keyed by its checksum (or ETag and
+    size); the files in the per-transform directories are hard links to it, or
+    symbolic links where the filesystem has no hard links. An object already in the
+    store is linked into place rather than downloaded again.
+    """
+
+    def __init__(self, root: Path):
+        r"""
+        :param root: Directory holding the blobs
+        """
+        self.root = Path(root)
+
+    @staticmethod
+    def key(
+        etag: Optional[str], size: int, checksum_sha256: Optional[str] = None
+    ) -> Optional[str]:
+        r"""
+        Identity of an object's content, None if the server gave nothing to build it.
+
+        :param etag: ETag of the object
+        :param size: Size of the object in bytes
+        :param checksum_sha256: Base64 SHA-256 of the object, preferred when present
+        """
+        if checksum_sha256:
+            try:
+                return "sha256-" + base64.b64decode(checksum_sha256).hex()
+            except (binascii.Error, ValueError):
+                pass
+        if not etag:
+            return None
+        tag = re.sub(r"[^A-Za-z0-9-]", "_", etag.strip('"'))
+        return f"etag-{tag}-{size}"
+
+    def path(self, key: str) -> Path:
+        "Where the blob with this key is (or would be) stored"
+        return self.root / sha1(key.encode()).hexdigest()[:2] / key
+
+    def fetch(self, key: str, size: int, dest: Path) -> bool:
+        r"""
+        Link the blob into ``dest`` if the store has it.
+
+        :return: False if the blob isn't in the store, and ``dest`` is left alone
+        """
+        blob = self.path(key)
+        try:
+            if blob.stat().st_size != size:
+                return False
+        except FileNotFoundError:
+            return False
+        _link(blob, dest)
+        return True
+
+    def add(self, key: str, path: Path):
+        r"""
+        Put a freshly downloaded file in the store, leaving a link in its place. If the
+        store already has the blob (another transform got there first) the file is
+        replaced by a link to it.
+        """
+        blob = self.path(key)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(path, blob)
+        except FileExistsError:
+            _link(blob, path)
+        except OSError:
+            # No hard links on this filesystem: move the file in and symlink to it
+            os.replace(path, blob)
+            _link(blob, path)
+
+
+def _link(blob: Path, dest: Path):
+    "Atomically make ``dest`` a hard link (or failing that a symlink) to ``blob``"
+    tmp = dest.with_name(dest.name + ".link")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(blob, tmp)
+    except OSError:
+        os.symlink(blob.resolve(), tmp)
+    os.replace(tmp, dest)
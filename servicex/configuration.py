@@ -25,16 +25,56 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import copy
 import os
+import re
 from getpass import getuser
 import tempfile
 from pathlib import Path, PurePath
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict, Tuple, Union
 
-from pydantic import BaseModel, Field, AliasChoices, model_validator
+from pydantic import BaseModel, Field, AliasChoices, field_validator, model_validator
 
 import yaml
 
+_SIZE_UNITS = "kmgt"
+
+# Environment variable naming the configuration file to use, instead of searching for
+# one from the current directory up
+CONFIG_FILE_ENV = "SERVICEX_CONFIG"
+
+# Configuration files found by Configuration.read, by where the search started and
+# whether it walked up the tree: the contents of the file, its path, and the stat of
+# every directory searched and of the file, to tell whether the search would still
+# find the same contents.
+_read_cache: Dict[
+    Tuple[str, bool],
+    Tuple[Any, Path, List[Tuple[Path, Optional[Tuple[int, int]]]]],
+] = {}
+
+
+def _stat(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def parse_size(size: Union[int, float, str]) -> int:
+    r"""
+    Number of bytes in a size such as ``1024``, ``"500MB"`` or ``"2GiB"``.
+    Units are powers of 1000, or of 1024 with an ``i``.
+    """
+    if isinstance(size, (int, float)):
+        return int(size)
+    match = re.fullmatch(r"\s*([\d.]+)\s*([kmgt]?)(i?)b?\s*", size, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid size {size!r}")
+    number, unit, binary = match.groups()
+    power = _SIZE_UNITS.index(unit.lower()) + 1 if unit else 0
+    return int(float(number) * (1024 if binary else 1000) ** power)
+
 
 class Endpoint(BaseModel):
     endpoint: str
@@ -50,11 +90,31 @@ class Configuration(BaseModel):
     )
 
     shortened_downloaded_filename: Optional[bool] = False
+    # Lifetime in seconds of presigned URLs. Seven days is the longest S3 (SigV4) allows.
+    signed_url_expiration: int = 7 * 24 * 60 * 60
+    # Keep one copy of identical output files, linked into each transform's directory
+    deduplicate_downloads: Optional[bool] = False
+    # Evict the least recently used transforms beyond this total size (bytes, or "20GB")
+    cache_max_size: Optional[int] = None
+    # Evict transforms not used for this many days
+    cache_max_age: Optional[float] = None
+    # Check the cache limits in the background at the end of each delivery
+    cache_gc_after_deliver: Optional[bool] = False
+    # Seconds the server info (capabilities, code generators) saved in the cache is
+    # used without asking the server again. Older info is asked for again, except on
+    # the client's background loop, where it is still used and refreshed in the
+    # background. 0 turns the saved info off.
+    server_info_ttl: float = 24 * 60 * 60
     # Path to the configuration file this object was read from. This field is
     # populated by :py:meth:`Configuration.read` and is not part of the input
     # schema.
     config_file: Optional[str] = Field(default=None, exclude=True)
 
+    @field_validator("cache_max_size", mode="before")
+    @classmethod
+    def parse_cache_max_size(cls, v):
+        return parse_size(v) if v is not None else None
+
     @model_validator(mode="after")
     def expand_cache_path(self) -> "Configuration":
         """
@@ -78,7 +138,8 @@ class Configuration(BaseModel):
             p = Path(tempfile.gettempdir()) / Path(*p_p.parts[2:])
         else:
             p = Path(p_p)
-        p.mkdir(exist_ok=True, parents=True)
+        if not p.is_dir():
+            p.mkdir(exist_ok=True, parents=True)
 
         self.cache_path = p.as_posix()
         return self
@@ -93,16 +154,21 @@ class Configuration(BaseModel):
         r"""Read configuration from .servicex or servicex.yaml file.
 
         :param config_path: If provided, use this as the path to the .servicex file.
-            Otherwise, search, starting from the current working directory
+            Otherwise, use the file named by the ``SERVICEX_CONFIG`` environment
+            variable, if set, or search, starting from the current working directory
             and look in enclosing directories.
         :return: Populated configuration object
+
+        The file found is remembered for the process, and only read again once it, or
+        a directory searched before finding it, is modified.
         """
+        config_path = config_path or os.environ.get(CONFIG_FILE_ENV) or None
         if config_path:
-            yaml_config, cfg_path = cls._add_from_path(
+            yaml_config, cfg_path = cls._read_memoized(
                 Path(config_path), walk_up_tree=False
             )
         else:
-            yaml_config, cfg_path = cls._add_from_path(walk_up_tree=True)
+            yaml_config, cfg_path = cls._read_memoized(walk_up_tree=True)
 
         if yaml_config:
             cfg = Configuration.model_validate(yaml_config)
@@ -116,7 +182,28 @@ class Configuration(BaseModel):
             )
 
     @classmethod
-    def _add_from_path(cls, path: Optional[Path] = None, walk_up_tree: bool = False):
+    def _read_memoized(cls, path: Optional[Path] = None, walk_up_tree: bool = False):
+        key = (str(path.resolve()) if path else os.getcwd(), walk_up_tree)
+        cached = _read_cache.get(key)
+        if cached is not None:
+            config, found_file, stats = cached
+            if all(_stat(p) == stat for p, stat in stats):
+                return copy.deepcopy(config), found_file
+
+        searched: List[Path] = []
+        config, found_file = cls._add_from_path(path, walk_up_tree, searched)
+        if config is not None and found_file is not None:
+            stats = [(p, _stat(p)) for p in searched + [found_file]]
+            _read_cache[key] = (copy.deepcopy(config), found_file, stats)
+        return config, found_file
+
+    @classmethod
+    def _add_from_path(
+        cls,
+        path: Optional[Path] = None,
+        walk_up_tree: bool = False,
+        searched: Optional[List[Path]] = None,
+    ):
         config = None
         found_file: Optional[Path] = None
         if path:
@@ -130,6 +217,8 @@ class Configuration(BaseModel):
             dir = Path(os.getcwd())
 
         while True:
+            if searched is not None and not path:
+                searched.append(dir)
             f = dir / name  # user-defined path or .servicex
             if f.exists():
                 with open(f) as config_file:
@@ -158,6 +247,8 @@ class Configuration(BaseModel):
         # documented for the search path.
         if config is None and not path:
             home = Path.home()
+            if searched is not None:
+                searched.append(home)
             # Look first for `.servicex` and then for `servicex.yaml` just as we
             # did in the directory walk above.
             for cfg_name in [name, alt_name] if alt_name else [name]:
@@ -45,6 +45,10 @@ from servicex.models import ResultFormat, DocStringBaseModel
 
 logger = logging.getLogger(__name__)
 
+# Longest sample title servers without the long_sample_titles_NNNN capability accept.
+# Servers with it accept longer ones.
+DEFAULT_TITLE_LENGTH_LIMIT = 128
+
 
 class Sample(DocStringBaseModel):
     """
@@ -149,11 +153,12 @@ class Sample(DocStringBaseModel):
         """
         if length is None:
             # we adopt pre-3.2.0 behavior: truncate to 128 characters
-            if len(self.Name) > 128:
+            if len(self.Name) > DEFAULT_TITLE_LENGTH_LIMIT:
                 logger.warning(
-                    f"Truncating Sample name to 128 characters for {self.Name}"
+                    f"Truncating Sample name to {DEFAULT_TITLE_LENGTH_LIMIT} "
+                    f"characters for {self.Name}"
                 )
-                self.Name = self.Name[:128]
+                self.Name = self.Name[:DEFAULT_TITLE_LENGTH_LIMIT]
                 logger.warning(f"New name is {self.Name}")
         else:
             if len(self.Name) > length:
@@ -26,28 +26,97 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 import asyncio
-from typing import List, Optional, Union
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
 from rich.progress import Progress
 
+from servicex.download_scheduler import DownloadScheduler
+from servicex.minio_adapter import shared_s3_clients
 from servicex.query_core import Query
 from servicex.expandable_progress import ExpandableProgress
+from servicex.polling import FixedPolling
+from servicex.status_poller import TransformStatusPoller
+from servicex.result_stream import ResultStream
 from servicex.models import TransformedResults, ResultFormat
-from make_it_sync import make_sync
+from servicex.background_loop import BackgroundLoop, make_sync_method
 
 DatasetGroupMember = Query
 
 
 class DatasetGroup:
-    def __init__(self, datasets: List[DatasetGroupMember]):
+    def __init__(
+        self,
+        datasets: List[DatasetGroupMember],
+        download_scheduler: Optional[DownloadScheduler] = None,
+    ):
         r"""
         A group of datasets that are to be transformed together. This is a convenience
         class to allow you to submit multiple datasets to a ServiceX instance and
         then wait for all of them to complete.
 
         :param datasets: List of transform request as dataset instances
+        :param download_scheduler: Shares download connections between the datasets.
+                                   A default scheduler is made for each run if not given.
         """
         self.tasks = []
         self.datasets = datasets
+        self.download_scheduler = download_scheduler
+
+    @property
+    def background_loop(self) -> Optional[BackgroundLoop]:
+        "The event loop the sync calls run on: that of the datasets, if they share one"
+        loops = {id(getattr(d, "background_loop", None)) for d in self.datasets}
+        if len(loops) != 1:
+            return None
+        return getattr(self.datasets[0], "background_loop", None)
+
+    def _start_status_pollers(self) -> List[TransformStatusPoller]:
+        """
+        Share one status poller between all the queries that talk to the same ServiceX
+        deployment, so the number of status calls doesn't grow with the group size.
+        """
+        members: Dict[int, List[Query]] = {}
+        for dataset in self.datasets:
+            if isinstance(dataset, Query):
+                members.setdefault(id(dataset.servicex), []).append(dataset)
+
+        pollers = []
+        for queries in members.values():
+            strategies = [q.polling_strategy for q in queries if q.polling_strategy]
+            poller = TransformStatusPoller(
+                queries[0].servicex,
+                (
+                    strategies[0]
+                    if strategies
+                    else FixedPolling(min(q.servicex_polling_interval for q in queries))
+                ),
+            )
+            for query in queries:
+                query.status_poller = poller
+            pollers.append(poller)
+        return pollers
+
+    async def _stop_status_pollers(self, pollers: List[TransformStatusPoller]):
+        for dataset in self.datasets:
+            if isinstance(dataset, Query):
+                dataset.status_poller = None
+        for poller in pollers:
+            await poller.close()
+
+    def _start_download_scheduler(self) -> DownloadScheduler:
+        """
+        Have every query queue its downloads with one scheduler, so the samples share
+        the connection budget fairly rather than each running its own.
+        """
+        scheduler = self.download_scheduler or DownloadScheduler()
+        for dataset in self.datasets:
+            if isinstance(dataset, Query):
+                dataset.download_scheduler = scheduler
+        return scheduler
+
+    def _stop_download_scheduler(self):
+        for dataset in self.datasets:
+            if isinstance(dataset, Query):
+                dataset.download_scheduler = None
 
     def set_result_format(self, result_format: ResultFormat):
         r"""
@@ -72,19 +141,24 @@ class DatasetGroup:
         with ExpandableProgress(
             display_progress, provided_progress, overall_progress=overall_progress
         ) as progress:
-            self.tasks = [
-                d.as_signed_urls_async(
-                    display_progress=display_progress,
-                    provided_progress=progress,
-                    dataset_group=True,
-                )
-                for d in self.datasets
-            ]
-            return await asyncio.gather(
-                *self.tasks, return_exceptions=return_exceptions
-            )
+            async with shared_s3_clients():
+                self.tasks = [
+                    d.as_signed_urls_async(
+                        display_progress=display_progress,
+                        provided_progress=progress,
+                        dataset_group=True,
+                    )
+                    for d in self.datasets
+                ]
+                pollers = self._start_status_pollers()
+                try:
+                    return await asyncio.gather(
+                        *self.tasks, return_exceptions=return_exceptions
+                    )
+                finally:
+                    await self._stop_status_pollers(pollers)
 
-    as_signed_urls = make_sync(as_signed_urls_async)
+    as_signed_urls = make_sync_method(as_signed_urls_async)
 
     async def as_files_async(
         self,
@@ -99,14 +173,71 @@ class DatasetGroup:
         with ExpandableProgress(
             display_progress, provided_progress, overall_progress=overall_progress
         ) as progress:
-            self.tasks = [
-                d.as_files_async(
-                    display_progress=display_progress, provided_progress=progress
-                )
-                for d in self.datasets
-            ]
-            return await asyncio.gather(
-                *self.tasks, return_exceptions=return_exceptions
-            )
+            async with shared_s3_clients():
+                self.tasks = [
+                    d.as_files_async(
+                        display_progress=display_progress, provided_progress=progress
+                    )
+                    for d in self.datasets
+                ]
+                pollers = self._start_status_pollers()
+                self._start_download_scheduler()
+                try:
+                    return await asyncio.gather(
+                        *self.tasks, return_exceptions=return_exceptions
+                    )
+                finally:
+                    self._stop_download_scheduler()
+                    await self._stop_status_pollers(pollers)
+
+    as_files = make_sync_method(as_files_async)
+
+    async def iter_files_async(
+        self,
+        display_progress: bool = True,
+        provided_progress: Optional[Progress] = None,
+        signed_urls_only: bool = False,
+        max_pending: int = 10,
+        overall_progress: bool = False,
+    ) -> AsyncIterator[Tuple[str, str]]:
+        r"""
+        Run all the queries in the group and yield each file as soon as it has been
+        downloaded, whichever sample it belongs to.
 
-    as_files = make_sync(as_files_async)
+        :param signed_urls_only: Yield presigned URLs instead of downloading the files
+        :param max_pending: Maximum number of files fetched ahead of the consumer,
+                            across all the samples
+        :return: ``(sample title, path)`` pairs, where path is the local path (or URL)
+                 of the file
+        """
+        # preflight auth
+        if self.datasets:
+            await self.datasets[0].servicex._get_authorization()
+        stream = ResultStream(max_pending)
+        with ExpandableProgress(
+            display_progress, provided_progress, overall_progress=overall_progress
+        ) as progress:
+            async with shared_s3_clients():
+                self.tasks = [
+                    asyncio.ensure_future(
+                        d.submit_and_download(
+                            signed_urls_only=signed_urls_only,
+                            expandable_progress=progress,
+                            dataset_group=True,
+                            result_stream=stream,
+                        )
+                    )
+                    for d in self.datasets
+                ]
+                pollers = self._start_status_pollers()
+                self._start_download_scheduler()
+                try:
+                    async for item in stream.iterate(self.tasks):
+                        yield item
+                    await asyncio.gather(*self.tasks)
+                finally:
+                    for task in self.tasks:
+                        task.cancel()
+                    await asyncio.gather(*self.tasks, return_exceptions=True)
+                    self._stop_download_scheduler()
+                    await self._stop_status_pollers(pollers)
@@ -0,0 +1,132 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
+import time
+from typing import Dict, Optional
+
+from servicex.blocking_io import run_blocking
+from servicex.models import DownloadManifestEntry, DownloadState
+from servicex.query_cache import QueryCache
+
+
+class DownloadManifest:
+    r"""
+    Download state of every output object of one transform, kept in the query cache so
+    that a restarted delivery carries on where the previous one stopped: objects already
+    downloaded are not listed or looked at again, and objects whose download was
+    interrupted are resumed directly.
+
+    Updates are buffered and written in one transaction at most every
+    ``flush_interval`` seconds, rather than one database write per file. Async code
+    uses :py:meth:`update_async` and :py:meth:`flush_async`, which write from the I/O
+    thread pool instead of the event loop.
+    """
+
+    def __init__(self, cache: QueryCache, request_id: str, flush_interval: float = 1.0):
+        r"""
+        :param cache: Query cache holding the manifest
+        :param request_id: Transform the manifest belongs to
+        :param flush_interval: Seconds between two writes of buffered updates
+        """
+        self.cache = cache
+        self.request_id = request_id
+        self.flush_interval = flush_interval
+        self.entries: Dict[str, DownloadManifestEntry] = dict(
+            cache.get_download_manifest(request_id)
+        )
+        self._dirty: Dict[str, DownloadManifestEntry] = {}
+        self._last_flush = time.monotonic()
+        self._write_lock: Optional[asyncio.Lock] = None
+
+    def update(self, filename: str, state: DownloadState, **fields):
+        r"""
+        Record the new state of an object, plus any other known properties
+
+        :param filename: Name of the object in the bucket
+        :param state: New download state
+        :param fields: Other :py:class:`DownloadManifestEntry` fields to set
+        """
+        self._record(filename, state, fields)
+        self.flush_if_due()
+
+    async def update_async(self, filename: str, state: DownloadState, **fields):
+        r"""
+        Same as :py:meth:`update`, for use on the event loop
+
+        :param filename: Name of the object in the bucket
+        :param state: New download state
+        :param fields: Other :py:class:`DownloadManifestEntry` fields to set
+        """
+        self._record(filename, state, fields)
+        if self.flush_due() and not (self._write_lock and self._write_lock.locked()):
+            await self.flush_async()
+
+    def _record(self, filename: str, state: DownloadState, fields: dict):
+        entry: Optional[DownloadManifestEntry] = self.entries.get(filename)
+        if entry is None:
+            entry = DownloadManifestEntry(filename=filename, state=state, **fields)
+        else:
+            entry = entry.model_copy(update={"state": state, **fields})
+        self.entries[filename] = entry
+        self._dirty[filename] = entry
+
+    def flush_due(self) -> bool:
+        "Is the last write old enough for the buffered updates to be written?"
+        return time.monotonic() - self._last_flush >= self.flush_interval
+
+    def flush_if_due(self):
+        "Write the buffered updates if the last write is old enough"
+        if self.flush_due():
+            self.flush()
+
+    def flush(self):
+        "Write the buffered updates now"
+        if self._dirty:
+            self.cache.save_download_manifest(self.request_id, self._dirty.values())
+            self._dirty = {}
+        self._last_flush = time.monotonic()
+
+    async def flush_async(self):
+        "Write the buffered updates now, from the I/O thread pool"
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        # Writes are serialized so that an older batch never lands after a newer one
+        async with self._write_lock:
+            dirty, self._dirty = self._dirty, {}
+            self._last_flush = time.monotonic()
+            if dirty:
+                try:
+                    await run_blocking(
+                        self.cache.save_download_manifest,
+                        self.request_id,
+                        list(dirty.values()),
+                    )
+                except BaseException:
+                    # Keep the batch (minus anything updated since) for the next write
+                    self._dirty = {**dirty, **self._dirty}
+                    raise
@@ -0,0 +1,383 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
+import heapq
+import itertools
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+# Connection budget of schedulers created without one (configurable with init_s3_config)
+_default_max_connections = 10
+
+
+def set_default_max_connections(max_connections: int):
+    "Connection budget used by schedulers created without an explicit one"
+    global _default_max_connections
+    _default_max_connections = max_connections
+    # Later queries get a shared scheduler with the new budget
+    _shared_schedulers.clear()
+
+
+class SchedulingPolicy(str, Enum):
+    r"""
+    Order in which the queued files of one sample are downloaded. Samples always take
+    turns, whatever the policy.
+    """
+
+    fifo = "fifo"
+    smallest_first = "smallest_first"
+    oldest_first = "oldest_first"
+
+
+class ByteRateLimiter:
+    r"""
+    Token bucket shared by every download of a scheduler. Downloads report the bytes
+    they receive and are paused whenever the overall rate runs ahead of the budget.
+    """
+
+    def __init__(self, bytes_per_second: float, burst: Optional[float] = None):
+        r"""
+        :param bytes_per_second: Sustained download rate allowed
+        :param burst: Bytes that may be received at once after an idle period. Defaults
+                      to one second worth of transfer.
+        """
+        if bytes_per_second <= 0:
+            raise ValueError("bytes_per_second must be positive")
+        self.bytes_per_second = bytes_per_second
+        self.capacity = burst if burst is not None else bytes_per_second
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def consume(self, nbytes: int):
+        "Account for ``nbytes`` just received, waiting if the budget is overdrawn"
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated) * self.bytes_per_second,
+            )
+            self._updated = now
+            self._tokens -= nbytes
+            if self._tokens < 0:
+                await asyncio.sleep(-self._tokens / self.bytes_per_second)
+
+
+class AdaptiveConcurrency:
+    r"""
+    Additive-increase / multiplicative-decrease controller for the number of files a
+    :py:class:`DownloadScheduler` downloads at once.
+
+    The aggregate throughput is measured over windows of ``interval`` seconds. While
+    it keeps improving the connection limit grows by ``increase``; when the object
+    store throttles (503, SlowDown) or times out, the limit is multiplied by
+    ``decrease``. Bursts of errors from a single congestion event only cut it once.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 64,
+        increase: int = 1,
+        decrease: float = 0.5,
+        interval: float = 2.0,
+        tolerance: float = 0.05,
+    ):
+        r"""
+        :param initial: Connection limit to start from
+        :param minimum: Connection limit is never cut below this
+        :param maximum: Connection limit is never raised above this
+        :param increase: Connections added after a window with better throughput
+        :param decrease: Factor applied to the limit when the object store pushes back
+        :param interval: Length in seconds of a throughput measurement window
+        :param tolerance: Relative throughput gain that counts as an improvement
+        """
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError("Need 1 <= minimum <= initial <= maximum")
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be between 0 and 1")
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.interval = interval
+        self.tolerance = tolerance
+        self.throughput: Optional[float] = None
+        self._window_bytes = 0
+        self._window_start = time.monotonic()
+        self._hold_until = 0.0
+
+    def record_bytes(self, nbytes: int) -> bool:
+        "Account for bytes received. Returns True when the limit was raised."
+        self._window_bytes += nbytes
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed < self.interval:
+            return False
+
+        throughput = self._window_bytes / elapsed
+        previous = self.throughput
+        self.throughput = throughput
+        self._window_bytes = 0
+        self._window_start = now
+        if previous is not None and throughput <= previous * (1 + self.tolerance):
+            return False
+        if self.limit >= self.maximum:
+            return False
+        self.limit = min(self.maximum, self.limit + self.increase)
+        return True
+
+    def record_congestion(self):
+        "The object store throttled or timed out a request: back off"
+        now = time.monotonic()
+        if now < self._hold_until:
+            return
+        self.limit = max(self.minimum, int(self.limit * self.decrease))
+        self._hold_until = now + self.interval
+        # Throughput measured at the old limit says nothing about the new one
+        self.throughput = None
+        self._window_bytes = 0
+        self._window_start = now
+
+    def __repr__(self):
+        return (
+            f"AdaptiveConcurrency(limit={self.limit}, minimum={self.minimum}, "
+            f"maximum={self.maximum})"
+        )
+
+
+_current_scheduler: ContextVar[Optional["DownloadScheduler"]] = ContextVar(
+    "servicex_download_scheduler", default=None
+)
+
+
+def current_scheduler() -> Optional["DownloadScheduler"]:
+    "Scheduler whose slot the running download holds, if any"
+    return _current_scheduler.get()
+
+
+# Queued downloads wait on futures of their event loop, so each loop gets its own
+_shared_schedulers: (
+    "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, DownloadScheduler]"
+) = weakref.WeakKeyDictionary()
+
+
+def shared_scheduler() -> "DownloadScheduler":
+    r"""
+    Scheduler for queries delivered without one. All of them on the running event loop
+    share it, so together they stay within the default connection budget.
+    """
+    loop = asyncio.get_running_loop()
+    scheduler = _shared_schedulers.get(loop)
+    if scheduler is None:
+        scheduler = DownloadScheduler()
+        _shared_schedulers[loop] = scheduler
+    return scheduler
+
+
+class DownloadScheduler:
+    r"""
+    Decides which file is downloaded next when many samples are delivered together.
+
+    Every sample has its own queue and the samples take turns for free connections, so
+    one sample with thousands of small files cannot starve another with a few large
+    ones. Within a sample, files are picked in the order given by ``policy``. The total
+    number of files downloaded at once (fixed, or tuned by an
+    :py:class:`AdaptiveConcurrency` controller) and, optionally, the overall byte rate
+    are capped.
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_bytes_per_second: Optional[float] = None,
+        policy: SchedulingPolicy = SchedulingPolicy.fifo,
+        adaptive: Optional[AdaptiveConcurrency] = None,
+        size_based_streams: bool = False,
+    ):
+        r"""
+        :param max_connections: Maximum number of files downloaded at once, across all
+                                samples. Defaults to the ``init_s3_config`` concurrency.
+                                Ignored when ``adaptive`` is given.
+        :param max_bytes_per_second: Cap on the overall download rate, None for no cap
+        :param policy: Order in which each sample's queued files are downloaded
+        :param adaptive: Tune the number of files downloaded at once from the observed
+                         throughput and errors instead of using a fixed budget
+        :param size_based_streams: Pick the number of parallel ranged requests of each
+                                   file from its size, rather than always using the
+                                   ``TransferConfig.max_concurrency`` maximum
+        """
+        self.max_connections = (
+            max_connections if max_connections is not None else _default_max_connections
+        )
+        if self.max_connections < 1:
+            raise ValueError("max_connections must be at least 1")
+        self.policy = SchedulingPolicy(policy)
+        self.rate_limiter = (
+            ByteRateLimiter(max_bytes_per_second) if max_bytes_per_second else None
+        )
+        self.adaptive = adaptive
+        self.size_based_streams = size_based_streams
+
+        self.active = 0
+        self.max_queued = 0
+        self.completed: Dict[str, int] = {}
+        self._queues: Dict[str, List[Tuple[tuple, asyncio.Future]]] = {}
+        self._depths: Dict[str, int] = {}
+        self._turns: Deque[str] = deque()
+        self._sequence = itertools.count()
+
+    def _priority(
+        self, size: Optional[int], created_at: Optional[datetime]
+    ) -> Tuple[float, ...]:
+        arrival = next(self._sequence)
+        if self.policy == SchedulingPolicy.smallest_first:
+            return (size if size is not None else float("inf"), arrival)
+        if self.policy == SchedulingPolicy.oldest_first:
+            return (
+                created_at.timestamp() if created_at else float("inf"),
+                arrival,
+            )
+        return (arrival,)
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        sample: str,
+        size: Optional[int] = None,
+        created_at: Optional[datetime] = None,
+    ) -> AsyncIterator[None]:
+        r"""
+        Hold one of the scheduler's connections for the duration of a download.
+
+        :param sample: Sample (query title) the file belongs to
+        :param size: Size of the file in bytes, if known
+        :param created_at: When ServiceX produced the file, if known
+        """
+        await self._acquire(sample, size, created_at)
+        token = _current_scheduler.set(self)
+        try:
+            yield
+        finally:
+            _current_scheduler.reset(token)
+            self.completed[sample] = self.completed.get(sample, 0) + 1
+            self._release()
+
+    async def _acquire(
+        self, sample: str, size: Optional[int], created_at: Optional[datetime]
+    ):
+        if self.active < self.connection_limit and not self.queued:
+            self.active += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue = self._queues.setdefault(sample, [])
+        heapq.heappush(queue, (self._priority(size, created_at), waiter))
+        if sample not in self._turns:
+            self._turns.append(sample)
+        self._depths[sample] = self._depths.get(sample, 0) + 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                # Left behind in the queue, skipped when its turn comes
+                self._dequeued(sample)
+            else:
+                # The slot was handed over just as we were cancelled
+                self._release()
+            raise
+
+    def _dequeued(self, sample: str):
+        self._depths[sample] -= 1
+        if not self._depths[sample]:
+            del self._depths[sample]
+
+    def _release(self):
+        self.active -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        "Hand free connections to the queued files, one sample at a time"
+        while self.active < self.connection_limit and self._turns:
+            sample = self._turns.popleft()
+            queue = self._queues[sample]
+            waiter = heapq.heappop(queue)[1]
+            if queue:
+                self._turns.append(sample)
+            else:
+                del self._queues[sample]
+            if not waiter.done():
+                self.active += 1
+                self._dequeued(sample)
+                waiter.set_result(None)
+
+    @property
+    def connection_limit(self) -> int:
+        "Number of files that may currently be downloaded at once"
+        return self.adaptive.limit if self.adaptive else self.max_connections
+
+    async def transferred(self, nbytes: int):
+        r"""
+        Called by a download holding a slot as it receives data. Waits as needed to
+        stay within the byte-rate budget and feeds the adaptive concurrency controller.
+
+        :param nbytes: Number of bytes just received
+        """
+        if self.rate_limiter:
+            await self.rate_limiter.consume(nbytes)
+        if self.adaptive and self.adaptive.record_bytes(nbytes):
+            self._dispatch()
+
+    def congested(self):
+        "Called by a download the object store throttled or timed out"
+        if self.adaptive:
+            self.adaptive.record_congestion()
+
+    def queue_depths(self) -> Dict[str, int]:
+        "Number of files waiting for a connection, per sample"
+        return dict(self._depths)
+
+    @property
+    def queued(self) -> int:
+        "Number of files waiting for a connection, across all samples"
+        return sum(self._depths.values())
+
+    def __repr__(self):
+        return (
+            f"DownloadScheduler(connection_limit={self.connection_limit}, "
+            f"policy={self.policy.value}, active={self.active}, queued={self.queued})"
+        )
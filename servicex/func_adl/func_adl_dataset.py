@@ -30,12 +30,14 @@ from __future__ import annotations
 import ast
 import copy
 from typing import (
+    Dict,
+    List,
     Optional,
     Any,
     Type,
     TypeVar,
 )
-from qastle import python_ast_to_text_ast
+from qastle import python_ast_to_text_ast, text_ast_to_python_ast
 
 from func_adl import EventDataset, find_EventDataset
 from servicex.query_core import QueryStringGenerator
@@ -44,6 +46,30 @@ from abc import ABC
 T = TypeVar("T")
 
 
+class _LambdaArgumentRenamer(ast.NodeTransformer):
+    "Name the arguments of each lambda after its nesting depth and their position"
+
+    def __init__(self):
+        self.scopes: List[Dict[str, str]] = []
+
+    def visit_Lambda(self, node: ast.Lambda) -> ast.AST:
+        depth = len(self.scopes)
+        names = {a.arg: f"_a{depth}_{i}" for i, a in enumerate(node.args.args)}
+        for a in node.args.args:
+            a.arg = names[a.arg]
+        self.scopes.append(names)
+        node.body = self.visit(node.body)
+        self.scopes.pop()
+        return node
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        for names in reversed(self.scopes):
+            if node.id in names:
+                node.id = names[node.id]
+                break
+        return node
+
+
 class FuncADLQuery(QueryStringGenerator, EventDataset[T], ABC):
     r"""
     ServiceX Dataset class that uses func_adl query syntax.
@@ -77,6 +103,16 @@ class FuncADLQuery(QueryStringGenerator, EventDataset[T], ABC):
         else:
             return self.generate_qastle(self.query_ast)
 
+    def canonical_selection_string(self) -> str:
+        # Parsed and written out again, with the lambda arguments renamed
+        selection = self.generate_selection_string()
+        try:
+            tree = _LambdaArgumentRenamer().visit(text_ast_to_python_ast(selection))
+            return python_ast_to_text_ast(tree)
+        except Exception:
+            # Provided qastle that doesn't parse is hashed as it is
+            return selection
+
     def set_tree(self, tree_name: str) -> FuncADLQuery[T]:
         r"""Set the tree name for the query.
         Args:
@@ -25,31 +25,219 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import json
 import os.path
+import weakref
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
 from hashlib import sha1
 from pathlib import Path
-from typing import List, Optional
+from typing import IO, TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
 
 from tenacity import retry, stop_after_attempt, wait_random_exponential
 
-import aioboto3
-from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError, ConnectTimeoutError, ReadTimeoutError
 import asyncio
 
+from servicex.blob_store import BlobStore
+from servicex.blocking_io import run_blocking
+from servicex.download_scheduler import (
+    current_scheduler,
+    set_default_max_connections,
+    shared_scheduler,
+)
 from servicex.models import ResultFile, TransformStatus
 
+if TYPE_CHECKING:  # pragma: no cover
+    import aioboto3
+
+
+@dataclass
+class _TransferConfig:
+    "How a file is split into ranged requests, with the defaults of boto3's TransferConfig"
+
+    max_concurrency: int = 10
+    multipart_chunksize: int = 8 * 1024 * 1024
+    io_chunksize: int = 256 * 1024
+
+
 # Maximum five simultaneous streams per individual file download
-_transferconfig = TransferConfig(max_concurrency=5)
-# Maximum ten files simultaneously being downloaded (configurable with init_s3_config)
-_file_transfer_sem = asyncio.Semaphore(10)
+_transferconfig = _TransferConfig(max_concurrency=5)
 # Maximum five buckets being queried at once
 _bucket_list_sem = asyncio.Semaphore(5)
+# Size of the connection pool of each shared S3 client (configurable with init_s3_config).
+# Enough for every concurrent file to run all of its streams.
+_max_pool_connections = 10 * _transferconfig.max_concurrency
+
+
+def init_s3_config(concurrency: int = 10, pool_size: Optional[int] = None):
+    """
+    Update the number of concurrent connections
+
+    :param concurrency: Maximum number of files downloaded at once by download schedulers
+                        created without an explicit connection budget
+    :param pool_size: Number of connections held by each shared S3 client. Defaults to
+                      enough connections for every concurrent file to run all of its
+                      download streams.
+    """
+    global _max_pool_connections
+    set_default_max_connections(concurrency)
+    _max_pool_connections = (
+        pool_size
+        if pool_size is not None
+        else concurrency * _transferconfig.max_concurrency
+    )
+
+
+class S3ClientPool:
+    r"""
+    Long-lived S3 clients, one per (endpoint, credentials) pair, shared by every
+    :py:class:`MinioAdapter` running on the same event loop. Each client keeps its own
+    connection pool, so consecutive downloads reuse open (and TLS-negotiated)
+    connections instead of building a new client for every object.
+
+    Pools are created and closed by :py:func:`shared_s3_clients`.
+    """
+
+    def __init__(self, max_pool_connections: int):
+        self.max_pool_connections = max_pool_connections
+        self.clients_created = 0
+        self._clients: Dict[Tuple[str, str, str], object] = {}
+        self._exit_stack = AsyncExitStack()
+        self._lock = asyncio.Lock()
+        self._users = 0
+
+    async def get_client(
+        self, session: "aioboto3.Session", endpoint_url: str, key: Tuple[str, str, str]
+    ):
+        "Return the shared client for this endpoint and credentials, creating it if needed"
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        from botocore.config import Config
+
+        async with self._lock:
+            if key not in self._clients:
+                self._clients[key] = await self._exit_stack.enter_async_context(
+                    session.client(
+                        "s3",
+                        endpoint_url=endpoint_url,
+                        config=Config(max_pool_connections=self.max_pool_connections),
+                    )
+                )
+                self.clients_created += 1
+            return self._clients[key]
+
+    async def close(self):
+        "Close every client in the pool"
+        self._clients.clear()
+        await self._exit_stack.aclose()
+        self._exit_stack = AsyncExitStack()
+
+
+_s3_client_pools: (
+    "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, S3ClientPool]"
+) = weakref.WeakKeyDictionary()
+
+
+@asynccontextmanager
+async def shared_s3_clients() -> AsyncIterator[S3ClientPool]:
+    r"""
+    Share pooled S3 clients between all :py:class:`MinioAdapter` calls made on this event
+    loop while the context is open. Contexts may be nested (a ``DatasetGroup`` and each of
+    its queries all open one); the clients are closed when the outermost context exits.
+    Outside of any context every adapter call opens and closes its own client.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _s3_client_pools.get(loop)
+    if pool is None:
+        pool = S3ClientPool(_max_pool_connections)
+        _s3_client_pools[loop] = pool
+    pool._users += 1
+    try:
+        yield pool
+    finally:
+        pool._users -= 1
+        if pool._users == 0:
+            if _s3_client_pools.get(loop) is pool:
+                del _s3_client_pools[loop]
+            await pool.close()
 
 
-def init_s3_config(concurrency: int = 10):
-    "Update the number of concurrent connections"
-    global _file_transfer_sem
-    _file_transfer_sem = asyncio.Semaphore(concurrency)
+def _read_resume_point(part: Path, sidecar: Path) -> Tuple[int, Optional[str]]:
+    """
+    Offset and ETag to resume a partial download from. Bytes of the part file past the
+    offset recorded in the sidecar were never verified, so they are fetched again.
+    """
+    if not part.exists() or not sidecar.exists():
+        return 0, None
+    try:
+        state = json.loads(sidecar.read_text())
+        return min(int(state["offset"]), part.stat().st_size), state["etag"]
+    except (ValueError, KeyError, TypeError):
+        return 0, None
+
+
+def _write_resume_point(sidecar: Path, offset: int, etag: Optional[str]):
+    tmp = sidecar.with_name(sidecar.name + ".tmp")
+    tmp.write_text(json.dumps({"offset": offset, "etag": etag}))
+    os.replace(tmp, sidecar)
+
+
+def _open_part(
+    part: Path, sidecar: Path, remotesize: int
+) -> Tuple[IO[bytes], int, Optional[str]]:
+    "Open the part file, truncated to the point the download resumes from"
+    offset, etag = _read_resume_point(part, sidecar)
+    if offset > remotesize:
+        offset, etag = 0, None
+    f = open(part, "r+b" if part.exists() else "wb")
+    f.truncate(offset)
+    return f, offset, etag
+
+
+def _finish_part(f: IO[bytes], part: Path, sidecar: Path, path: Path):
+    f.close()
+    os.replace(part, path)
+    sidecar.unlink(missing_ok=True)
+
+
+def _local_size(path: Path) -> Optional[int]:
+    "Size of the file, or None if there is none"
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return None
+
+
+# Error codes an overloaded object store answers with
+_CONGESTION_CODES = {
+    "503",
+    "SlowDown",
+    "ServiceUnavailable",
+    "RequestTimeout",
+    "Throttling",
+    "ThrottlingException",
+}
+
+
+def _is_congestion(error: BaseException) -> bool:
+    "Is this the object store asking us to slow down (throttling or a timeout)?"
+    if isinstance(error, ClientError):
+        return (
+            error.response.get("Error", {}).get("Code") in _CONGESTION_CODES
+            or error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") == 503
+        )
+    return isinstance(
+        error, (asyncio.TimeoutError, ConnectTimeoutError, ReadTimeoutError)
+    )
+
+
+def _streams_for_size(size: int) -> int:
+    "Parallel ranged requests for a file of this size: one per four chunks, capped"
+    chunks = -(-size // _transferconfig.multipart_chunksize)
+    return max(1, min(_transferconfig.max_concurrency, -(-chunks // 4)))
 
 
 def _sanitize_filename(fname: str):
@@ -70,12 +258,18 @@ class MinioAdapter:
         secret_key: str,
         bucket: str,
     ):
+        # Imported here: aioboto3 is slow to import and not needed until a download
+        import aioboto3
+
         self.minio = aioboto3.Session(
             aws_access_key_id=access_key, aws_secret_access_key=secret_key
         )
 
         self.endpoint_host = ("https://" if secure else "http://") + endpoint_host
         self.bucket = bucket
+        self._pool_key = (self.endpoint_host, access_key, secret_key)
+        # Set to share identical files between transforms instead of downloading them again
+        self.blob_store: Optional[BlobStore] = None
 
     @classmethod
     def for_transform(cls, transform: TransformStatus):
@@ -87,25 +281,48 @@ class MinioAdapter:
             bucket=transform.request_id,
         )
 
+    @asynccontextmanager
+    async def _s3_client(self):
+        "Use the shared client if a pool is open on this loop, otherwise a private one"
+        pool = _s3_client_pools.get(asyncio.get_running_loop())
+        if pool is None:
+            async with self.minio.client("s3", endpoint_url=self.endpoint_host) as s3:
+                yield s3
+        else:
+            yield await pool.get_client(self.minio, self.endpoint_host, self._pool_key)
+
+    async def iter_bucket(
+        self, start_after: Optional[str] = None
+    ) -> AsyncIterator[ResultFile]:
+        r"""
+        Stream the objects in the bucket, in key order, one listing page at a time.
+
+        :param start_after: Only list the keys that sort after this one
+        """
+        async with _bucket_list_sem:
+            async with self._s3_client() as s3:
+                paginator = s3.get_paginator("list_objects_v2")
+                extra = {"StartAfter": start_after} if start_after else {}
+                async for page in paginator.paginate(Bucket=self.bucket, **extra):
+                    for _ in page.get("Contents", []):
+                        if not _["Key"].endswith("/"):
+                            yield ResultFile(
+                                filename=_["Key"],
+                                size=_["Size"],
+                                extension=_["Key"].split(".")[-1],
+                                etag=_.get("ETag"),
+                            )
+
     @retry(
         stop=stop_after_attempt(3), wait=wait_random_exponential(max=60), reraise=True
     )
-    async def list_bucket(self) -> List[ResultFile]:
-        async with _bucket_list_sem:
-            async with self.minio.client("s3", endpoint_url=self.endpoint_host) as s3:
-                paginator = s3.get_paginator("list_objects_v2")
-                pagination = paginator.paginate(Bucket=self.bucket)
-                listing = await pagination.build_full_result()
-                rv = [
-                    ResultFile(
-                        filename=_["Key"],
-                        size=_["Size"],
-                        extension=_["Key"].split(".")[-1],
-                    )
-                    for _ in listing.get("Contents", [])
-                    if not _["Key"].endswith("/")
-                ]
-                return rv
+    async def list_bucket(self, start_after: Optional[str] = None) -> List[ResultFile]:
+        r"""
+        List the objects in the bucket, in key order.
+
+        :param start_after: Only list the keys that sort after this one
+        """
+        return [_ async for _ in self.iter_bucket(start_after)]
 
     @retry(
         stop=stop_after_attempt(3), wait=wait_random_exponential(max=60), reraise=True
@@ -117,7 +334,27 @@ class MinioAdapter:
         shorten_filename: bool = False,
         expected_size: Optional[int] = None,
     ) -> Path:
-        os.makedirs(local_dir, exist_ok=True)
+        # How many files are fetched at once is up to the caller's DownloadScheduler.
+        # A caller without a slot of one shares the default budget with the others.
+        if current_scheduler() is not None:
+            return await self._download_file(
+                object_name, local_dir, shorten_filename, expected_size
+            )
+        async with shared_scheduler().slot(self.bucket, expected_size):
+            return await self._download_file(
+                object_name, local_dir, shorten_filename, expected_size
+            )
+
+    async def _download_file(
+        self,
+        object_name: str,
+        local_dir: str,
+        shorten_filename: bool,
+        expected_size: Optional[int],
+    ) -> Path:
+        # Every filesystem call runs on the I/O thread pool: one slow stat on a network
+        # filesystem must not hold up the other downloads and the status pollers
+        await run_blocking(os.makedirs, local_dir, exist_ok=True)
         path = Path(
             os.path.join(
                 local_dir,
@@ -127,40 +364,197 @@ class MinioAdapter:
             )
         )
 
-        async with _file_transfer_sem:
-            async with self.minio.client("s3", endpoint_url=self.endpoint_host) as s3:
-                if expected_size is not None:
-                    remotesize = expected_size
-                else:
-                    info = await s3.head_object(Bucket=self.bucket, Key=object_name)
-                    remotesize = info["ContentLength"]
-                if path.exists():
-                    # if file size is the same, let's not download anything
-                    # maybe move to a better verification mechanism with e-tags in the future
-                    localsize = path.stat().st_size
-                    if localsize == remotesize:
-                        return path.resolve()
-                await s3.download_file(
-                    Bucket=self.bucket,
-                    Key=object_name,
-                    Filename=path.as_posix(),
-                    Config=_transferconfig,
+        async with self._s3_client() as s3:
+            blob_key = None
+            if expected_size is not None and self.blob_store is None:
+                remotesize = expected_size
+            else:
+                # S3 only reports the object's SHA-256 when asked for it
+                info = await s3.head_object(
+                    Bucket=self.bucket, Key=object_name, ChecksumMode="ENABLED"
+                )
+                remotesize = info["ContentLength"]
+                if self.blob_store is not None:
+                    blob_key = BlobStore.key(
+                        info.get("ETag"), remotesize, info.get("ChecksumSHA256")
+                    )
+            # if file size is the same, let's not download anything
+            # maybe move to a better verification mechanism with e-tags in the future
+            if await run_blocking(_local_size, path) == remotesize:
+                return await run_blocking(path.resolve)
+            if blob_key and await run_blocking(
+                self.blob_store.fetch, blob_key, remotesize, path
+            ):
+                return await run_blocking(path.resolve)
+            await self._download_resumable(s3, object_name, path, remotesize)
+            localsize = await run_blocking(_local_size, path)
+            if localsize != remotesize:
+                raise RuntimeError(f"Download of {object_name} failed")
+            if blob_key:
+                await run_blocking(self.blob_store.add, blob_key, path)
+        return await run_blocking(path.resolve)
+
+    async def _download_resumable(
+        self, s3, object_name: str, path: Path, remotesize: int
+    ):
+        """
+        Download into ``<path>.part`` and rename it to ``path`` once complete. The
+        ``<path>.part.json`` sidecar records how many leading bytes of the part file are
+        safely on disk and the ETag they came from, so a retry or a later run picks up
+        from there rather than from byte zero - unless the object has since changed.
+        """
+        part = path.with_name(path.name + ".part")
+        sidecar = path.with_name(path.name + ".part.json")
+        f, offset, etag = await run_blocking(_open_part, part, sidecar, remotesize)
+
+        try:
+            try:
+                await self._download_ranges(
+                    s3, object_name, f, sidecar, offset, remotesize, etag
+                )
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") not in (
+                    "PreconditionFailed",
+                    "412",
+                ):
+                    raise
+                # The object was replaced since the partial download: start over
+                f.truncate(0)
+                await self._download_ranges(
+                    s3, object_name, f, sidecar, 0, remotesize, None
                 )
-                localsize = path.stat().st_size
-                if localsize != remotesize:
-                    raise RuntimeError(f"Download of {object_name} failed")
-        return path.resolve()
+        except BaseException:
+            f.close()
+            raise
+
+        await run_blocking(_finish_part, f, part, sidecar, path)
+
+    async def _download_ranges(
+        self,
+        s3,
+        object_name: str,
+        f: IO[bytes],
+        sidecar: Path,
+        offset: int,
+        size: int,
+        etag: Optional[str],
+    ):
+        """
+        Fetch bytes ``offset`` to ``size`` of the object as ranged GETs, several at a
+        time, writing each at its position in ``f``. The first range pins the ETag all
+        the others must match. The sidecar is advanced as the contiguous prefix of
+        completed ranges grows.
+        """
+        chunk = _transferconfig.multipart_chunksize
+        ranges = [
+            (start, min(start + chunk, size)) for start in range(offset, size, chunk)
+        ]
+        if not ranges:
+            return
+
+        completed: Dict[int, int] = {}
+        verified = offset
+        # One resume point is written at a time. Ranges completed meanwhile are covered
+        # by the next one.
+        checkpointing = asyncio.Lock()
+
+        def checkpoint(offset: int, etag: Optional[str]):
+            os.fsync(f.fileno())
+            _write_resume_point(sidecar, offset, etag)
+
+        async def fetch(start: int, end: int):
+            nonlocal etag, verified
+            etag = await self._get_range(s3, object_name, f, start, end, etag)
+            completed[start] = end
+            if verified in completed:
+                while verified in completed:
+                    verified = completed.pop(verified)
+                if checkpointing.locked():
+                    return
+                async with checkpointing:
+                    # Hand the buffered bytes to the OS here, so that the file object
+                    # itself is only ever used from the event loop
+                    f.flush()
+                    await run_blocking(checkpoint, verified, etag)
+
+        await fetch(*ranges[0])
+        scheduler = current_scheduler()
+        streams = asyncio.Semaphore(
+            _streams_for_size(size)
+            if scheduler and scheduler.size_based_streams
+            else _transferconfig.max_concurrency
+        )
+
+        async def fetch_limited(start: int, end: int):
+            async with streams:
+                await fetch(start, end)
+
+        await asyncio.gather(*[fetch_limited(start, end) for start, end in ranges[1:]])
+
+    async def _get_range(
+        self,
+        s3,
+        object_name: str,
+        f: IO[bytes],
+        start: int,
+        end: int,
+        etag: Optional[str],
+    ) -> str:
+        "Write bytes ``start`` to ``end`` of the object to ``f``, returning its ETag"
+        scheduler = current_scheduler()
+        extra = {"IfMatch": etag} if etag else {}
+        try:
+            response = await s3.get_object(
+                Bucket=self.bucket,
+                Key=object_name,
+                Range=f"bytes={start}-{end - 1}",
+                **extra,
+            )
+            position = start
+            body = response["Body"]
+            async with body:
+                async for data in body.iter_chunks(_transferconfig.io_chunksize):
+                    f.seek(position)
+                    f.write(data)
+                    position += len(data)
+                    if scheduler:
+                        await scheduler.transferred(len(data))
+        except Exception as e:
+            if scheduler and _is_congestion(e):
+                scheduler.congested()
+            raise
+        if position != end:
+            raise RuntimeError(f"Short read of {object_name}: {position} != {end}")
+        return response["ETag"]
 
     @retry(
         stop=stop_after_attempt(3), wait=wait_random_exponential(max=60), reraise=True
     )
-    async def get_signed_url(self, object_name: str) -> str:
-        async with self.minio.client("s3", endpoint_url=self.endpoint_host) as s3:
-            return await s3.generate_presigned_url(
-                "get_object",
-                Params={"Bucket": self.bucket, "Key": object_name},
-                ExpiresIn=365 * 24 * 60 * 60,
-            )
+    async def get_signed_urls(
+        self, object_names: List[str], expires_in: int = 7 * 24 * 60 * 60
+    ) -> List[str]:
+        r"""
+        Presign a GET of each object. Signing is a local computation, so the whole batch
+        is done in one pass with a single client rather than a client (and a task) per
+        object.
+
+        :param object_names: Keys of the objects in the bucket
+        :param expires_in: Number of seconds the URLs stay valid
+        """
+        async with self._s3_client() as s3:
+            return [
+                await s3.generate_presigned_url(
+                    "get_object",
+                    Params={"Bucket": self.bucket, "Key": object_name},
+                    ExpiresIn=expires_in,
+                )
+                for object_name in object_names
+            ]
+
+    async def get_signed_url(
+        self, object_name: str, expires_in: int = 7 * 24 * 60 * 60
+    ) -> str:
+        return (await self.get_signed_urls([object_name], expires_in))[0]
 
     @classmethod
     def hash_path(cls, file_name):
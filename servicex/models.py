@@ -29,7 +29,7 @@ import hashlib
 from datetime import datetime
 from enum import Enum
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 from typing import List, Optional, Any
 
 
@@ -49,6 +49,11 @@ def _generate_model_docstring(model: type) -> str:
     )
 
 
+# Version of the canonical form of the selections hashed by TransformRequest. Bump it
+# when a canonical form changes, and list the hashes it replaces in legacy_hashes.
+SELECTION_CANONICAL_VERSION = 1
+
+
 class DocStringBaseModel(BaseModel):
     """Class to autogenerate a docstring for a Pydantic model"""
 
@@ -114,6 +119,29 @@ class TransformRequest(DocStringBaseModel):
 
     model_config = {"populate_by_name": True, "use_attribute_docstrings": True}
 
+    # compute_hash result, until a field is set
+    _hash: Optional[str] = PrivateAttr(default=None)
+    # Selection in canonical form, see set_canonical_selection
+    _canonical_selection: Optional[str] = PrivateAttr(default=None)
+
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        if name == "selection":
+            self._canonical_selection = None
+        if name != "_hash":
+            self._hash = None
+
+    def set_canonical_selection(self, selection: str):
+        r"""
+        Hash this selection instead of the one sent to ServiceX: a canonical form of
+        it, the same for every query that differs only in insignificant ways
+        (whitespace, key order, names of lambda arguments...). Forgotten when the
+        selection is set.
+
+        :param selection: The canonical form of the selection
+        """
+        self._canonical_selection = selection
+
     def compute_hash(self):
         r"""
         Compute a hash for this submission. Only include properties that impact the result
@@ -121,19 +149,39 @@ class TransformRequest(DocStringBaseModel):
 
         :return: SHA256 hash of request
         """
-        sha = hashlib.sha256(
-            str(
-                [
-                    self.did,
-                    self.selection,
-                    None,  # was tree_name
-                    self.codegen,
-                    None,  # was image
-                    self.result_format.name,
-                    sorted(self.file_list) if self.file_list else None,
-                ]
-            ).encode("utf-8")
-        )
+        if self._hash is None:
+            # Without a canonical form the hash is the one it always was
+            self._hash = (
+                self._compute_hash(self.selection, None)
+                if self._canonical_selection is None
+                else self._compute_hash(
+                    self._canonical_selection, SELECTION_CANONICAL_VERSION
+                )
+            )
+        return self._hash
+
+    def legacy_hashes(self) -> List[str]:
+        r"""
+        Hashes this submission had before its selection was put in canonical form,
+        under which it may still be in a cache
+        """
+        if self._canonical_selection is None:
+            return []
+        return [self._compute_hash(self.selection, None)]
+
+    def _compute_hash(self, selection: str, version: Optional[int]) -> str:
+        fields = [
+            self.did,
+            selection,
+            None,  # was tree_name
+            self.codegen,
+            None,  # was image
+            self.result_format.name,
+            sorted(self.file_list) if self.file_list else None,
+        ]
+        if version is not None:
+            fields.append(version)
+        sha = hashlib.sha256(str(fields).encode("utf-8"))
         return sha.hexdigest()
 
 
@@ -198,6 +246,39 @@ class ResultFile(DocStringBaseModel):
     filename: str
     size: int
     extension: str
+    etag: Optional[str] = None
+    """ETag of the object, if the listing reports it"""
+
+
+class DownloadState(str, Enum):
+    r"""
+    Progress of the download of one output object
+    """
+
+    pending = "pending"
+    downloading = "downloading"
+    done = "done"
+
+
+class DownloadManifestEntry(DocStringBaseModel):
+    r"""
+    Download progress of one output object of a transform
+    """
+
+    model_config = {"use_attribute_docstrings": True}
+
+    filename: str
+    """Name of the object in the transform's bucket"""
+    state: DownloadState
+    """Where the download of this object is at"""
+    size: Optional[int] = None
+    """Size of the object in bytes, if known"""
+    checksum: Optional[str] = None
+    """ETag of the object, if known"""
+    local_path: Optional[str] = None
+    """Where the object was downloaded to, once done"""
+    created_at: Optional[datetime] = None
+    """When ServiceX reported the object, for servers that report it"""
 
 
 class TransformedResults(DocStringBaseModel):
@@ -224,12 +305,16 @@ class TransformedResults(DocStringBaseModel):
     """List of downloaded files on local disk"""
     signed_url_list: List[str]
     """List of URLs to retrieve output from remote ServiceX object store"""
+    signed_url_expires: Optional[datetime] = None
+    """When the URLs in signed_url_list stop working (None if unknown)"""
     files: int
     """Number of files in result"""
     result_format: ResultFormat
     """File format for results"""
     log_url: Optional[str] = None
     """URL for looking up logs on the ServiceX server"""
+    total_size: Optional[int] = None
+    """Bytes of the files in file_list, when known"""
 
 
 class ServiceXInfo(DocStringBaseModel):
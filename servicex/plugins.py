@@ -0,0 +1,243 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Registry of the query and dataset plugins installed under the ``servicex.query`` and
+``servicex.dataset`` entry point groups.
+
+Scanning the installed distributions for entry points is slow in large environments, so
+it is done once per process, and the map from YAML tag to entry point is saved in the
+temporary directory, keyed by a fingerprint of the environment. A plugin is imported
+only when it is used.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+from getpass import getuser
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+if sys.version_info < (3, 10):
+    from importlib_metadata import EntryPoint, entry_points
+else:
+    from importlib.metadata import EntryPoint, entry_points
+
+logger = logging.getLogger(__name__)
+
+QUERY_GROUP = "servicex.query"
+DATASET_GROUP = "servicex.dataset"
+GROUPS = (QUERY_GROUP, DATASET_GROUP)
+
+# Bump when the layout of the saved registry changes
+_REGISTRY_VERSION = 2
+
+# Directories holding the metadata of an installed distribution, named after it and its
+# version
+_METADATA_SUFFIXES = (".dist-info", ".egg-info")
+
+
+class Plugin(NamedTuple):
+    entry_point: EntryPoint
+    yaml_tag: str
+
+
+def _registry_path() -> Optional[Path]:
+    try:
+        return Path(tempfile.gettempdir()) / f"servicex_{getuser()}" / "plugins.json"
+    except Exception:  # getuser fails when the user has no name
+        return None
+
+
+def environment_fingerprint() -> str:
+    r"""
+    Fingerprint of the installed distributions: the names, with versions, and change
+    times of the metadata directories in the entries of ``sys.path``. It changes
+    whenever a distribution is installed, removed, upgraded or reinstalled. Other files
+    don't matter, and the current directory is left out.
+    """
+    sha = hashlib.sha256(sys.version.encode("utf-8"))
+    try:
+        cwd = os.getcwd()
+    except OSError:
+        cwd = None
+    for entry in sys.path:
+        if not entry or os.path.abspath(entry) == cwd:
+            continue
+        try:
+            with os.scandir(entry) as it:
+                found = sorted(
+                    (e.name, e.stat().st_mtime_ns)
+                    for e in it
+                    if e.name.endswith(_METADATA_SUFFIXES)
+                )
+        except OSError:
+            continue
+        sha.update(f"{entry}\0{found}\0".encode("utf-8"))
+    return sha.hexdigest()
+
+
+def _yaml_tag(cls: Any) -> str:
+    # The tag YAML.register_class would register the class under
+    return getattr(cls, "yaml_tag", "!" + cls.__name__)
+
+
+def _scan() -> Dict[str, List[Plugin]]:
+    # The tag is taken from the name rather than the class, so nothing is imported
+    return {
+        group: [Plugin(ep, "!" + ep.name) for ep in entry_points(group=group)]
+        for group in GROUPS
+    }
+
+
+def _read_registry(path: Path, fingerprint: str) -> Optional[Dict[str, List[Plugin]]]:
+    try:
+        saved = json.loads(path.read_text())
+        if saved["version"] != _REGISTRY_VERSION or saved["fingerprint"] != fingerprint:
+            return None
+        return {
+            group: [
+                Plugin(EntryPoint(p["name"], p["value"], group), p["tag"])
+                for p in saved["groups"][group]
+            ]
+            for group in GROUPS
+        }
+    except Exception:
+        return None
+
+
+def _write_registry(
+    path: Path, fingerprint: str, registry: Dict[str, List[Plugin]]
+) -> None:
+    saved = {
+        "version": _REGISTRY_VERSION,
+        "fingerprint": fingerprint,
+        "groups": {
+            group: [
+                {
+                    "name": p.entry_point.name,
+                    "value": p.entry_point.value,
+                    "tag": p.yaml_tag,
+                }
+                for p in plugins
+            ]
+            for group, plugins in registry.items()
+        },
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}")
+        tmp.write_text(json.dumps(saved))
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.debug(f"Unable to save the plugin registry to {path}: {e}")
+
+
+@functools.lru_cache(maxsize=None)
+def _registry() -> Dict[str, List[Plugin]]:
+    path = _registry_path()
+    fingerprint = environment_fingerprint()
+    registry = _read_registry(path, fingerprint) if path else None
+    if registry is None:
+        registry = _scan()
+        if path:
+            _write_registry(path, fingerprint, registry)
+    return registry
+
+
+def plugins(group: str) -> Dict[str, EntryPoint]:
+    r"""
+    The plugins installed in an entry point group, discovered once per process
+
+    :param group: ``servicex.query`` or ``servicex.dataset``
+    :return: The entry point of each plugin, by name
+    """
+    return {p.entry_point.name: p.entry_point for p in _registry()[group]}
+
+
+def yaml_tags() -> Dict[str, EntryPoint]:
+    r"""
+    The YAML tag of a plugin is its entry point name after a ``!``, as for the plugins
+    of this package, so that no plugin is imported to find it.
+
+    :return: The entry point of the plugin of each YAML tag, over every group
+    """
+    return {p.yaml_tag: p.entry_point for group in GROUPS for p in _registry()[group]}
+
+
+def register_yaml_tags(yaml: Any) -> None:
+    r"""
+    Register the YAML tag of every plugin with a YAML loader, as
+    ``YAML.register_class`` would, but import each plugin only when its tag is met.
+
+    :param yaml: The ruamel ``YAML`` instance
+    """
+    for tag, ep in yaml_tags().items():
+        yaml.constructor.add_constructor(tag, _lazy_constructor(ep))
+    # A plugin whose class declares another yaml_tag is only found once that tag is met
+    yaml.constructor.add_constructor(None, _construct_other_tag)
+
+
+def _construct(cls: Any, constructor: Any, node: Any) -> Any:
+    if hasattr(cls, "from_yaml"):
+        return cls.from_yaml(constructor, node)
+    return constructor.construct_yaml_object(node, cls)
+
+
+def _lazy_constructor(ep: EntryPoint):
+    def construct(constructor: Any, node: Any) -> Any:
+        return _construct(ep.load(), constructor, node)
+
+    return construct
+
+
+@functools.lru_cache(maxsize=None)
+def _declared_tags() -> Dict[str, Any]:
+    "Import every plugin, for the yaml_tag its class declares"
+    tags: Dict[str, Any] = {}
+    for group in GROUPS:
+        for p in _registry()[group]:
+            try:
+                cls = p.entry_point.load()
+            except Exception as e:
+                logger.warning(
+                    f"Unable to load the {group} plugin {p.entry_point.name}: {e}"
+                )
+                continue
+            tags.setdefault(_yaml_tag(cls), cls)
+    return tags
+
+
+def _construct_other_tag(constructor: Any, node: Any) -> Any:
+    cls = _declared_tags().get(node.tag)
+    if cls is None:
+        return constructor.construct_undefined(node)
+    return _construct(cls, constructor, node)
@@ -0,0 +1,114 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from servicex.models import TransformStatus
+
+
+def status_changed(
+    previous: Optional[TransformStatus], current: TransformStatus
+) -> bool:
+    "Did anything the user can see about a transform change between two polls?"
+    return previous is None or (
+        previous.status,
+        previous.files,
+        previous.files_completed,
+        previous.files_failed,
+    ) != (current.status, current.files, current.files_completed, current.files_failed)
+
+
+class PollingStrategy(ABC):
+    r"""
+    Decides how long to wait between two polls of the ServiceX server (transform status)
+    or of the transform results. Strategies are stateless: the polling loop passes back
+    the previous interval, so a single instance can be shared by many queries.
+    """
+
+    @abstractmethod
+    def next_interval(self, previous: Optional[float], changed: bool) -> float:
+        r"""
+        Number of seconds to wait before the next poll
+
+        :param previous: Interval waited before the last poll, None after the first one
+        :param changed: Did the last poll find anything new (status or files)?
+        """
+
+
+class FixedPolling(PollingStrategy):
+    r"""
+    Always wait the same number of seconds between polls
+    """
+
+    def __init__(self, interval: float = 5):
+        self.interval = interval
+
+    def next_interval(self, previous: Optional[float], changed: bool) -> float:
+        return self.interval
+
+    def __repr__(self):
+        return f"FixedPolling(interval={self.interval})"
+
+
+class AdaptivePolling(PollingStrategy):
+    r"""
+    Poll quickly right after submission and while something is changing, then back off
+    exponentially, up to ``max_interval``, while nothing changes. A short transform is
+    noticed as soon as it finishes, while a transform running for hours only costs a
+    poll every ``max_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 1.0,
+        max_interval: float = 60.0,
+        backoff: float = 2.0,
+    ):
+        r"""
+        :param min_interval: Seconds between polls while things are changing
+        :param max_interval: Longest wait between two polls
+        :param backoff: Factor the interval grows by after each poll with no change
+        """
+        if min_interval <= 0 or max_interval < min_interval or backoff < 1:
+            raise ValueError(
+                "AdaptivePolling needs 0 < min_interval <= max_interval and backoff >= 1"
+            )
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+
+    def next_interval(self, previous: Optional[float], changed: bool) -> float:
+        if previous is None or changed:
+            return self.min_interval
+        return min(previous * self.backoff, self.max_interval)
+
+    def __repr__(self):
+        return (
+            f"AdaptivePolling(min_interval={self.min_interval}, "
+            f"max_interval={self.max_interval}, backoff={self.backoff})"
+        )
@@ -25,9 +25,10 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import ast
 import inspect
 from typing import Optional, Union, Callable
-from base64 import b64encode
+from base64 import b64decode, b64encode
 from textwrap import dedent
 from servicex.query_core import QueryStringGenerator
 import sys
@@ -64,6 +65,15 @@ class PythonFunction(QueryStringGenerator):
                 dedent(inspect.getsource(self.python_function)).encode("utf-8")
             ).decode("utf-8")
 
+    def canonical_selection_string(self) -> str:
+        # The source parsed and written out again, without comments and with
+        # uniform whitespace
+        source = b64decode(self.generate_selection_string()).decode("utf-8")
+        try:
+            return ast.unparse(ast.parse(source))
+        except SyntaxError:
+            return source
+
     @classmethod
     def from_yaml(cls, _, node):
         code = node.value
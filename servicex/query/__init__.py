@@ -26,13 +26,26 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-import sys
+"""
+The query types registered under the ``servicex.query`` entry point group. Each is
+loaded when first used, so only the query languages a program uses are imported.
+"""
 
-if sys.version_info < (3, 10):
-    from importlib_metadata import entry_points
-else:
-    from importlib.metadata import entry_points
+from typing import Any, List
 
-plugins = entry_points(group="servicex.query")
-for _ in plugins:
-    globals()[_.name] = _.load()
+from ..plugins import QUERY_GROUP, plugins
+
+
+def __getattr__(name: str) -> Any:
+    # The registry is only read once a query type, or the list of them, is asked for
+    if name == "__all__":
+        return sorted(plugins(QUERY_GROUP))
+    query_plugins = {} if name.startswith("__") else plugins(QUERY_GROUP)
+    if name not in query_plugins:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = query_plugins[name].load()
+    return globals()[name]
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(plugins(QUERY_GROUP)))
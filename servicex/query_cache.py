@@ -27,14 +27,133 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 import json
 import os
+import shutil
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime, timezone
 from filelock import FileLock
-from tinydb import TinyDB, Query, where
+from pydantic import ValidationError
 
+from servicex.blob_store import BlobStore
 from servicex.configuration import Configuration
-from servicex.models import TransformRequest, TransformStatus, TransformedResults
+from servicex.models import (
+    DownloadManifestEntry,
+    ServiceXInfo,
+    TransformRequest,
+    TransformStatus,
+    TransformedResults,
+)
+
+# Directory under the cache path holding the deduplicated downloads
+_BLOB_DIR = ".blobs"
+# Unlinked blobs younger than this (seconds) may be in the middle of a download
+_BLOB_GRACE_PERIOD = 3600
+
+# Threads measuring downloaded files for records without a recorded size: a stat on a
+# network filesystem is mostly waiting for the server
+_STAT_THREADS = 32
+
+# Hashes looked up by one statement of get_transforms_by_hash
+_HASHES_PER_QUERY = 500
+
+# Record fields that are stored one row per entry in the transform_files table
+_LIST_FIELDS = ("file_list", "signed_url_list")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transforms (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL,
+    request_id TEXT,
+    status TEXT,
+    doc TEXT NOT NULL,
+    last_access REAL
+);
+CREATE INDEX IF NOT EXISTS transforms_hash ON transforms (hash);
+CREATE INDEX IF NOT EXISTS transforms_request_id ON transforms (request_id);
+CREATE INDEX IF NOT EXISTS transforms_status ON transforms (status);
+CREATE TABLE IF NOT EXISTS transform_files (
+    transform_id INTEGER NOT NULL REFERENCES transforms (id) ON DELETE CASCADE,
+    field TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (transform_id, field, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS transform_downloads (
+    request_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    state TEXT NOT NULL,
+    entry TEXT NOT NULL,
+    PRIMARY KEY (request_id, filename)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS server_info (
+    url TEXT PRIMARY KEY,
+    info TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+# Matches records whose status is anything but SUBMITTED, including no status at all
+_NOT_SUBMITTED = "status IS NOT 'SUBMITTED'"
+
+
+def _column(value: Any) -> Any:
+    "Value of an indexed column; anything SQLite can't store is indexed by its JSON"
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return json.dumps(value)
+
+
+def _record_size(doc: Dict[str, Any]) -> int:
+    "Bytes on disk taken by the downloaded files of a record"
+    if doc.get("total_size") is not None:
+        return doc["total_size"]
+    size = 0
+    for path in doc.get("file_list") or []:
+        try:
+            size += os.stat(path).st_size
+        except OSError:
+            pass
+    return size
+
+
+def _file_size(path: str) -> int:
+    try:
+        return Path(path).stat().st_size
+    except OSError:
+        return 0
+
+
+def _tree_size(root: Path) -> int:
+    "Bytes taken by the files under a directory, skipping those that vanish meanwhile"
+    size = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            try:
+                size += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return size
+
+
+def measure_transforms(records: Iterable[TransformedResults]) -> Dict[str, int]:
+    r"""
+    Bytes of the downloaded files of transforms, measured on disk, with the files
+    of every transform stat'ed in parallel. For records from before the size of the
+    downloads was recorded.
+
+    :param records: The transforms, with their file lists
+    :return: The size of each transform, by hash
+    """
+    records = [r for r in records]
+    paths = [path for r in records for path in r.file_list]
+    with ThreadPoolExecutor(max_workers=_STAT_THREADS) as executor:
+        sizes = iter(executor.map(_file_size, paths))
+    return {r.hash: sum(next(sizes) for _ in r.file_list) for r in records}
 
 
 class CacheException(Exception):
@@ -42,6 +161,14 @@ class CacheException(Exception):
 
 
 class QueryCache:
+    r"""
+    Local record of submitted and completed transforms, kept in a SQLite database
+    (WAL mode) in the ``.servicex`` directory of the cache path. Records are indexed
+    by hash, request id and status; their file lists live in a separate table so
+    lookups don't need to read them. A TinyDB ``db.json`` left by older versions is
+    migrated the first time the cache is opened.
+    """
+
     def __init__(self, config: Configuration):
         self.config = config
         if self.config.cache_path is not None:
@@ -49,16 +176,170 @@ class QueryCache:
             Path(self.config.cache_path + "/.servicex").mkdir(
                 parents=True, exist_ok=True
             )
-            self.db = TinyDB(
-                os.path.join(self.config.cache_path, ".servicex", "db.json")
-            )
-            self.lock = FileLock(
-                os.path.join(self.config.cache_path, ".servicex", "db.lock")
+            db_dir = os.path.join(self.config.cache_path, ".servicex")
+            self.lock = FileLock(os.path.join(db_dir, "db.lock"))
+            self._db_lock = threading.RLock()
+            self.db = sqlite3.connect(
+                os.path.join(db_dir, "db.sqlite"),
+                timeout=60,
+                isolation_level=None,
+                check_same_thread=False,
             )
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute("PRAGMA foreign_keys=ON")
+            with self._transaction() as db:
+                for statement in _SCHEMA.split(";"):
+                    if statement.strip():
+                        db.execute(statement)
+                columns = [
+                    row[1] for row in db.execute("PRAGMA table_info(transforms)")
+                ]
+                if "last_access" not in columns:
+                    # Caches from before access was tracked: count from now
+                    db.execute("ALTER TABLE transforms ADD COLUMN last_access REAL")
+                    db.execute("UPDATE transforms SET last_access = ?", (time.time(),))
+
+            legacy_db = os.path.join(db_dir, "db.json")
+            if os.path.exists(legacy_db):
+                with self.lock:
+                    self._migrate_tinydb(legacy_db)
 
     def close(self):
         self.db.close()
 
+    @contextmanager
+    def _transaction(self, write: bool = True) -> Iterator[sqlite3.Connection]:
+        with self._db_lock:
+            self.db.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                yield self.db
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self.db.execute("COMMIT")
+
+    def _migrate_tinydb(self, legacy_db: str):
+        """
+        Copy the records of a TinyDB cache into the database, keeping the old file
+        around as ``db.json.migrated``
+        """
+        if not os.path.exists(legacy_db):  # Another process got here first
+            return
+        with open(legacy_db) as f:
+            content = f.read()
+        tables = json.loads(content) if content.strip() else {}
+        docs = tables.get("_default", {})
+        with self._transaction() as db:
+            for doc_id in sorted(docs, key=int):
+                if "hash" in docs[doc_id]:
+                    self._write(db, None, docs[doc_id])
+        os.replace(legacy_db, legacy_db + ".migrated")
+
+    def _write(self, db: sqlite3.Connection, transform_id: Optional[int], doc: dict):
+        """
+        Insert a record, or merge the fields of ``doc`` into an existing one
+        """
+        # The doc keeps an empty placeholder for each list; the entries are added back
+        # from transform_files when the record is read
+        fields = {
+            k: [] if k in _LIST_FIELDS and v is not None else v for k, v in doc.items()
+        }
+        if transform_id is None:
+            transform_id = db.execute(
+                "INSERT INTO transforms (hash, request_id, status, doc, last_access) "
+                "VALUES (?, ?, ?, '{}', ?)",
+                (doc["hash"], None, None, time.time()),
+            ).lastrowid
+        else:
+            (existing,) = db.execute(
+                "SELECT doc FROM transforms WHERE id = ?", (transform_id,)
+            ).fetchone()
+            fields = {**json.loads(existing), **fields}
+        db.execute(
+            "UPDATE transforms SET hash = ?, request_id = ?, status = ?, doc = ? "
+            "WHERE id = ?",
+            (
+                _column(fields["hash"]),
+                _column(fields.get("request_id")),
+                _column(fields.get("status")),
+                json.dumps(fields),
+                transform_id,
+            ),
+        )
+
+        for field in _LIST_FIELDS:
+            if field in doc:
+                db.execute(
+                    "DELETE FROM transform_files WHERE transform_id = ? AND field = ?",
+                    (transform_id, field),
+                )
+                db.executemany(
+                    "INSERT INTO transform_files (transform_id, field, position, path) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (transform_id, field, position, path)
+                        for position, path in enumerate(doc[field] or [])
+                    ],
+                )
+
+    def _insert(self, doc: dict):
+        with self._transaction() as db:
+            self._write(db, None, doc)
+
+    def _upsert(self, doc: dict, where: str, params: Sequence[Any], insert=True):
+        with self._transaction() as db:
+            ids = [
+                row[0]
+                for row in db.execute(
+                    f"SELECT id FROM transforms WHERE {where}", params
+                )
+            ]
+            if not ids and insert:
+                self._write(db, None, doc)
+            for transform_id in ids:
+                self._write(db, transform_id, doc)
+
+    def _search(
+        self, where: str, params: Sequence[Any], with_files: bool = True
+    ) -> List[Dict[str, Any]]:
+        with self._transaction(write=False) as db:
+            return self._select(db, where, params, with_files)
+
+    def _select(
+        self,
+        db: sqlite3.Connection,
+        where: str,
+        params: Sequence[Any],
+        with_files: bool = True,
+    ) -> List[Dict[str, Any]]:
+        records = {
+            transform_id: json.loads(doc)
+            for transform_id, doc in db.execute(
+                f"SELECT id, doc FROM transforms WHERE {where} ORDER BY id", params
+            )
+        }
+        if with_files and records:
+            for transform_id, field, path in db.execute(
+                "SELECT transform_id, field, path FROM transform_files "
+                "WHERE transform_id IN "
+                f"(SELECT id FROM transforms WHERE {where}) "
+                "ORDER BY transform_id, field, position",
+                params,
+            ):
+                if transform_id in records:
+                    records[transform_id][field].append(path)
+        return list(records.values())
+
+    def _remove(self, where: str, params: Sequence[Any]):
+        with self._transaction() as db:
+            db.execute(
+                "DELETE FROM transform_downloads WHERE request_id IN "
+                f"(SELECT request_id FROM transforms WHERE {where})",
+                params,
+            )
+            db.execute(f"DELETE FROM transforms WHERE {where}", params)
+
     def transformed_results(
         self,
         transform: TransformRequest,
@@ -82,29 +363,26 @@ class QueryCache:
         )
 
     def cache_transform(self, record: TransformedResults):
-        transforms = Query()
-        with self.lock:
-            self.db.upsert(
-                json.loads(record.model_dump_json()), transforms.hash == record.hash
-            )
+        self._upsert(json.loads(record.model_dump_json()), "hash = ?", (record.hash,))
 
     def update_record(self, record: TransformedResults):
-        transforms = Query()
-        with self.lock:
-            self.db.update(
-                json.loads(record.model_dump_json()), transforms.hash == record.hash
-            )
+        self._upsert(
+            json.loads(record.model_dump_json()),
+            "hash = ?",
+            (record.hash,),
+            insert=False,
+        )
 
     def contains_hash(self, hash: str) -> bool:
         """
         Check if the cache has completed records for a hash
         """
-        transforms = Query()
-        with self.lock:
-            records = self.db.search(
-                (transforms.hash == hash) & ~(transforms.status == "SUBMITTED")
-            )
-        return len(records) > 0
+        with self._db_lock:
+            row = self.db.execute(
+                f"SELECT 1 FROM transforms WHERE hash = ? AND {_NOT_SUBMITTED} LIMIT 1",
+                (hash,),
+            ).fetchone()
+        return row is not None
 
     def is_transform_request_submitted(self, hash_value: str) -> bool:
         """
@@ -112,50 +390,41 @@ class QueryCache:
         Returns False if the request is not in the cache at all
         or not submitted
         """
-        transform = Query()
-        with self.lock:
-            records = self.db.search((transform.hash == hash_value))
+        with self._db_lock:
+            row = self.db.execute(
+                "SELECT status FROM transforms WHERE hash = ? ORDER BY id LIMIT 1",
+                (hash_value,),
+            ).fetchone()
 
-        if not records:
-            return False
-
-        if "status" in records[0] and records[0]["status"] == "SUBMITTED":
-            return True
-        return False
+        return row is not None and row[0] == "SUBMITTED"
 
     def get_transform_request_id(self, hash_value: str) -> Optional[str]:
         """
         Return the request id of cached record
         """
-        transform = Query()
-
-        with self.lock:
-            records = self.db.search(transform.hash == hash_value)
+        with self._db_lock:
+            row = self.db.execute(
+                "SELECT request_id FROM transforms WHERE hash = ? ORDER BY id LIMIT 1",
+                (hash_value,),
+            ).fetchone()
 
-        if not records or "request_id" not in records[0]:
+        if row is None or row[0] is None:
             raise CacheException("Request Id not found")
-        return records[0]["request_id"]
+        return row[0]
 
     def update_transform_status(self, hash_value: str, status: str) -> None:
         """
         Update the cached record status
         """
-        transform = Query()
-        with self.lock:
-            self.db.upsert(
-                {"hash": hash_value, "status": status}, transform.hash == hash_value
-            )
+        self._upsert({"hash": hash_value, "status": status}, "hash = ?", (hash_value,))
 
     def update_transform_request_id(self, hash_value: str, request_id: str) -> None:
         """
         Update the cached record request id
         """
-        transform = Query()
-        with self.lock:
-            self.db.upsert(
-                {"hash": hash_value, "request_id": request_id},
-                transform.hash == hash_value,
-            )
+        self._upsert(
+            {"hash": hash_value, "request_id": request_id}, "hash = ?", (hash_value,)
+        )
 
     def cache_submitted_transform(
         self, transform: TransformRequest, request_id: str
@@ -171,27 +440,95 @@ class QueryCache:
             "status": "SUBMITTED",
             "submit_time": datetime.now(timezone.utc).isoformat(),
         }
-        transforms = Query()
-        with self.lock:
-            self.db.upsert(record, transforms.hash == record["hash"])
+        self._upsert(record, "hash = ?", (record["hash"],))
+
+    def adopt_legacy_hash(self, hash: str, legacy_hashes: Iterable[str]) -> bool:
+        """
+        Move the records of a transform request saved under one of its older hashes
+        (see TransformRequest.legacy_hashes) to its current hash, unless there are
+        records under the current hash already. Returns True if records were moved.
+        """
+        legacy_hashes = [h for h in legacy_hashes if h != hash]
+        if not legacy_hashes:
+            return False
+        placeholders = ", ".join("?" * len(legacy_hashes))
+        with self._db_lock:
+            # Look before taking the write lock: nearly always there is nothing to move
+            found = self.db.execute(
+                f"SELECT hash FROM transforms WHERE hash IN (?, {placeholders}) LIMIT 1",
+                (hash, *legacy_hashes),
+            ).fetchone()
+        if found is None or found[0] == hash:
+            return False
+
+        with self._transaction() as db:
+            if db.execute(
+                "SELECT 1 FROM transforms WHERE hash = ? LIMIT 1", (hash,)
+            ).fetchone():
+                return False
+            for legacy_hash in legacy_hashes:
+                rows = db.execute(
+                    "SELECT id, doc FROM transforms WHERE hash = ?", (legacy_hash,)
+                ).fetchall()
+                for transform_id, doc in rows:
+                    db.execute(
+                        "UPDATE transforms SET hash = ?, doc = ? WHERE id = ?",
+                        (
+                            hash,
+                            json.dumps({**json.loads(doc), "hash": hash}),
+                            transform_id,
+                        ),
+                    )
+                if rows:
+                    return True
+        return False
 
     def get_transform_by_hash(self, hash: str) -> Optional[TransformedResults]:
         """
         Returns completed transformations by hash
         """
-        transforms = Query()
-        with self.lock:
-            records = records = self.db.search(
-                (transforms.hash == hash) & ~(transforms.status == "SUBMITTED")
+        # Read and mark as used at once, so garbage collection can't evict the record
+        # in between
+        with self._transaction() as db:
+            records = self._select(db, f"hash = ? AND {_NOT_SUBMITTED}", (hash,))
+
+            if not records:
+                return None
+
+            if len(records) != 1:
+                raise CacheException("Multiple records found in db for hash")
+            if not db.execute(
+                f"UPDATE transforms SET last_access = ? "
+                f"WHERE hash = ? AND {_NOT_SUBMITTED}",
+                (time.time(), hash),
+            ).rowcount:
+                return None
+        return TransformedResults(**records[0])
+
+    def get_transforms_by_hash(
+        self, hashes: Iterable[str], with_files: bool = True
+    ) -> List[TransformedResults]:
+        r"""
+        The completed transforms with any of the given hashes. Unlike
+        :py:meth:`get_transform_by_hash` this is not a use of the transforms, and
+        doesn't change which ones are evicted first.
+
+        :param hashes: Hashes of the transforms
+        :param with_files: Read the file and signed URL lists of each transform too
+        """
+        hashes = sorted(set(hashes))
+        records = []
+        # Stay within SQLite's limit on the number of parameters of a statement
+        for start in range(0, len(hashes), _HASHES_PER_QUERY):
+            end = start + _HASHES_PER_QUERY
+            batch = hashes[start:end]
+            records += self._search(
+                f"hash IN ({', '.join('?' * len(batch))}) "
+                f"AND request_id IS NOT NULL AND {_NOT_SUBMITTED}",
+                batch,
+                with_files,
             )
-
-        if not records:
-            return None
-
-        if len(records) != 1:
-            raise CacheException("Multiple records found in db for hash")
-        else:
-            return TransformedResults(**records[0])
+        return [TransformedResults(**doc) for doc in records]
 
     def get_transform_by_request_id(
         self, request_id: str
@@ -199,10 +536,7 @@ class QueryCache:
         """
         Returns completed transformed results using a request id
         """
-        transforms = Query()
-
-        with self.lock:
-            records = self.db.search(transforms.request_id == request_id)
+        records = self._search("request_id = ?", (request_id,))
 
         if not records:
             return None
@@ -212,41 +546,246 @@ class QueryCache:
         else:
             return TransformedResults(**records[0])
 
-    def cache_path_for_transform(self, transform_status: TransformStatus) -> Path:
+    def cache_path_for_transform(
+        self, transform_status: TransformStatus, create: bool = True
+    ) -> Path:
+        r"""
+        Directory the output files of a transform are downloaded to
+
+        :param transform_status: Status of the transform
+        :param create: Make the directory if it doesn't exist yet
+        """
         assert self.config.cache_path is not None, "Cache path not set"
         base = Path(self.config.cache_path)
         result = Path(os.path.join(base, transform_status.request_id))
-        result.mkdir(parents=True, exist_ok=True)
+        if create:
+            result.mkdir(parents=True, exist_ok=True)
         return result
 
-    def cached_queries(self) -> List[TransformedResults]:
-        transforms = Query()
+    def blob_store(self) -> Optional[BlobStore]:
+        """
+        Store of downloaded files shared by all the transforms in the cache, or None
+        unless ``deduplicate_downloads`` is configured.
+        """
+        if not self.config.deduplicate_downloads:
+            return None
+        return BlobStore(Path(self.config.cache_path) / _BLOB_DIR)
 
-        with self.lock:
-            result = [
-                TransformedResults(**doc)
-                for doc in self.db.search(
-                    transforms.request_id.exists() & ~(transforms.status == "SUBMITTED")
-                )
-            ]
-        return result
+    def cached_queries(self, with_files: bool = True) -> List[TransformedResults]:
+        r"""
+        The completed transforms in the cache
+
+        :param with_files: Read the file and signed URL lists of each transform too.
+            Without them, those lists are left empty, which is much faster for large
+            caches.
+        """
+        return [
+            TransformedResults(**doc)
+            for doc in self._search(
+                f"request_id IS NOT NULL AND {_NOT_SUBMITTED}", (), with_files
+            )
+        ]
+
+    def save_total_sizes(self, sizes: Dict[str, int]):
+        r"""
+        Record the size of the downloaded files of transforms, measured for records
+        from before it was recorded at download time
+
+        :param sizes: Bytes of the files of each transform, by hash
+        """
+        with self._transaction() as db:
+            for hash, size in sizes.items():
+                for (transform_id,) in db.execute(
+                    "SELECT id FROM transforms WHERE hash = ?", (hash,)
+                ).fetchall():
+                    self._write(db, transform_id, {"total_size": size})
 
     def queries_in_state(self, state: str) -> List[dict]:
         """Return all transform records in a given state."""
-        transforms = Query()
-        with self.lock:
-            return [
-                doc
-                for doc in self.db.search(
-                    (transforms.status == "SUBMITTED") & transforms.request_id.exists()
-                )
-            ]
+        return self._search("status = ? AND request_id IS NOT NULL", (state,))
 
     def delete_record_by_request_id(self, request_id: str):
-        with self.lock:
-            self.db.remove(where("request_id") == request_id)
+        self._remove("request_id = ?", (request_id,))
 
     def delete_record_by_hash(self, hash: str):
-        transforms = Query()
+        self._remove("hash = ?", (hash,))
+
+    def collect_garbage(
+        self, max_size: Optional[int] = None, max_age: Optional[float] = None
+    ) -> List[TransformedResults]:
+        r"""
+        Evict completed transforms, records and downloaded files, starting from the
+        least recently used, until none is older than ``max_age`` and the total size of
+        the rest is within ``max_size``. Blobs no longer linked from any transform are
+        removed too.
+
+        A transform used by another process after it was picked is kept. Evicted
+        directories are moved aside before they are deleted, so files already open
+        stay readable. Directories left behind there by an interrupted collection are
+        deleted first; what can't be deleted counts toward the total size.
+
+        :param max_size: Budget in bytes, defaults to ``cache_max_size``
+        :param max_age: Maximum days since last use, defaults to ``cache_max_age``
+        :return: The evicted transforms
+        """
+        max_size = max_size if max_size is not None else self.config.cache_max_size
+        max_age = max_age if max_age is not None else self.config.cache_max_age
+        now = time.time()
+
         with self.lock:
-            self.db.remove(transforms.hash == hash)
+            trash_size = self._empty_trash()
+            with self._db_lock:
+                rows = self.db.execute(
+                    "SELECT id, last_access FROM transforms "
+                    f"WHERE request_id IS NOT NULL AND {_NOT_SUBMITTED} "
+                    "ORDER BY last_access, id"
+                ).fetchall()
+            candidates = []
+            sizes = {}
+            for transform_id, last_access in rows:
+                docs = self._search("id = ?", (transform_id,))
+                try:
+                    record = TransformedResults(**docs[0])
+                except (IndexError, ValidationError):
+                    # Gone, or still being written by the delivery that completed it
+                    continue
+                candidates.append((transform_id, last_access, record))
+                sizes[transform_id] = _record_size(docs[0])
+            total = trash_size + sum(sizes.values())
+
+            evicted = []
+            for transform_id, last_access, record in candidates:
+                expired = max_age is not None and now - last_access > max_age * 86400
+                over_budget = max_size is not None and total > max_size
+                if not (expired or over_budget):
+                    break
+                if self._evict(transform_id, last_access, record):
+                    total -= sizes[transform_id]
+                    evicted.append(record)
+
+            self._remove_unlinked_blobs(now)
+        return evicted
+
+    def _evict(
+        self, transform_id: int, last_access: float, record: TransformedResults
+    ) -> bool:
+        with self._transaction() as db:
+            if not db.execute(
+                "DELETE FROM transforms WHERE id = ? AND last_access = ?",
+                (transform_id, last_access),
+            ).rowcount:
+                # Used (or removed) since it was picked
+                return False
+            if db.execute(
+                "SELECT 1 FROM transforms WHERE request_id = ?", (record.request_id,)
+            ).fetchone():
+                return True
+            db.execute(
+                "DELETE FROM transform_downloads WHERE request_id = ?",
+                (record.request_id,),
+            )
+
+        # Nobody can look the files up any more. Move them out of the way in one step,
+        # then delete them: a reader never sees a half deleted directory.
+        trash = self._trash_dir()
+        trash.mkdir(exist_ok=True)
+        doomed = trash / f"{transform_id}-{record.request_id}"
+        try:
+            os.replace(record.data_dir, doomed)
+        except FileNotFoundError:
+            return True
+        shutil.rmtree(doomed, ignore_errors=True)
+        return True
+
+    def _trash_dir(self) -> Path:
+        return Path(self.config.cache_path) / ".servicex" / "trash"
+
+    def _empty_trash(self) -> int:
+        "Delete what evictions left in the trash, returning the bytes still there"
+        trash = self._trash_dir()
+        if not trash.exists():
+            return 0
+        size = 0
+        for doomed in trash.iterdir():
+            shutil.rmtree(doomed, ignore_errors=True)
+            if doomed.exists():
+                size += _tree_size(doomed)
+        return size
+
+    def _remove_unlinked_blobs(self, now: float):
+        store = BlobStore(Path(self.config.cache_path) / _BLOB_DIR)
+        if not store.root.exists():
+            return
+        # Blobs are shared through hard links, or symlinks when those aren't available
+        symlinked = set()
+        for record in self.cached_queries():
+            for path in record.file_list:
+                if os.path.islink(path):
+                    symlinked.add(os.path.realpath(path))
+        for blob in store.root.glob("*/*"):
+            info = blob.stat()
+            if (
+                info.st_nlink == 1
+                and now - info.st_mtime > _BLOB_GRACE_PERIOD
+                and os.path.realpath(blob) not in symlinked
+            ):
+                blob.unlink(missing_ok=True)
+
+    def get_download_manifest(
+        self, request_id: str
+    ) -> Dict[str, DownloadManifestEntry]:
+        """
+        Return the download progress recorded for each output object of a transform
+        """
+        with self._db_lock:
+            rows = self.db.execute(
+                "SELECT entry FROM transform_downloads WHERE request_id = ?",
+                (request_id,),
+            ).fetchall()
+        entries = [DownloadManifestEntry.model_validate_json(row[0]) for row in rows]
+        return {entry.filename: entry for entry in entries}
+
+    def save_download_manifest(
+        self, request_id: str, entries: Iterable[DownloadManifestEntry]
+    ):
+        """
+        Record the download progress of some output objects of a transform, in a single
+        transaction
+        """
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO transform_downloads "
+                "(request_id, filename, state, entry) VALUES (?, ?, ?, ?)",
+                [
+                    (request_id, e.filename, e.state.value, e.model_dump_json())
+                    for e in entries
+                ],
+            )
+
+    def get_server_info(self, url: str) -> Optional[Tuple[ServiceXInfo, float]]:
+        """
+        Return the server info saved for a ServiceX endpoint, and when it was fetched
+        (seconds since the epoch), if any
+        """
+        with self._db_lock:
+            row = self.db.execute(
+                "SELECT info, fetched_at FROM server_info WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return ServiceXInfo.model_validate_json(row[0]), row[1]
+        except ValidationError:
+            # Saved by a version that knew a different model: fetch it again
+            return None
+
+    def save_server_info(self, url: str, info: ServiceXInfo):
+        """
+        Save the server info just fetched from a ServiceX endpoint
+        """
+        with self._transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO server_info (url, info, fetched_at) "
+                "VALUES (?, ?, ?)",
+                (url, info.model_dump_json(by_alias=True), time.time()),
+            )
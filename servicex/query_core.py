@@ -29,11 +29,17 @@ from __future__ import annotations
 
 import datetime
 import abc
+import ast
 import asyncio
+import functools
 from abc import ABC
 from asyncio import Task, CancelledError
 import logging
-from typing import List, Optional, Union
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+from servicex.blocking_io import run_blocking
+from tenacity import retry, stop_after_attempt, wait_random_exponential
+from servicex.download_manifest import DownloadManifest
+from servicex.download_scheduler import DownloadScheduler, shared_scheduler
 from servicex.expandable_progress import ExpandableProgress
 from rich.logging import RichHandler
 
@@ -42,21 +48,40 @@ from servicex.types import DID
 from rich.progress import Progress, TaskID
 
 from servicex.configuration import Configuration
-from servicex.minio_adapter import MinioAdapter
+from servicex.minio_adapter import MinioAdapter, shared_s3_clients
 from servicex.models import (
     TransformRequest,
     ResultDestination,
+    DownloadState,
     ResultFormat,
+    ResultFile,
     Status,
     TransformedResults,
 )
+from servicex.polling import FixedPolling, PollingStrategy, status_changed
 from servicex.query_cache import QueryCache
+from servicex.result_stream import ResultStream
 from servicex.servicex_adapter import ServiceXAdapter
+from servicex.status_poller import TransformStatusPoller
 
-from make_it_sync import make_sync
+from servicex.background_loop import BackgroundLoop, make_sync_method
 
 DONE_STATUS = (Status.complete, Status.canceled, Status.fatal, Status.bad_dataset)
 ProgressIndicators = Union[Progress, ExpandableProgress]
+# Cached presigned URLs with less time than this left are signed again
+_SIGNED_URL_REFRESH_MARGIN = datetime.timedelta(hours=1)
+# Query attributes the transform request is built from
+_REQUEST_ATTRIBUTES = frozenset(
+    [
+        "title",
+        "codegen",
+        "result_format",
+        "dataset_identifier",
+        "query_string_generator",
+    ]
+)
+# Attribute a QueryStringGenerator remembers its selection strings in
+_SELECTION_STRINGS = "_selection_strings"
 logger = logging.getLogger(__name__)
 shell_handler = RichHandler(markup=True)
 logger.addHandler(shell_handler)
@@ -81,6 +106,7 @@ class Query:
         ignore_cache: bool = False,
         query_string_generator: Optional[QueryStringGenerator] = None,
         fail_if_incomplete: bool = True,
+        polling_strategy: Optional[PollingStrategy] = None,
     ):
         r"""
         This is the main class for constructing transform requests and receiving the
@@ -99,6 +125,10 @@ class Query:
         :param result_format:
         :param ignore_cache:  If true, ignore the cache and always submit a new transform
         :param fail_if_incomplete: If true, raise an exception if we don't have 100% completion
+        :param polling_strategy: How long to wait between polls of the transform status
+                                 and results, e.g. :py:class:`AdaptivePolling`. If not
+                                 set, poll every ``servicex_polling_interval`` and
+                                 ``minio_polling_interval`` seconds.
         """
         self.servicex = sx_adapter
         self.configuration = config
@@ -125,12 +155,33 @@ class Query:
         # Number of seconds in between ServiceX status polls
         self.servicex_polling_interval = servicex_polling_interval
         self.minio_polling_interval = minio_polling_interval
+        self.polling_strategy = polling_strategy
+
+        # Number of status and result polls made for the current transform
+        self.status_polls = 0
+        self.results_polls = 0
+        # Bytes of each file downloaded for the current transform, by local path
+        self.downloaded_sizes: Dict[str, int] = {}
+        # Set when the transform status changes, to wake the result listing loop
+        self._status_event: Optional[asyncio.Event] = None
+
+        # Set by DatasetGroup to share one status polling loop between its queries
+        self.status_poller: Optional[TransformStatusPoller] = None
+        # Set by a ServiceXClient with a background loop to run the sync calls on it
+        self.background_loop: Optional[BackgroundLoop] = None
+        # Set by DatasetGroup to share download connections fairly between its queries
+        self.download_scheduler: Optional[DownloadScheduler] = None
 
     def generate_selection_string(self) -> str:
         if self.query_string_generator is None:
             raise RuntimeError("query string generator not set")
         return self.query_string_generator.generate_selection_string()
 
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        if name in _REQUEST_ATTRIBUTES:
+            self.__dict__.pop("_transform_request", None)
+
     @property
     def transform_request(self):
         if not self.result_format:
@@ -138,16 +189,29 @@ class Query:
                 "Unable to determine the result file format. Use set_result_format method"
             )  # NOQA E501
 
-        sx_request = TransformRequest(
-            title=self.title,
-            codegen=self.codegen,
-            result_destination=ResultDestination.object_store,  # type: ignore
-            result_format=self.result_format,  # type: ignore
-            selection=self.generate_selection_string(),
-        )  # type: ignore
-        # Transfer the DID into the transform request
-        self.dataset_identifier.populate_transform_request(sx_request)
-        return sx_request
+        # Built once, along with its hash, until the query is changed. The selection
+        # string is remembered by its generator, so checking it is cheap.
+        selection = self.generate_selection_string()
+        sx_request = self.__dict__.get("_transform_request")
+        if sx_request is None or sx_request.selection != selection:
+            sx_request = TransformRequest(
+                title=self.title,
+                codegen=self.codegen,
+                result_destination=ResultDestination.object_store,  # type: ignore
+                result_format=self.result_format,  # type: ignore
+                selection=selection,
+            )  # type: ignore
+            # Transfer the DID into the transform request
+            self.dataset_identifier.populate_transform_request(sx_request)
+            if _has_canonical_form(self.query_string_generator):
+                sx_request.set_canonical_selection(
+                    self.query_string_generator.canonical_selection_string()
+                )
+            # Worked out now so every copy handed out carries it
+            sx_request.compute_hash()
+            self.__dict__["_transform_request"] = sx_request
+        # Callers may change the request they are given
+        return sx_request.model_copy()
 
     def set_title(self, title: str) -> Query:
         self.title = title
@@ -163,11 +227,15 @@ class Query:
         self.result_format = result_format
         return self
 
+    def _polling(self, interval: float) -> PollingStrategy:
+        return self.polling_strategy or FixedPolling(interval)
+
     async def submit_and_download(
         self,
         signed_urls_only: bool,
         expandable_progress: ExpandableProgress,
         dataset_group: Optional[bool] = False,
+        result_stream: Optional[ResultStream] = None,
     ) -> Optional[TransformedResults]:
         """
         Submit the transform request to ServiceX. Poll the transform status to see when
@@ -179,6 +247,8 @@ class Query:
         :param display_progress: Set to false to disable the progress bar
         :param expandable_progress: Provide an existing progress bar. Set to None to have
                                     one created for you
+        :param result_stream: If set, each file (or url) is also handed to this stream
+                              as soon as it is ready
 
         :return: Transform results object which contains the list of files downloaded
                  or the list of pre-signed urls
@@ -190,7 +260,23 @@ class Query:
         )
 
         download_files_task = None
+        monitor_task = None
+        transform_failed = False
+        self.status_polls = 0
+        self.results_polls = 0
+        self.downloaded_sizes = {}
         loop = asyncio.get_running_loop()
+        forgetting: List[Task] = []
+
+        def forget_transform():
+            "Drop the cache record of a failed transform, off the event loop"
+            forgetting.append(
+                loop.create_task(
+                    run_blocking(
+                        self.cache.delete_record_by_request_id, self.request_id
+                    )
+                )
+            )
 
         def transform_complete(task: Task):
             """
@@ -199,6 +285,7 @@ class Query:
             :param task:
             :return:
             """
+            nonlocal transform_failed
             expandable_progress.refresh()
             if task.exception():
                 logger.error(
@@ -206,8 +293,9 @@ class Query:
                     exc_info=task.exception(),
                 )
                 if self.fail_if_incomplete:
-                    self.cache.delete_record_by_request_id(self.request_id)
+                    forget_transform()
                     if download_files_task:
+                        transform_failed = True
                         download_files_task.cancel("Transform failed")
                 raise task.exception()
 
@@ -249,7 +337,7 @@ class Query:
                             f"More information of '{self.title}' [bold red on white][link={kibana_link}]HERE[/link][/bold red on white]"  # NOQA: E501
                         )
                     if self.fail_if_incomplete:
-                        self.cache.delete_record_by_request_id(self.request_id)
+                        forget_transform()
                         raise ServiceXException(errorstr)
                     else:
                         logger.error("Will continue to download what is available")
@@ -263,28 +351,49 @@ class Query:
         sx_request = self.transform_request
         sx_request_hash = sx_request.compute_hash()
 
-        # Invalidate the cache if the hash already present but if the user ignores cache
-        if self.ignore_cache and (
-            self.cache.contains_hash(sx_request_hash)
-            or self.cache.is_transform_request_submitted(sx_request_hash)
+        def lookup_cache() -> Optional[TransformedResults]:
+            # Records saved before the selection was hashed in canonical form
+            self.cache.adopt_legacy_hash(sx_request_hash, sx_request.legacy_hashes())
+
+            # Invalidate the cache if the hash already present but if the user ignores
+            # cache
+            if self.ignore_cache:
+                if self.cache.contains_hash(
+                    sx_request_hash
+                ) or self.cache.is_transform_request_submitted(sx_request_hash):
+                    self.cache.delete_record_by_hash(sx_request_hash)
+                return None
+
+            # Let's see if this is in the cache already
+            return self.cache.get_transform_by_hash(sx_request_hash)
+
+        # The cache database is only ever touched from the I/O thread pool, so a
+        # contended cache lock holds up this query but not the event loop
+        cached_record = await run_blocking(lookup_cache)
+
+        # Presigned URLs that are about to expire are signed again, all in one go
+        if (
+            cached_record
+            and signed_urls_only
+            and cached_record.signed_url_list
+            and _signed_urls_expiring(cached_record)
         ):
-            self.cache.delete_record_by_hash(sx_request_hash)
-
-        # Let's see if this is in the cache already, but respect the user's wishes
-        # to ignore the cache
-        cached_record = (
-            self.cache.get_transform_by_hash(sx_request_hash)
-            if not self.ignore_cache
-            else None
-        )
+            logger.info("Cached signed URLs are about to expire, signing them again")
+            cached_record.signed_url_list = []
 
         # And that we grabbed the resulting files in the way that the user requested
         # (Downloaded, or obtained pre-signed URLs)
         if cached_record:
-            if (signed_urls_only and cached_record.signed_url_list) or (
-                not signed_urls_only and cached_record.file_list
-            ):
+            if _complete_in_cache(cached_record, signed_urls_only):
                 logger.info("Returning results from cache")
+                if result_stream:
+                    for uri in (
+                        cached_record.signed_url_list
+                        if signed_urls_only
+                        else cached_record.file_list
+                    ):
+                        await result_stream.reserve()
+                        result_stream.put(self.title, uri)
                 return cached_record
 
         # If we get here with a cached record, then we know that the transform
@@ -324,6 +433,11 @@ class Query:
             # submit a new transform. This avoids a network call when a cached
             # transform is used.
             supported_codegens = await self.servicex.get_code_generators_async()
+            if self.codegen not in supported_codegens:
+                # The list may have been saved before the code generator was deployed
+                supported_codegens = await self.servicex.get_code_generators_async(
+                    refresh=True
+                )
             if self.codegen not in supported_codegens:
                 # Include available code generators to guide user when an
                 # unsupported one is requested.
@@ -334,11 +448,17 @@ class Query:
                     f"{available_codegens}"
                 )
 
-            if self.cache.is_transform_request_submitted(sx_request_hash):
-                self.request_id = self.cache.get_transform_request_id(sx_request_hash)
+            if await run_blocking(
+                self.cache.is_transform_request_submitted, sx_request_hash
+            ):
+                self.request_id = await run_blocking(
+                    self.cache.get_transform_request_id, sx_request_hash
+                )
             else:
                 self.request_id = await self.servicex.submit_transform(sx_request)
-                self.cache.cache_submitted_transform(sx_request, self.request_id)
+                await run_blocking(
+                    self.cache.cache_submitted_transform, sx_request, self.request_id
+                )
 
             monitor_task = loop.create_task(
                 self.transform_status_listener(
@@ -353,12 +473,20 @@ class Query:
         else:
             self.request_id = cached_record.request_id
 
+        # URLs signed from now on are valid at least until then
+        signed_url_expires = (
+            datetime.datetime.now(datetime.timezone.utc)
+            + datetime.timedelta(seconds=self.configuration.signed_url_expiration)
+            if signed_urls_only
+            else None
+        )
         download_files_task = loop.create_task(
             self.download_files(
                 signed_urls_only,
                 expandable_progress,
                 download_progress,
                 cached_record,
+                result_stream,
             )
         )
 
@@ -371,10 +499,12 @@ class Query:
                 signed_urls = download_result
                 if cached_record:
                     cached_record.signed_url_list = download_result
+                    cached_record.signed_url_expires = signed_url_expires
             else:
                 downloaded_files = download_result
                 if cached_record:
                     cached_record.file_list = download_result
+                    cached_record.total_size = self._downloaded_total(download_result)
 
             # Update the cache (if no failed files)
             if not cached_record:
@@ -385,20 +515,83 @@ class Query:
                     downloaded_files,
                     signed_urls,
                 )
+                transform_report.signed_url_expires = signed_url_expires
+                if not signed_urls_only:
+                    transform_report.total_size = self._downloaded_total(
+                        downloaded_files
+                    )
                 if self.current_status.files_failed == 0:
-                    self.cache.update_transform_status(sx_request_hash, "COMPLETE")
-                    self.cache.cache_transform(transform_report)
+                    await run_blocking(
+                        self.cache.update_transform_status, sx_request_hash, "COMPLETE"
+                    )
+                    await run_blocking(self.cache.cache_transform, transform_report)
             else:
                 if self.current_status.files_failed == 0:
-                    self.cache.update_record(cached_record)
+                    await run_blocking(self.cache.update_record, cached_record)
                 transform_report = cached_record
 
+            logger.info(
+                f"{self.title}: {self.status_polls} status polls and "
+                f"{self.results_polls} result polls for transform {self.request_id}"
+            )
+            await asyncio.gather(*forgetting)
             return transform_report
         except CancelledError:
+            if not transform_failed:
+                # We were cancelled ourselves (e.g. a result stream was abandoned)
+                if monitor_task:
+                    monitor_task.remove_done_callback(transform_complete)
+                    monitor_task.cancel()
+                raise
             logger.warning("Aborted file downloads due to transform failure")
 
+        await asyncio.gather(*forgetting)
         _ = await monitor_task  # raise exception, if it is there
 
+    async def _wait_for_status_change(self, timeout: float) -> bool:
+        "Sleep up to timeout seconds; True if woken by a change of the transform status"
+        event = self._status_event
+        assert event is not None
+        # Not wait_for, which can swallow a cancellation arriving with the event
+        waiter = asyncio.ensure_future(event.wait())
+        try:
+            await asyncio.wait([waiter], timeout=timeout)
+        finally:
+            waiter.cancel()
+        woken = event.is_set()
+        event.clear()
+        return woken
+
+    def _downloaded_total(self, files: List[str]) -> Optional[int]:
+        "Bytes of the downloaded files, if the size of each was reported"
+        sizes = [self.downloaded_sizes.get(f) for f in files]
+        return None if None in sizes else sum(sizes)
+
+    async def cached_results_async(
+        self, signed_urls_only: bool
+    ) -> Optional[TransformedResults]:
+        r"""
+        The results of this query that can be returned straight from the cache, without
+        talking to ServiceX or the object store. Nothing is submitted, and a cache
+        that is ignored or only partly fits the request is left alone.
+
+        :param signed_urls_only: Look for presigned URLs rather than downloaded files
+        :return: The cached results, or None if the query has to go to ServiceX
+        """
+        if self.ignore_cache:
+            return None
+        sx_request = self.transform_request
+
+        def lookup_cache() -> Optional[TransformedResults]:
+            sx_request_hash = sx_request.compute_hash()
+            self.cache.adopt_legacy_hash(sx_request_hash, sx_request.legacy_hashes())
+            return self.cache.get_transform_by_hash(sx_request_hash)
+
+        record = await run_blocking(lookup_cache)
+        if record is None or not _complete_in_cache(record, signed_urls_only):
+            return None
+        return record
+
     async def transform_status_listener(
         self,
         progress: ExpandableProgress,
@@ -422,8 +615,11 @@ class Query:
         # finder has completed its work. In the meantime transformers will already
         # start up and begin work on the files we know about
         final_count = None
+        polling = self._polling(self.servicex_polling_interval)
+        interval = None
 
         while True:
+            previous_status = self.current_status
             await self.retrieve_current_transform_status()
 
             # Do we finally know the final number of files in the dataset? Now is the
@@ -572,17 +768,29 @@ class Query:
                         )
                     raise ServiceXException(err_str)
 
-            await asyncio.sleep(self.servicex_polling_interval)
+            if not self.status_poller:
+                # A shared poller paces the polls itself
+                interval = polling.next_interval(
+                    interval, status_changed(previous_status, self.current_status)
+                )
+                await asyncio.sleep(interval)
 
     async def retrieve_current_transform_status(self):
-        s = await self.servicex.get_transform_status(self.request_id)
+        if self.status_poller:
+            s = await self.status_poller.get_status(self.request_id)
+        else:
+            s = await self.servicex.get_transform_status(self.request_id)
+        self.status_polls += 1
 
         # Is this the first time we've polled status? We now know the request ID.
         # Update the display and set our download directory.
         if not self.current_status:
             logger.info(f"ServiceX Transform {s.title}: {s.request_id}")
-            self.download_path = self.cache.cache_path_for_transform(s)
+            # The directory itself is made by the first download, off the event loop
+            self.download_path = self.cache.cache_path_for_transform(s, create=False)
 
+        if self._status_event is not None and status_changed(self.current_status, s):
+            self._status_event.set()
         self.current_status = s
 
         # We can only initialize the minio adapter with data from the transform
@@ -590,6 +798,8 @@ class Query:
         # transform id as the bucket.
         if not self.minio:
             self.minio = MinioAdapter.for_transform(self.current_status)
+            if self.cache is not None:
+                self.minio.blob_store = self.cache.blob_store()
 
     async def download_files(
         self,
@@ -597,10 +807,13 @@ class Query:
         progress: ExpandableProgress,
         download_progress: TaskID,
         cached_record: Optional[TransformedResults],
+        result_stream: Optional[ResultStream] = None,
     ) -> List[str]:
         """
         Task to monitor the list of files in the transform output's bucket. Any new files
-        will be downloaded.
+        will be downloaded. Files are handed to the result stream, if any, as they land.
+        Download progress is recorded in the transform's download manifest, so files
+        finished by an earlier, interrupted, delivery are not listed or fetched again.
         """
 
         files_seen = set()
@@ -608,6 +821,14 @@ class Query:
         download_tasks = []
         loop = asyncio.get_running_loop()
 
+        manifest = (
+            await run_blocking(DownloadManifest, self.cache, self.request_id)
+            if self.cache is not None and not signed_urls_only
+            else None
+        )
+        resumed_files = []
+        scheduler = self.download_scheduler or shared_scheduler()
+
         async def download_file(
             minio: MinioAdapter,
             filename: str,
@@ -615,28 +836,113 @@ class Query:
             download_progress: TaskID,
             shorten_filename: bool = False,
             expected_size: Optional[int] = None,
+            created_at: Optional[datetime.datetime] = None,
         ):
-            downloaded_filename = await minio.download_file(
-                filename,
-                self.download_path,
-                shorten_filename=shorten_filename,
-                expected_size=expected_size,
-            )
+            if result_stream:
+                await result_stream.reserve()
+            try:
+                async with scheduler.slot(self.title, expected_size, created_at):
+                    if manifest:
+                        await manifest.update_async(filename, DownloadState.downloading)
+                    downloaded_filename = await minio.download_file(
+                        filename,
+                        self.download_path,
+                        shorten_filename=shorten_filename,
+                        expected_size=expected_size,
+                    )
+            except BaseException:
+                if result_stream:
+                    result_stream.release()
+                raise
+            if manifest:
+                await manifest.update_async(
+                    filename,
+                    DownloadState.done,
+                    local_path=downloaded_filename.as_posix(),
+                )
+            if expected_size is not None:
+                self.downloaded_sizes[downloaded_filename.as_posix()] = expected_size
             result_uris.append(downloaded_filename.as_posix())
+            if result_stream:
+                result_stream.put(self.title, downloaded_filename.as_posix())
+            progress.advance(task_id=download_progress, task_type="Download")
+
+        async def already_downloaded(
+            local_path: str,
+            progress: Progress,
+            download_progress: TaskID,
+            size: Optional[int] = None,
+        ):
+            if size is not None:
+                self.downloaded_sizes[local_path] = size
+            if result_stream:
+                await result_stream.reserve()
+                result_stream.put(self.title, local_path)
+            result_uris.append(local_path)
             progress.advance(task_id=download_progress, task_type="Download")
 
-        async def get_signed_url(
+        async def get_signed_urls(
             minio: MinioAdapter,
-            filename: str,
+            filenames: List[str],
             progress: Optional[Progress],
             download_progress: TaskID,
         ):
-            url = await minio.get_signed_url(filename)
-            result_uris.append(url)
-            if progress:
-                progress.advance(task_id=download_progress, task_type="Download")
+            urls = await minio.get_signed_urls(
+                filenames, self.configuration.signed_url_expiration
+            )
+            for url in urls:
+                if result_stream:
+                    await result_stream.reserve()
+                    result_stream.put(self.title, url)
+                result_uris.append(url)
+                if progress:
+                    progress.advance(task_id=download_progress, task_type="Download")
 
         later_than = datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
+        last_key: Optional[str] = None
+        listed_keys = set()
+
+        @retry(
+            stop=stop_after_attempt(3),
+            wait=wait_random_exponential(max=60),
+            reraise=True,
+        )
+        async def list_objects(
+            minio: MinioAdapter,
+            start_after: Optional[str],
+            wanted: Optional[int],
+            found: List[ResultFile],
+        ):
+            # Keys already listed are skipped, so an attempt can pick up where the
+            # failed one stopped
+            listing = minio.iter_bucket(start_after)
+            try:
+                async for file in listing:
+                    if file.filename in listed_keys:
+                        continue
+                    listed_keys.add(file.filename)
+                    found.append(file)
+                    if wanted is not None and len(listed_keys) >= wanted:
+                        return
+            finally:
+                await listing.aclose()
+
+        async def list_new_objects(minio: MinioAdapter) -> List[ResultFile]:
+            """
+            Stream the bucket listing for the objects not listed yet, continuing from
+            the last key listed. When that leaves some of the completed files missing
+            (they landed out of key order) the bucket is listed from the start, until
+            they are all found.
+            """
+            nonlocal last_key
+            files: List[ResultFile] = []
+            await list_objects(minio, last_key, None, files)
+            wanted = self.current_status.files_completed
+            if last_key and len(listed_keys) < wanted:
+                await list_objects(minio, None, wanted, files)
+            if files:
+                last_key = max([f.filename for f in files] + [last_key or ""])
+            return files
 
         use_local_polling = (
             "poll_local_transformation_results"
@@ -650,39 +956,87 @@ class Query:
                 "ServiceX server to the latest version."
             )
 
+        if manifest:
+            for entry in manifest.entries.values():
+                files_seen.add(entry.filename)
+                if entry.state == DownloadState.done:
+                    download_tasks.append(
+                        loop.create_task(
+                            already_downloaded(
+                                entry.local_path,
+                                progress,
+                                download_progress,
+                                entry.size,
+                            )
+                        )
+                    )
+                else:
+                    resumed_files.append(entry)
+                if entry.created_at and entry.created_at > later_than:
+                    later_than = entry.created_at
+
+        polling = self._polling(self.minio_polling_interval)
+        interval = None
+        changed = True
+        self._status_event = asyncio.Event()
+
         while True:
             if not cached_record:
-                await asyncio.sleep(self.minio_polling_interval)
+                interval = polling.next_interval(interval, changed)
+                # Files completed, or any change of the transform status, cut the wait
+                # short: results are listed as soon as there are new ones
+                changed = await self._wait_for_status_change(interval)
+            else:
+                changed = False
+            if self.minio and resumed_files:
+                # Interrupted downloads don't need a listing to be picked up again
+                for entry in resumed_files:
+                    download_tasks.append(
+                        loop.create_task(
+                            download_file(
+                                self.minio,
+                                entry.filename,
+                                progress,
+                                download_progress,
+                                shorten_filename=self.configuration.shortened_downloaded_filename,  # NOQA: E501
+                                expected_size=entry.size,
+                                created_at=entry.created_at,
+                            )
+                        )
+                    )
+                resumed_files = []
             if self.minio:
                 # if self.minio exists, self.current_status will too
                 if self.current_status.files_completed > len(files_seen):
+                    self.results_polls += 1
                     if use_local_polling:
                         files = await self.servicex.get_transformation_results(
                             self.current_status.request_id, later_than
                         )
                     else:
-                        files = await self.minio.list_bucket()
+                        files = await list_new_objects(self.minio)
 
+                    to_sign = []
                     for file in files:
                         filename = file.filename
 
                         if filename != "" and filename not in files_seen:
                             if signed_urls_only:
-                                download_tasks.append(
-                                    loop.create_task(
-                                        get_signed_url(
-                                            self.minio,
-                                            filename,
-                                            progress,
-                                            download_progress,
-                                        )
-                                    )
-                                )
+                                to_sign.append(filename)
                             else:
                                 if use_local_polling:
                                     expected_size = file.total_bytes
+                                    details = {"created_at": file.created_at}
                                 else:
                                     expected_size = file.size
+                                    details = {"checksum": file.etag}
+                                if manifest:
+                                    await manifest.update_async(
+                                        filename,
+                                        DownloadState.pending,
+                                        size=expected_size,
+                                        **details,
+                                    )
                                 download_tasks.append(
                                     loop.create_task(
                                         download_file(
@@ -692,15 +1046,26 @@ class Query:
                                             download_progress,
                                             shorten_filename=self.configuration.shortened_downloaded_filename,  # NOQA: E501
                                             expected_size=expected_size,
+                                            created_at=details.get("created_at"),
                                         )
                                     )
                                 )  # NOQA 501
                             files_seen.add(filename)
+                            changed = True
 
                             if use_local_polling:
                                 if file.created_at > later_than:
                                     later_than = file.created_at
 
+                    if to_sign:
+                        download_tasks.append(
+                            loop.create_task(
+                                get_signed_urls(
+                                    self.minio, to_sign, progress, download_progress
+                                )
+                            )
+                        )
+
             # Once the transform is complete and all files are seen we can stop polling.
             # Also, if we are just downloading or signing urls for a previous transform
             # then we know it is complete as well
@@ -712,9 +1077,15 @@ class Query:
                 )
             ):
                 break
+            if manifest and manifest.flush_due():
+                await manifest.flush_async()
 
         # Now just wait until all of our tasks complete
-        await asyncio.gather(*download_tasks)
+        try:
+            await asyncio.gather(*download_tasks)
+        finally:
+            if manifest:
+                await manifest.flush_async()
         return result_uris
 
     async def as_files_async(
@@ -727,11 +1098,51 @@ class Query:
         :return: TransformResult instance with the list of complete paths to the downloaded files
         """
         with ExpandableProgress(display_progress, provided_progress) as progress:
-            return await self.submit_and_download(
-                signed_urls_only=False, expandable_progress=progress
-            )
+            async with shared_s3_clients():
+                return await self.submit_and_download(
+                    signed_urls_only=False, expandable_progress=progress
+                )
 
-    as_files = make_sync(as_files_async)
+    as_files = make_sync_method(as_files_async)
+
+    async def iter_files_async(
+        self,
+        display_progress: bool = True,
+        provided_progress: Optional[ProgressIndicators] = None,
+        signed_urls_only: bool = False,
+        max_pending: int = 10,
+    ) -> AsyncIterator[Tuple[str, str]]:
+        r"""
+        Submit the transform and yield each file as soon as it has been downloaded,
+        rather than once the whole transform is done. The query cache is updated as
+        usual once the last file has been yielded.
+
+        :param signed_urls_only: Yield presigned URLs instead of downloading the files
+        :param max_pending: Maximum number of files fetched ahead of the consumer; a
+                            slow consumer throttles the downloads
+        :return: ``(title, path)`` pairs, where path is the local path (or URL) of the file
+        """
+        stream = ResultStream(max_pending)
+        with ExpandableProgress(display_progress, provided_progress) as progress:
+            async with shared_s3_clients():
+                task = asyncio.ensure_future(
+                    self.submit_and_download(
+                        signed_urls_only=signed_urls_only,
+                        expandable_progress=progress,
+                        result_stream=stream,
+                    )
+                )
+                try:
+                    async for item in stream.iterate([task]):
+                        yield item
+                    await task
+                finally:
+                    if not task.done():
+                        task.cancel()
+                        try:
+                            await task
+                        except CancelledError:
+                            pass
 
     async def as_signed_urls_async(
         self,
@@ -745,35 +1156,111 @@ class Query:
         :return: TransformedResults object with the presigned_urls list populated
         """
         if dataset_group:
-            return await self.submit_and_download(
-                signed_urls_only=True,
-                expandable_progress=provided_progress,
-                dataset_group=dataset_group,
-            )
+            async with shared_s3_clients():
+                return await self.submit_and_download(
+                    signed_urls_only=True,
+                    expandable_progress=provided_progress,
+                    dataset_group=dataset_group,
+                )
 
         with ExpandableProgress(
             display_progress=display_progress, provided_progress=provided_progress
         ) as progress:
-            return await self.submit_and_download(
-                signed_urls_only=True,
-                expandable_progress=progress,
-                dataset_group=dataset_group,
-            )
+            async with shared_s3_clients():
+                return await self.submit_and_download(
+                    signed_urls_only=True,
+                    expandable_progress=progress,
+                    dataset_group=dataset_group,
+                )
+
+    as_signed_urls = make_sync_method(as_signed_urls_async)
+
+
+def _signed_urls_expiring(record: TransformedResults) -> bool:
+    "Will the record's presigned URLs stop working within the refresh margin?"
+    return record.signed_url_expires is not None and (
+        record.signed_url_expires - _SIGNED_URL_REFRESH_MARGIN
+        < datetime.datetime.now(datetime.timezone.utc)
+    )
+
+
+def _complete_in_cache(record: TransformedResults, signed_urls_only: bool) -> bool:
+    "Does the cached record hold every result, in the form that was asked for?"
+    if signed_urls_only:
+        return bool(record.signed_url_list) and not _signed_urls_expiring(record)
+    return bool(record.file_list)
 
-    as_signed_urls = make_sync(as_signed_urls_async)
+
+def _generator_state(generator: QueryStringGenerator) -> tuple:
+    "A cheap summary of the attributes of a generator, which changes when they do"
+    # Syntax trees are compared by identity: func_adl builds a new tree for each step
+    # rather than changing one, and writing a tree out costs as much as the qastle
+    return tuple(
+        (name, value if isinstance(value, ast.AST) else repr(value))
+        for name, value in vars(generator).items()
+        if name != _SELECTION_STRINGS
+    )
+
+
+def _remember_selection_string(owner: type, generate):
+    "Wrap generate_selection_string so it runs once until the generator is changed"
+
+    @functools.wraps(generate)
+    def generate_selection_string(self) -> str:
+        # Keyed by the class defining the method, as overrides often call super()
+        remembered = self.__dict__.setdefault(_SELECTION_STRINGS, {})
+        state = _generator_state(self)
+        if owner not in remembered or remembered[owner][0] != state:
+            remembered[owner] = (state, generate(self))
+        return remembered[owner][1]
+
+    return generate_selection_string
 
 
 class QueryStringGenerator(ABC):
-    """This abstract class just defines an interface to give the selection string"""
+    """
+    This abstract class just defines an interface to give the selection string.
+    Generating it can be expensive (code translated, files read), so the string is
+    remembered until an attribute of the generator is set or changed in place, such
+    as a list of sub-queries appended to.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        generate = cls.__dict__.get("generate_selection_string")
+        if generate is not None and not getattr(
+            generate, "__isabstractmethod__", False
+        ):
+            cls.generate_selection_string = _remember_selection_string(cls, generate)
+
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        self.__dict__.pop(_SELECTION_STRINGS, None)
 
     @abc.abstractmethod
     def generate_selection_string(self) -> str:
         """override with the selection string to send to ServiceX"""
 
+    def canonical_selection_string(self) -> str:
+        """
+        The selection string in a canonical form, hashed to look the query up in the
+        cache. Override for query types that can spell one selection in several ways,
+        and bump SELECTION_CANONICAL_VERSION when a canonical form changes. Queries of
+        types that don't override it keep the hash they had before canonical forms.
+        """
+        return self.generate_selection_string()
+
     """ override with the codegen string you would like associated with this query class """
     default_codegen: Optional[str] = None
 
 
+def _has_canonical_form(generator: QueryStringGenerator) -> bool:
+    return (
+        type(generator).canonical_selection_string
+        is not QueryStringGenerator.canonical_selection_string
+    )
+
+
 class GenericQueryStringGenerator(QueryStringGenerator):
     """Return the string from the initializer"""
 
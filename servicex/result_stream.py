@@ -0,0 +1,95 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Deque, Iterable, Tuple
+
+
+class ResultStream:
+    r"""
+    Hands files to an ``async for`` consumer as each one is downloaded (or its URL
+    signed), tagged with the title of the sample it belongs to.
+
+    Producers call :py:meth:`reserve` before fetching a file and :py:meth:`put` once it
+    is ready. A slot is only freed when the consumer comes back for the next file, so
+    at most ``max_pending`` files are being fetched or waiting to be consumed: a slow
+    consumer throttles the downloads.
+    """
+
+    def __init__(self, max_pending: int = 10):
+        r"""
+        :param max_pending: Maximum number of files fetched ahead of the consumer
+        """
+        self._items: Deque[Tuple[str, str]] = deque()
+        self._slots = asyncio.Semaphore(max_pending)
+        self._changed = asyncio.Event()
+
+    async def reserve(self):
+        "Wait until the consumer has room for one more file"
+        await self._slots.acquire()
+
+    def release(self):
+        "Give back a reserved slot without producing a file (e.g. the download failed)"
+        self._slots.release()
+
+    def put(self, sample: str, uri: str):
+        "Hand over a file for which a slot was reserved"
+        self._items.append((sample, uri))
+        self._changed.set()
+
+    async def iterate(
+        self, producers: Iterable[asyncio.Future]
+    ) -> AsyncIterator[Tuple[str, str]]:
+        r"""
+        Yield ``(sample, uri)`` pairs until every producer is done. Stops early with the
+        producer's exception if one of them fails.
+
+        :param producers: Tasks feeding this stream
+        """
+        producers = list(producers)
+        for producer in producers:
+            producer.add_done_callback(lambda _: self._changed.set())
+
+        while True:
+            if self._items:
+                yield self._items.popleft()
+                self._slots.release()
+                continue
+
+            for producer in producers:
+                if (
+                    producer.done()
+                    and not producer.cancelled()
+                    and producer.exception()
+                ):
+                    raise producer.exception()
+            if all(producer.done() for producer in producers):
+                return
+
+            self._changed.clear()
+            await self._changed.wait()
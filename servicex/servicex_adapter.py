@@ -25,14 +25,16 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
+import logging
 import os
 import time
 import datetime
 from rich import get_console
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 from dataclasses import dataclass
 
-from httpx import AsyncClient, Response, Timeout
+from httpx import AsyncClient, AsyncHTTPTransport, Limits, Response, Timeout
 from json import JSONDecodeError
 from httpx_retries import RetryTransport, Retry
 from google.auth import jwt
@@ -44,12 +46,17 @@ from tenacity import (
 )
 from make_it_sync import make_sync
 from servicex._version import __version__
+from servicex.background_loop import in_background_loop
+from servicex.blocking_io import run_blocking
 from servicex.models import (
     TransformRequest,
     TransformStatus,
     CachedDataset,
     ServiceXInfo,
 )
+from servicex.query_cache import QueryCache
+
+logger = logging.getLogger(__name__)
 
 
 class AuthorizationError(Exception):
@@ -74,9 +81,70 @@ async def _extract_message(r: Response):
 
 _timeout = Timeout(10, read=300)
 
+# Retry policy and timeout for each family of calls made by the adapter. Each policy
+# gets its own AsyncClient, but they all share the adapter's pool of connections.
+_client_policies: Dict[str, Tuple[Optional[Retry], Timeout]] = {
+    "basic": (None, Timeout(5.0)),
+    "default": (Retry(total=3, backoff_factor=10), Timeout(5.0)),
+    "token": (
+        Retry(total=3, backoff_factor=10, allowed_methods=["POST"]),
+        Timeout(5.0),
+    ),
+    "status": (Retry(total=5, backoff_factor=3), Timeout(5.0)),
+    "results": (Retry(total=3, backoff_factor=10), _timeout),
+    "submit": (Retry(total=3, backoff_factor=30), _timeout),
+}
+
+
+def _discard_transport(
+    transport: AsyncHTTPTransport, loop: Optional[asyncio.AbstractEventLoop]
+):
+    r"""
+    Close the connection pool of a transport opened on another event loop. Its
+    connections can only be closed cleanly on that loop: if it is gone (e.g. the loop of
+    an earlier sync call) their sockets are closed directly.
+    """
+    if loop is not None and not loop.is_closed() and loop.is_running():
+        asyncio.run_coroutine_threadsafe(transport.aclose(), loop)
+        return
+    for connection in transport._pool.connections:
+        stream = getattr(
+            getattr(connection, "_connection", None), "_network_stream", None
+        )
+        sock = stream.get_extra_info("socket") if stream is not None else None
+        if sock is not None:
+            sock.close()
+
 
 class ServiceXAdapter:
-    def __init__(self, url: str, refresh_token: Optional[str] = None):
+    def __init__(
+        self,
+        url: str,
+        refresh_token: Optional[str] = None,
+        http2: bool = False,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        server_info_cache: Optional[QueryCache] = None,
+        server_info_ttl: float = 24 * 60 * 60,
+    ):
+        r"""
+        Talks to the ServiceX WebAPI. All calls made from one event loop share a single
+        pool of keep-alive connections, which is closed by :py:meth:`close` (or on
+        leaving an ``async with`` block).
+
+        :param url: Base URL of the ServiceX deployment
+        :param refresh_token: Token used to obtain access tokens, if auth is enabled
+        :param http2: Multiplex requests over HTTP/2 connections. Requires the ``h2``
+                      package (``pip install servicex[http2]``).
+        :param max_connections: Maximum number of simultaneous connections to the server
+        :param max_keepalive_connections: Maximum number of idle connections kept open
+        :param keepalive_expiry: Seconds an idle connection is kept open
+        :param server_info_cache: Cache to save the server info in, so that new adapters
+                                  (and new processes) don't have to fetch it again
+        :param server_info_ttl: Seconds saved server info is used as is. Older info is
+                                refreshed, see :py:meth:`get_servicex_info`.
+        """
         self.url = url
         self.refresh_token = refresh_token
         self.token = None
@@ -84,21 +152,89 @@ class ServiceXAdapter:
         # interact with _servicex_info via get_servicex_info
         self._servicex_info: Optional[ServiceXInfo] = None
         self._sample_title_limit: Optional[int] = None
+        self.server_info_cache = server_info_cache
+        self.server_info_ttl = server_info_ttl
+        self._revalidation: Optional[asyncio.Task] = None
+
+        self.http2 = http2
+        self.limits = Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # Connections belong to the event loop that opened them, so the pool is
+        # rebuilt if the adapter is used from a new loop (e.g. successive sync calls)
+        self._transport: Optional[AsyncHTTPTransport] = None
+        self._transport_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._clients: Dict[str, AsyncClient] = {}
+
+    def _client(self, policy: str) -> AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._transport is None or self._transport_loop is not loop:
+            if self._transport is not None:
+                _discard_transport(self._transport, self._transport_loop)
+            self._transport = AsyncHTTPTransport(http2=self.http2, limits=self.limits)
+            self._transport_loop = loop
+            self._clients = {}
+
+        client = self._clients.get(policy)
+        if client is None:
+            retry, timeout = _client_policies[policy]
+            client = AsyncClient(
+                transport=(
+                    RetryTransport(transport=self._transport, retry=retry)
+                    if retry
+                    else self._transport
+                ),
+                timeout=timeout,
+            )
+            self._clients[policy] = client
+        return client
+
+    async def close(self):
+        r"""
+        Close the pooled connections to the ServiceX server. The adapter can still be
+        used afterwards; a new pool is opened on the next call.
+        """
+        revalidation, self._revalidation = self._revalidation, None
+        if revalidation is not None and not revalidation.done():
+            # The saved info is still usable: the refresh is left for another time
+            revalidation.cancel()
+            try:
+                await revalidation
+            except asyncio.CancelledError:
+                pass
+
+        transport, loop = self._transport, self._transport_loop
+        self._transport = None
+        self._transport_loop = None
+        self._clients = {}
+        if transport is None:
+            return
+        if loop is asyncio.get_running_loop():
+            await transport.aclose()
+        else:
+            _discard_transport(transport, loop)
+
+    async def __aenter__(self) -> "ServiceXAdapter":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
 
     async def _get_token(self):
         url = f"{self.url}/token/refresh"
         headers = {"Authorization": f"Bearer {self.refresh_token}"}
-        retry_options = Retry(total=3, backoff_factor=10, allowed_methods=["POST"])
 
-        async with AsyncClient(transport=RetryTransport(retry=retry_options)) as client:
-            r = await client.post(url, headers=headers, json=None)
-            if r.status_code == 200:
-                o = r.json()
-                self.token = o["access_token"]
-            else:
-                raise AuthorizationError(
-                    f"ServiceX access token request rejected [{r.status_code} {r.reason_phrase}]"
-                )
+        client = self._client("token")
+        r = await client.post(url, headers=headers, json=None)
+        if r.status_code == 200:
+            o = r.json()
+            self.token = o["access_token"]
+        else:
+            raise AuthorizationError(
+                f"ServiceX access token request rejected [{r.status_code} {r.reason_phrase}]"
+            )
 
     @staticmethod
     def _get_bearer_token_file():
@@ -144,27 +280,80 @@ class ServiceXAdapter:
                 await self._get_token()
             return {"Authorization": f"Bearer {self.token}"}
 
-    async def get_servicex_info(self) -> ServiceXInfo:
-        if self._servicex_info:
+    async def get_servicex_info(self, refresh: bool = False) -> ServiceXInfo:
+        r"""
+        Version, capabilities and code generators of the ServiceX deployment. Kept for
+        the life of the adapter and, with a ``server_info_cache``, saved for
+        ``server_info_ttl`` seconds across adapters and processes. Older saved info is
+        refreshed: in the background on the event loop of a client made with
+        ``background_loop=True``, otherwise straight away, falling back to the saved
+        info if the server can't be reached.
+
+        :param refresh: Ask the server, even if the info is known
+        """
+        if self._servicex_info and not refresh:
             return self._servicex_info
 
+        if self._use_server_info_cache() and not refresh:
+            saved = await run_blocking(self.server_info_cache.get_server_info, self.url)
+            if saved is not None:
+                info, fetched_at = saved
+                self._servicex_info = info
+                if time.time() - fetched_at <= self.server_info_ttl:
+                    return info
+                if in_background_loop():
+                    self._revalidate_servicex_info()
+                    return info
+                # The loop ends with this call: a refresh in the background would
+                # never land
+                try:
+                    return await self._fetch_servicex_info()
+                except Exception as e:
+                    logger.debug(f"Refreshing the info of {self.url} failed: {e}")
+                    return info
+
+        return await self._fetch_servicex_info()
+
+    def _use_server_info_cache(self) -> bool:
+        return self.server_info_cache is not None and self.server_info_ttl > 0
+
+    def _revalidate_servicex_info(self):
+        "Fetch the server info again without waiting for it"
+        if self._revalidation is not None and not self._revalidation.done():
+            return
+
+        async def revalidate():
+            try:
+                await self._fetch_servicex_info()
+            except Exception as e:
+                logger.debug(f"Refreshing the info of {self.url} failed: {e}")
+
+        self._revalidation = asyncio.get_running_loop().create_task(revalidate())
+
+    async def _fetch_servicex_info(self) -> ServiceXInfo:
         headers = await self._get_authorization()
-        retry_options = Retry(total=3, backoff_factor=10)
-        async with AsyncClient(transport=RetryTransport(retry=retry_options)) as client:
-            r = await client.get(url=f"{self.url}/servicex", headers=headers)
-            if r.status_code in (401, 403):
-                raise AuthorizationError(
-                    f"Not authorized to access serviceX at {self.url}"
-                )
-            elif r.status_code > 400:
-                error_message = await _extract_message(r)
-                raise RuntimeError(
-                    "ServiceX WebAPI Error during transformation "
-                    f"submission: {r.status_code} - {error_message}"
+        client = self._client("default")
+        r = await client.get(url=f"{self.url}/servicex", headers=headers)
+        if r.status_code in (401, 403):
+            raise AuthorizationError(f"Not authorized to access serviceX at {self.url}")
+        elif r.status_code > 400:
+            error_message = await _extract_message(r)
+            raise RuntimeError(
+                "ServiceX WebAPI Error during transformation "
+                f"submission: {r.status_code} - {error_message}"
+            )
+        servicex_info = r.json()
+        self._servicex_info = ServiceXInfo(**servicex_info)
+        if self._use_server_info_cache():
+            try:
+                await run_blocking(
+                    self.server_info_cache.save_server_info,
+                    self.url,
+                    self._servicex_info,
                 )
-            servicex_info = r.json()
-            self._servicex_info = ServiceXInfo(**servicex_info)
-            return self._servicex_info
+            except Exception as e:
+                logger.warning(f"Unable to save the info of {self.url}: {e}")
+        return self._servicex_info
 
     async def get_servicex_capabilities(self) -> List[str]:
         return (await self.get_servicex_info()).capabilities
@@ -185,31 +374,69 @@ class ServiceXAdapter:
 
         return None
 
-    async def get_transforms(self) -> List[TransformStatus]:
+    async def get_transforms(
+        self, request_ids: Optional[List[str]] = None
+    ) -> List[TransformStatus]:
         headers = await self._get_authorization()
-        retry_options = Retry(total=3, backoff_factor=10)
-        async with AsyncClient(transport=RetryTransport(retry=retry_options)) as client:
+        client = self._client("default")
+        if request_ids:
+            # Only understood by servers with the bulk_transform_status capability
+            r = await client.get(
+                url=f"{self.url}/servicex/transformation",
+                headers=headers,
+                params={"request_id": request_ids},
+            )
+        else:
             r = await client.get(
                 url=f"{self.url}/servicex/transformation", headers=headers
             )
-            if r.status_code == 401:
-                raise AuthorizationError(
-                    f"Not authorized to access serviceX at {self.url}"
-                )
-            elif r.status_code > 400:
-                error_message = await _extract_message(r)
-                raise RuntimeError(
-                    "ServiceX WebAPI Error during transformation "
-                    f"status retrieval: {r.status_code} - {error_message}"
-                )
-            o = r.json()
-            statuses = [TransformStatus(**status) for status in o["requests"]]
-            return statuses
-
-    async def get_code_generators_async(self) -> dict[str, str]:
-        return (await self.get_servicex_info()).code_gen_image
+        if r.status_code == 401:
+            raise AuthorizationError(f"Not authorized to access serviceX at {self.url}")
+        elif r.status_code > 400:
+            error_message = await _extract_message(r)
+            raise RuntimeError(
+                "ServiceX WebAPI Error during transformation "
+                f"status retrieval: {r.status_code} - {error_message}"
+            )
+        o = r.json()
+        statuses = [TransformStatus(**status) for status in o["requests"]]
+        return statuses
+
+    async def get_transform_statuses(
+        self, request_ids: List[str]
+    ) -> Dict[str, TransformStatus]:
+        r"""
+        Retrieve the status of several transforms with a single listing call. Servers
+        with the ``bulk_transform_status`` capability return just the requested
+        transforms; otherwise the full transform listing is filtered here. Transforms
+        missing from the listing are fetched individually.
+
+        :param request_ids: Request IDs of the transforms
+        :return: Transform status for each request ID
+        """
+        bulk = "bulk_transform_status" in await self.get_servicex_capabilities()
+        listing = await self.get_transforms(request_ids if bulk else None)
+
+        wanted = set(request_ids)
+        statuses = {s.request_id: s for s in listing if s.request_id in wanted}
+        for request_id in request_ids:
+            if request_id not in statuses:
+                statuses[request_id] = await self.get_transform_status(request_id)
+        return statuses
+
+    async def get_code_generators_async(self, refresh: bool = False) -> dict[str, str]:
+        return (await self.get_servicex_info(refresh=refresh)).code_gen_image
+
+    async def _get_code_generators_and_close(
+        self, refresh: bool = False
+    ) -> dict[str, str]:
+        try:
+            return await self.get_code_generators_async(refresh)
+        finally:
+            # The loop make_sync runs this on ends with the call
+            await self.close()
 
-    get_code_generators = make_sync(get_code_generators_async)
+    get_code_generators = make_sync(_get_code_generators_and_close)
 
     async def verify_authentication(self) -> bool:
         """Verify connectivity and authentication with the ServiceX server.
@@ -229,10 +456,10 @@ class ServiceXAdapter:
             else:
                 # Call info endpoint directly without authorization headers
                 # to avoid issues with BEARER_TOKEN_FILE containing expired tokens
-                async with AsyncClient() as client:
-                    r = await client.get(url=f"{self.url}/servicex")
-                    if r.status_code != 200:
-                        return False
+                client = self._client("basic")
+                r = await client.get(url=f"{self.url}/servicex")
+                if r.status_code != 200:
+                    return False
             return True
         except Exception:
             return False
@@ -245,39 +472,35 @@ class ServiceXAdapter:
         if show_deleted:
             params["show-deleted"] = True
 
-        async with AsyncClient() as session:
-            r = await session.get(
-                headers=headers, url=f"{self.url}/servicex/datasets", params=params
-            )
-            if r.status_code == 403:
-                raise AuthorizationError(
-                    f"Not authorized to access serviceX at {self.url}"
-                )
-            elif r.status_code != 200:
-                msg = await _extract_message(r)
-                raise RuntimeError(f"Failed to get datasets: {r.status_code} - {msg}")
+        session = self._client("basic")
+        r = await session.get(
+            headers=headers, url=f"{self.url}/servicex/datasets", params=params
+        )
+        if r.status_code == 403:
+            raise AuthorizationError(f"Not authorized to access serviceX at {self.url}")
+        elif r.status_code != 200:
+            msg = await _extract_message(r)
+            raise RuntimeError(f"Failed to get datasets: {r.status_code} - {msg}")
 
-            result = r.json()
+        result = r.json()
 
-            datasets = [CachedDataset(**d) for d in result["datasets"]]
-            return datasets
+        datasets = [CachedDataset(**d) for d in result["datasets"]]
+        return datasets
 
     async def get_dataset(self, dataset_id=None) -> CachedDataset:
         headers = await self._get_authorization()
         path_template = "/servicex/datasets/{dataset_id}"
         url = self.url + path_template.format(dataset_id=dataset_id)
-        async with AsyncClient() as session:
-            r = await session.get(headers=headers, url=url)
-            if r.status_code == 403:
-                raise AuthorizationError(
-                    f"Not authorized to access serviceX at {self.url}"
-                )
-            elif r.status_code == 404:
-                raise ValueError(f"Dataset {dataset_id} not found")
-            elif r.status_code != 200:
-                msg = await _extract_message(r)
-                raise RuntimeError(f"Failed to get dataset {dataset_id} - {msg}")
-            result = r.json()
+        session = self._client("basic")
+        r = await session.get(headers=headers, url=url)
+        if r.status_code == 403:
+            raise AuthorizationError(f"Not authorized to access serviceX at {self.url}")
+        elif r.status_code == 404:
+            raise ValueError(f"Dataset {dataset_id} not found")
+        elif r.status_code != 200:
+            msg = await _extract_message(r)
+            raise RuntimeError(f"Failed to get dataset {dataset_id} - {msg}")
+        result = r.json()
 
         dataset = CachedDataset(**result)
         return dataset
@@ -287,36 +510,32 @@ class ServiceXAdapter:
         path_template = "/servicex/datasets/{dataset_id}"
         url = self.url + path_template.format(dataset_id=dataset_id)
 
-        async with AsyncClient() as session:
-            r = await session.delete(headers=headers, url=url)
-            if r.status_code == 403:
-                raise AuthorizationError(
-                    f"Not authorized to access serviceX at {self.url}"
-                )
-            elif r.status_code == 404:
-                raise ValueError(f"Dataset {dataset_id} not found")
-            elif r.status_code != 200:
-                msg = await _extract_message(r)
-                raise RuntimeError(f"Failed to delete dataset {dataset_id} - {msg}")
-            result = r.json()
-            return result["stale"]
+        session = self._client("basic")
+        r = await session.delete(headers=headers, url=url)
+        if r.status_code == 403:
+            raise AuthorizationError(f"Not authorized to access serviceX at {self.url}")
+        elif r.status_code == 404:
+            raise ValueError(f"Dataset {dataset_id} not found")
+        elif r.status_code != 200:
+            msg = await _extract_message(r)
+            raise RuntimeError(f"Failed to delete dataset {dataset_id} - {msg}")
+        result = r.json()
+        return result["stale"]
 
     async def delete_transform(self, transform_id=None):
         headers = await self._get_authorization()
         path_template = f"/servicex/transformation/{transform_id}"
         url = self.url + path_template.format(transform_id=transform_id)
 
-        async with AsyncClient() as session:
-            r = await session.delete(headers=headers, url=url)
-            if r.status_code == 403:
-                raise AuthorizationError(
-                    f"Not authorized to access serviceX at {self.url}"
-                )
-            elif r.status_code == 404:
-                raise ValueError(f"Transform {transform_id} not found")
-            elif r.status_code != 200:
-                msg = await _extract_message(r)
-                raise RuntimeError(f"Failed to delete transform {transform_id} - {msg}")
+        session = self._client("basic")
+        r = await session.delete(headers=headers, url=url)
+        if r.status_code == 403:
+            raise AuthorizationError(f"Not authorized to access serviceX at {self.url}")
+        elif r.status_code == 404:
+            raise ValueError(f"Transform {transform_id} not found")
+        elif r.status_code != 200:
+            msg = await _extract_message(r)
+            raise RuntimeError(f"Failed to delete transform {transform_id} - {msg}")
 
     async def get_transformation_results(
         self, request_id: str, later_than: Optional[datetime.datetime] = None
@@ -333,129 +552,116 @@ class ServiceXAdapter:
         if later_than:
             params["later_than"] = later_than.isoformat()
 
-        retry_options = Retry(total=3, backoff_factor=10)
-        async with AsyncClient(
-            transport=RetryTransport(retry=retry_options), timeout=_timeout
-        ) as session:
-            r = await session.get(headers=headers, url=url, params=params)
-            if r.status_code in [401, 403]:
-                raise AuthorizationError(
-                    f"Not authorized to access serviceX at {self.url}"
+        session = self._client("results")
+        r = await session.get(headers=headers, url=url, params=params)
+        if r.status_code in [401, 403]:
+            raise AuthorizationError(f"Not authorized to access serviceX at {self.url}")
+
+        if r.status_code == 404:
+            raise ValueError(f"Request {request_id} not found")
+
+        if r.status_code != 200:
+            msg = await _extract_message(r)
+            raise RuntimeError(f"Failed with message: {msg}")
+
+        data = r.json()
+        response = list()
+        for result in data.get("results", []):
+            if result["transform_status"] == "success":
+                _file = ServiceXFile(
+                    filename=result["s3-object-name"],
+                    created_at=datetime.datetime.fromisoformat(
+                        result["created_at"]
+                    ).replace(tzinfo=datetime.timezone.utc),
+                    total_bytes=result["total-bytes"],
                 )
-
-            if r.status_code == 404:
-                raise ValueError(f"Request {request_id} not found")
-
-            if r.status_code != 200:
-                msg = await _extract_message(r)
-                raise RuntimeError(f"Failed with message: {msg}")
-
-            data = r.json()
-            response = list()
-            for result in data.get("results", []):
-                if result["transform_status"] == "success":
-                    _file = ServiceXFile(
-                        filename=result["s3-object-name"],
-                        created_at=datetime.datetime.fromisoformat(
-                            result["created_at"]
-                        ).replace(tzinfo=datetime.timezone.utc),
-                        total_bytes=result["total-bytes"],
-                    )
-                    response.append(_file)
-            return response
+                response.append(_file)
+        return response
 
     async def cancel_transform(self, transform_id=None):
         headers = await self._get_authorization()
         path_template = f"/servicex/transformation/{transform_id}/cancel"
         url = self.url + path_template.format(transform_id=transform_id)
 
-        async with AsyncClient() as session:
-            r = await session.get(headers=headers, url=url)
-            if r.status_code == 403:
-                raise AuthorizationError(
-                    f"Not authorized to access serviceX at {self.url}"
-                )
-            elif r.status_code == 404:
-                raise ValueError(f"Transform {transform_id} not found")
-            elif r.status_code != 200:
-                msg = await _extract_message(r)
-                raise RuntimeError(f"Failed to cancel transform {transform_id} - {msg}")
+        session = self._client("basic")
+        r = await session.get(headers=headers, url=url)
+        if r.status_code == 403:
+            raise AuthorizationError(f"Not authorized to access serviceX at {self.url}")
+        elif r.status_code == 404:
+            raise ValueError(f"Transform {transform_id} not found")
+        elif r.status_code != 200:
+            msg = await _extract_message(r)
+            raise RuntimeError(f"Failed to cancel transform {transform_id} - {msg}")
 
     async def submit_transform(self, transform_request: TransformRequest) -> str:
         headers = await self._get_authorization()
-        retry_options = Retry(total=3, backoff_factor=30)
 
         submit_json = transform_request.model_dump(by_alias=True, exclude_none=True)
         submit_json["client-version"] = __version__
 
-        async with AsyncClient(
-            transport=RetryTransport(retry=retry_options), timeout=_timeout
-        ) as client:
-            r = await client.post(
-                url=f"{self.url}/servicex/transformation",
-                headers=headers,
-                json=submit_json,
+        client = self._client("submit")
+        r = await client.post(
+            url=f"{self.url}/servicex/transformation",
+            headers=headers,
+            json=submit_json,
+        )
+
+        if r.status_code >= 400:
+            console = get_console()
+            message = await _extract_message(r)
+            console.log(message)
+
+        if r.status_code == 401:
+            raise AuthorizationError(f"Not authorized to access serviceX at {self.url}")
+        elif r.status_code == 400:
+            message = await _extract_message(r)
+            raise ValueError(f"Invalid transform request: {message}")
+        elif r.status_code > 400:
+            error_message = await _extract_message(r)
+            raise RuntimeError(
+                "ServiceX WebAPI Error during transformation "
+                f"submission: {r.status_code} - {error_message}"
             )
-
-            if r.status_code >= 400:
-                console = get_console()
-                message = await _extract_message(r)
-                console.log(message)
-
-            if r.status_code == 401:
-                raise AuthorizationError(
-                    f"Not authorized to access serviceX at {self.url}"
-                )
-            elif r.status_code == 400:
-                message = await _extract_message(r)
-                raise ValueError(f"Invalid transform request: {message}")
-            elif r.status_code > 400:
-                error_message = await _extract_message(r)
-                raise RuntimeError(
-                    "ServiceX WebAPI Error during transformation "
-                    f"submission: {r.status_code} - {error_message}"
-                )
-            else:
-                o = r.json()
-                return o["request_id"]
+        else:
+            o = r.json()
+            return o["request_id"]
 
     async def get_transform_status(self, request_id: str) -> TransformStatus:
         headers = await self._get_authorization()
-        retry_options = Retry(total=5, backoff_factor=3)
-        async with AsyncClient(transport=RetryTransport(retry=retry_options)) as client:
-            try:
-                async for attempt in AsyncRetrying(
-                    retry=retry_if_not_exception_type(ValueError),
-                    stop=stop_after_attempt(3),
-                    wait=wait_fixed(3),
-                    reraise=True,
-                ):
-                    with attempt:
-                        r = await client.get(
-                            url=f"{self.url}/servicex/" f"transformation/{request_id}",
-                            headers=headers,
+        client = self._client("status")
+        try:
+            async for attempt in AsyncRetrying(
+                retry=retry_if_not_exception_type(ValueError),
+                stop=stop_after_attempt(3),
+                wait=wait_fixed(3),
+                reraise=True,
+            ):
+                with attempt:
+                    r = await client.get(
+                        url=f"{self.url}/servicex/" f"transformation/{request_id}",
+                        headers=headers,
+                    )
+                    if r.status_code == 401:
+                        # perhaps we just ran out of auth validity the last time?
+                        # refetch auth then raise an error for retry
+                        headers = await self._get_authorization(True)
+                        raise AuthorizationError(
+                            f"Not authorized to access serviceX at {self.url}"
                         )
-                        if r.status_code == 401:
-                            # perhaps we just ran out of auth validity the last time?
-                            # refetch auth then raise an error for retry
-                            headers = await self._get_authorization(True)
-                            raise AuthorizationError(
-                                f"Not authorized to access serviceX at {self.url}"
-                            )
-                        if r.status_code == 404:
-                            raise ValueError(f"Transform ID {request_id} not found")
-                        elif r.status_code > 400:
-                            error_message = await _extract_message(r)
-                            raise RuntimeError(
-                                "ServiceX WebAPI Error during transformation: "
-                                f"{r.status_code} - {error_message}"
-                            )
-                        o = r.json()
-                        return TransformStatus(**o)
-            except RuntimeError as e:
-                raise RuntimeError(
-                    "ServiceX WebAPI Error " f"while getting transform status: {e}"
-                )
+                    if r.status_code == 404:
+                        raise ValueError(f"Transform ID {request_id} not found")
+                    elif r.status_code > 400:
+                        error_message = await _extract_message(r)
+                        raise RuntimeError(
+                            "ServiceX WebAPI Error during transformation: "
+                            f"{r.status_code} - {error_message}"
+                        )
+                    o = r.json()
+                    return TransformStatus(**o)
+        except RuntimeError as e:
+            raise RuntimeError(
+                "ServiceX WebAPI Error " f"while getting transform status: {e}"
+            )
         raise RuntimeError(
             "ServiceX WebAPI: unable to retrieve transform status"
         )  # pragma: no cover
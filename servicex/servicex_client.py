@@ -25,11 +25,20 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
 import logging
 import shutil
+import threading
+from functools import wraps
 from typing import Optional, List, TypeVar, Any, Mapping, Union, cast
 from pathlib import Path
 
+from servicex.background_loop import (
+    BackgroundLoop,
+    close_adapters,
+    make_sync_method,
+)
+from servicex.blocking_io import run_blocking
 from servicex.configuration import Configuration
 from servicex.models import (
     ResultFormat,
@@ -37,6 +46,8 @@ from servicex.models import (
     TransformedResults,
     CachedDataset,
 )
+from servicex.download_scheduler import AdaptiveConcurrency, DownloadScheduler
+from servicex.polling import AdaptivePolling, PollingStrategy
 from servicex.query_cache import QueryCache
 from servicex.servicex_adapter import ServiceXAdapter
 from servicex.query_core import (
@@ -48,7 +59,12 @@ from servicex.types import DID
 from servicex.dataset_group import DatasetGroup
 
 from make_it_sync import make_sync
-from servicex.databinder_models import ServiceXSpec, General, Sample
+from servicex.databinder_models import (
+    DEFAULT_TITLE_LENGTH_LIMIT,
+    General,
+    Sample,
+    ServiceXSpec,
+)
 from collections.abc import Sequence, Coroutine
 from enum import Enum
 import traceback
@@ -142,25 +158,13 @@ def _load_ServiceXSpec(
         else:
             file_path = config
 
-        import sys
-        from .yaml_parser import YAML
+        from .plugins import register_yaml_tags
+        from .yaml_parser import YAML, load_spec
 
         yaml = YAML()
+        register_yaml_tags(yaml)
 
-        if sys.version_info < (3, 10):
-            from importlib_metadata import entry_points
-        else:
-            from importlib.metadata import entry_points
-
-        plugins = entry_points(group="servicex.query")
-        for _ in plugins:
-            yaml.register_class(_.load())
-        plugins = entry_points(group="servicex.dataset")
-        for _ in plugins:
-            yaml.register_class(_.load())
-
-        conf = yaml.load(file_path)
-        config = ServiceXSpec(**conf)
+        config = load_spec(yaml, file_path)
     else:
         raise TypeError(f"Unknown config type: {type(config)}")
 
@@ -173,6 +177,8 @@ async def _build_datasets(
     servicex_name,
     fail_if_incomplete,
     cache_dir: Optional[str] = None,
+    polling_strategy: Optional[PollingStrategy] = None,
+    client: Optional["ServiceXClient"] = None,
 ):
     def get_codegen(_sample: Sample, _general: General):
         if _sample.Codegen is not None:
@@ -184,13 +190,19 @@ async def _build_datasets(
         elif isinstance(_sample.Query, Query):
             return _sample.Query.codegen
 
-    sx = ServiceXClient(
-        backend=servicex_name, config_path=config_path, cache_dir=cache_dir
+    # Reads the configuration file and opens the cache database
+    sx = (
+        client
+        if client is not None
+        else await run_blocking(
+            ServiceXClient,
+            backend=servicex_name,
+            config_path=config_path,
+            cache_dir=cache_dir,
+        )
     )
-    title_length_limit = await sx.servicex.get_servicex_sample_title_limit()
     datasets = []
     for sample in config.Sample:
-        sample.validate_title(title_length_limit)
         query = sx.generic_query(
             dataset_identifier=sample.dataset_identifier,
             title=sample.Name,
@@ -199,6 +211,7 @@ async def _build_datasets(
             ignore_cache=sample.IgnoreLocalCache,
             query=sample.Query,
             fail_if_incomplete=fail_if_incomplete,
+            polling_strategy=polling_strategy,
         )
         logger.debug(f"Query string: {query.generate_selection_string()}")
         query.ignore_cache = sample.IgnoreLocalCache
@@ -207,6 +220,20 @@ async def _build_datasets(
     return datasets
 
 
+async def _validate_titles(samples: List[Sample], queries: List[Query]):
+    """
+    Check the titles of the samples against the limit of the deployment, truncating
+    them when it has none. Asks the server, unless its info is already known.
+    """
+    if all(len(sample.Name) <= DEFAULT_TITLE_LENGTH_LIMIT for sample in samples):
+        # Within every deployment's limit: nothing to ask the server
+        return
+    title_length_limit = await queries[0].servicex.get_servicex_sample_title_limit()
+    for sample, query in zip(samples, queries):
+        sample.validate_title(title_length_limit)
+        query.title = sample.Name
+
+
 def _output_handler(
     config: ServiceXSpec,
     requests: List[Query],
@@ -253,6 +280,27 @@ def _get_progress_options(progress_bar: ProgressBarFormat) -> dict:
         raise ValueError(f"Invalid value {progress_bar} for progress_bar provided")
 
 
+def _collect_garbage_in_background(config: Configuration) -> threading.Thread:
+    "Bring the cache back within its configured limits without holding up the caller"
+
+    def collect():
+        cache = QueryCache(config)
+        try:
+            evicted = cache.collect_garbage()
+            if evicted:
+                logger.info(f"Evicted {len(evicted)} transforms from the cache")
+        except Exception as e:
+            logger.warning(f"Cache garbage collection failed: {e}")
+        finally:
+            cache.close()
+
+    # Not a daemon: the interpreter waits for the collection at exit rather than kill
+    # it between moving a directory to the trash and deleting it
+    thread = threading.Thread(target=collect, name="servicex-cache-gc")
+    thread.start()
+    return thread
+
+
 async def deliver_async(
     spec: Union[ServiceXSpec, Mapping[str, Any], str, Path],
     config_path: Optional[str] = None,
@@ -261,11 +309,15 @@ async def deliver_async(
     fail_if_incomplete: bool = True,
     ignore_local_cache: bool = False,
     progress_bar: ProgressBarFormat = ProgressBarFormat.default,
-    concurrency: int = 10,
+    concurrency: Union[int, AdaptiveConcurrency] = 10,
     cache_dir: Optional[str] = None,
+    polling_strategy: Optional[PollingStrategy] = None,
+    download_scheduler: Optional[DownloadScheduler] = None,
+    client: Optional["ServiceXClient"] = None,
 ):
     r"""
-    Execute a ServiceX query.
+    Execute a ServiceX query. Samples whose results are already in the local cache are
+    returned without contacting ServiceX; if every sample is, no network call is made.
 
     :param spec: The specification of the ServiceX query, either in a dictionary or a
             :py:class:`~servicex.ServiceXSpec` object.
@@ -284,15 +336,34 @@ async def deliver_async(
             will have its own progress bars; :py:const:`ProgressBarFormat.compact` gives one
             summary progress bar for all transformations; :py:const:`ProgressBarFormat.none`
             switches off progress bars completely.
-    :param concurrency: specify how many downloads to run in parallel (default is 10).
+    :param concurrency: specify how many downloads to run in parallel (default is 10), or
+            pass an :py:class:`~servicex.AdaptiveConcurrency` to grow the number while the
+            throughput improves and cut it when the object store throttles. Adaptive
+            concurrency also sizes the number of streams of each file by its size.
     :param cache_dir: if set, will override the target directory for downloads and the cache
             database.
+    :param polling_strategy: how long to wait between polls of the ServiceX server. Defaults
+            to :py:class:`~servicex.AdaptivePolling`, which polls quickly while files are
+            arriving and backs off while nothing changes.
+    :param download_scheduler: shares download connections (and, optionally, a byte-rate
+            budget) fairly between the samples. Defaults to a
+            :py:class:`~servicex.DownloadScheduler` running ``concurrency`` downloads at once.
+    :param client: run the query with this
+            :py:class:`~servicex.servicex_client.ServiceXClient`, and its connections,
+            instead of making a new one. Cannot be combined with ``config_path``,
+            ``servicex_name`` or ``cache_dir``. If the client has a background loop, the
+            synchronous ``deliver`` runs on it.
     :return: A dictionary mapping the name of each :py:class:`Sample` to a :py:class:`.GuardList`
             with the file names or URLs for the outputs.
     """
     from .minio_adapter import init_s3_config
 
-    init_s3_config(concurrency)
+    if client is not None and (config_path or servicex_name or cache_dir):
+        raise ValueError(
+            "config_path, servicex_name and cache_dir cannot be given with a client"
+        )
+    adaptive = concurrency if isinstance(concurrency, AdaptiveConcurrency) else None
+    init_s3_config(adaptive.maximum if adaptive else concurrency)
     config = _load_ServiceXSpec(spec)
 
     if ignore_local_cache or config.General.IgnoreLocalCache:
@@ -300,10 +371,52 @@ async def deliver_async(
             sample.IgnoreLocalCache = True
 
     datasets = await _build_datasets(
-        config, config_path, servicex_name, fail_if_incomplete, cache_dir
+        config,
+        config_path,
+        servicex_name,
+        fail_if_incomplete,
+        cache_dir,
+        polling_strategy if polling_strategy is not None else AdaptivePolling(),
+        client,
     )
 
-    group = DatasetGroup(datasets)
+    signed_urls_only = config.General.Delivery == General.DeliveryEnum.URLs
+
+    # Every sample, cached or not, so that its title (the key of its results) doesn't
+    # depend on what is in the cache
+    try:
+        await _validate_titles(config.Sample, datasets)
+    except BaseException:
+        if client is None and datasets:
+            await datasets[0].servicex.close()
+        raise
+
+    # Everything found in the cache is returned without any authentication or HTTP
+    # traffic; only the samples that miss go to ServiceX
+    cached = [
+        record if isinstance(record, TransformedResults) else None
+        for record in await asyncio.gather(
+            *[d.cached_results_async(signed_urls_only) for d in datasets],
+            # A cache lookup that fails is retried, and reported, by the query itself
+            return_exceptions=True,
+        )
+    ]
+    misses = [i for i, record in enumerate(cached) if record is None]
+    if datasets and not misses:
+        logger.info("Returning all the samples from the cache")
+
+    group = DatasetGroup(
+        [datasets[i] for i in misses],
+        download_scheduler=(
+            download_scheduler
+            if download_scheduler is not None
+            else DownloadScheduler(
+                max_connections=None if adaptive else concurrency,
+                adaptive=adaptive,
+                size_based_streams=adaptive is not None,
+            )
+        ),
+    )
 
     progress_options = _get_progress_options(progress_bar)
 
@@ -315,22 +428,41 @@ async def deliver_async(
             f"unexpected value for config.general.Delivery: {config.General.Delivery}"
         )
 
-    if config.General.Delivery == General.DeliveryEnum.URLs:
-        results = await group.as_signed_urls_async(
-            return_exceptions=return_exceptions, **progress_options
-        )
+    results: List[Union[TransformedResults, BaseException, None]] = list(cached)
+    if misses:
+        try:
+            if signed_urls_only:
+                fetched = await group.as_signed_urls_async(
+                    return_exceptions=return_exceptions, **progress_options
+                )
+            else:
+                fetched = await group.as_files_async(
+                    return_exceptions=return_exceptions, **progress_options
+                )
+        finally:
+            # Every query was built from the same client, so they share one adapter. A
+            # client passed in keeps its connections for the next call.
+            if client is None:
+                await datasets[0].servicex.close()
+        for i, result in zip(misses, fetched):
+            results[i] = result
 
-    else:
-        results = await group.as_files_async(
-            return_exceptions=return_exceptions, **progress_options
-        )
+    if datasets and datasets[0].configuration.cache_gc_after_deliver:
+        _collect_garbage_in_background(datasets[0].configuration)
 
     output_dict = _output_handler(config, datasets, results)
 
     return output_dict
 
 
-deliver = make_sync(deliver_async)
+_deliver_in_new_loop = make_sync(deliver_async)
+
+
+@wraps(deliver_async)
+def deliver(*args, client: Optional["ServiceXClient"] = None, **kwargs):
+    if client is not None and client.background_loop is not None:
+        return client.background_loop.run(deliver_async(*args, client=client, **kwargs))
+    return _deliver_in_new_loop(*args, client=client, **kwargs)
 
 
 class ServiceXClient:
@@ -341,7 +473,12 @@ class ServiceXClient:
     """
 
     def __init__(
-        self, backend=None, url=None, config_path=None, cache_dir: Optional[str] = None
+        self,
+        backend=None,
+        url=None,
+        config_path=None,
+        cache_dir: Optional[str] = None,
+        background_loop: bool = False,
     ):
         r"""
         If both `backend` and `url` are unspecified then it will attempt to pick up
@@ -356,6 +493,12 @@ class ServiceXClient:
         :param cache_dir: Optional path to override the cache directory for downloads
                     and the cache database. If not specified, uses the value from the
                     configuration file or the default path.
+        :param background_loop: Run the synchronous calls of this client, and of the
+                    queries it makes, on one event loop kept running in a background
+                    thread, instead of a new loop per call. Connections, the access
+                    token and server information are then reused from one call to the
+                    next. Call :py:meth:`close` (or use the client as a context
+                    manager) to stop the loop.
         """
         self.config = Configuration.read(config_path)
         if cache_dir is not None:
@@ -374,8 +517,13 @@ class ServiceXClient:
         if bool(url) == bool(backend):
             raise ValueError("Only specify backend or url... not both")
 
+        self.query_cache = QueryCache(self.config)
+        server_info = {
+            "server_info_cache": self.query_cache,
+            "server_info_ttl": self.config.server_info_ttl,
+        }
         if url:
-            self.servicex = ServiceXAdapter(url)
+            self.servicex = ServiceXAdapter(url, **server_info)
         elif backend:
             if backend not in self.endpoints:
                 valid_backends = ", ".join(self.endpoints.keys())
@@ -387,11 +535,41 @@ class ServiceXClient:
             self.servicex = ServiceXAdapter(
                 self.endpoints[backend].endpoint,
                 refresh_token=self.endpoints[backend].token,
+                **server_info,
             )
-        self.query_cache = QueryCache(self.config)
         # Delay fetching the list of code generators until needed to avoid an
         # unnecessary network call when the client is instantiated.
         self._code_generators: dict[str, str] | None = None
+        self.background_loop: Optional[BackgroundLoop] = (
+            BackgroundLoop() if background_loop else None
+        )
+
+    def _run(self, coro: Coroutine) -> Any:
+        "Wait for a coroutine, on the background loop if there is one"
+        if self.background_loop is not None:
+            return self.background_loop.run(coro)
+
+        async def run_and_close():
+            try:
+                return await coro
+            finally:
+                await close_adapters(self)
+
+        return _async_execute_and_wait(run_and_close())
+
+    def close(self):
+        r"""
+        Stop the background loop, if any, closing its connections. Without a background
+        loop there is nothing to close.
+        """
+        if self.background_loop is not None:
+            self.background_loop.close(self.servicex.close())
+
+    def __enter__(self) -> "ServiceXClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     async def get_transforms_async(self) -> List[TransformStatus]:
         r"""
@@ -400,7 +578,7 @@ class ServiceXClient:
         """
         return await self.servicex.get_transforms()
 
-    get_transforms = make_sync(get_transforms_async)
+    get_transforms = make_sync_method(get_transforms_async)
 
     async def get_transform_status_async(self, transform_id) -> TransformStatus:
         r"""
@@ -410,49 +588,52 @@ class ServiceXClient:
         """
         return await self.servicex.get_transform_status(request_id=transform_id)
 
-    get_transform_status = make_sync(get_transform_status_async)
+    get_transform_status = make_sync_method(get_transform_status_async)
 
     def get_datasets(self, did_finder=None, show_deleted=False) -> List[CachedDataset]:
         r"""
         Retrieve all datasets you have run on the server
         :return: List of Query objects
         """
-        return _async_execute_and_wait(
-            self.servicex.get_datasets(did_finder, show_deleted)
-        )
+        return self._run(self.servicex.get_datasets(did_finder, show_deleted))
 
     def get_dataset(self, dataset_id) -> CachedDataset:
         r"""
         Retrieve a dataset by its ID
         :return: A Query object
         """
-        return _async_execute_and_wait(self.servicex.get_dataset(dataset_id))
+        return self._run(self.servicex.get_dataset(dataset_id))
 
     def delete_dataset(self, dataset_id) -> bool:
         r"""
         Delete a dataset by its ID
         :return: boolean showing whether the dataset has been deleted
         """
-        return _async_execute_and_wait(self.servicex.delete_dataset(dataset_id))
+        return self._run(self.servicex.delete_dataset(dataset_id))
 
     def delete_transform(self, transform_id) -> None:
         r"""
         Delete a Transform by its request ID
         """
-        return _async_execute_and_wait(self.servicex.delete_transform(transform_id))
+        return self._run(self.servicex.delete_transform(transform_id))
 
     def cancel_transform(self, transform_id) -> None:
         r"""
         Cancel a Transform by its request ID
         """
-        return _async_execute_and_wait(self.servicex.cancel_transform(transform_id))
+        return self._run(self.servicex.cancel_transform(transform_id))
 
     def _ensure_code_generators(self) -> None:
         """Populate cached code generators if not already retrieved."""
 
         if self._code_generators is None:
             # Only hit the network the first time we need this information.
-            self._code_generators = self.servicex.get_code_generators()
+            if self.background_loop is not None:
+                self._code_generators = self.background_loop.run(
+                    self.servicex.get_code_generators_async()
+                )
+            else:
+                self._code_generators = self.servicex.get_code_generators()
 
     def get_code_generators(self) -> dict[str, str]:
         r"""
@@ -474,6 +655,7 @@ class ServiceXClient:
         result_format: ResultFormat = ResultFormat.parquet,
         ignore_cache: bool = False,
         fail_if_incomplete: bool = True,
+        polling_strategy: Optional[PollingStrategy] = None,
     ) -> Query:
         r"""
         Generate a Query object for a generic codegen specification
@@ -485,6 +667,8 @@ class ServiceXClient:
         :param result_format:  Do you want Paqrquet or Root? This can be set later with
                                the set_result_format method
         :param ignore_cache: Ignore the query cache and always run the query
+        :param polling_strategy: How long to wait between polls of the ServiceX server.
+                                 By default poll every five seconds.
         :return: A Query object
 
         """
@@ -521,7 +705,9 @@ class ServiceXClient:
             ignore_cache=ignore_cache,
             query_string_generator=query,
             fail_if_incomplete=fail_if_incomplete,
+            polling_strategy=polling_strategy,
         )
+        qobj.background_loop = self.background_loop
         return qobj
 
     def delete_transform_from_cache(self, transform_id: str):
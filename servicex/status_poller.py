@@ -0,0 +1,192 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
+import logging
+from typing import Dict, List, Optional, Union
+
+from servicex.models import TransformStatus
+from servicex.polling import FixedPolling, PollingStrategy, status_changed
+from servicex.servicex_adapter import ServiceXAdapter
+
+logger = logging.getLogger(__name__)
+
+# Status of a transform, or why it couldn't be had
+_StatusOrError = Union[TransformStatus, BaseException]
+
+# Transform details only reported by the single-transform status endpoint. They are
+# carried over from the first status of each transform into the bulk results.
+_DETAIL_FIELDS = (
+    "minio_endpoint",
+    "minio_secured",
+    "minio_access_key",
+    "minio_secret_key",
+    "log_url",
+)
+
+
+class TransformStatusPoller:
+    r"""
+    Poll the status of many in-flight transforms with one loop. Queries ask for the
+    status of their transform with :py:meth:`get_status`; all requests made during a
+    polling interval are answered by a single call to
+    :py:meth:`ServiceXAdapter.get_transform_statuses`, so the number of calls to the
+    ServiceX server per interval does not grow with the number of transforms.
+
+    The first status of each transform is fetched individually, since only the
+    single-transform endpoint reports the object store details. A transform whose
+    status can't be had fails its own queries only; when the batched call fails, the
+    status of each transform is asked for individually instead.
+    """
+
+    def __init__(
+        self,
+        servicex: ServiceXAdapter,
+        polling_strategy: Optional[PollingStrategy] = None,
+    ):
+        r"""
+        :param servicex: Adapter for the ServiceX deployment running the transforms
+        :param polling_strategy: How long to wait between two polls. Defaults to every
+                                 five seconds.
+        """
+        self.servicex = servicex
+        self.polling_strategy = polling_strategy or FixedPolling(5)
+        self.polls = 0
+        self._interval: Optional[float] = None
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._details: Dict[str, TransformStatus] = {}
+        self._statuses: Dict[str, TransformStatus] = {}
+        self._last_poll: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def get_status(self, request_id: str) -> TransformStatus:
+        r"""
+        Wait for the next poll and return the status of a transform
+
+        :param request_id: Request ID of the transform
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiters.setdefault(request_id, []).append(future)
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        return await future
+
+    async def close(self):
+        "Stop polling"
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._waiters:
+            if self._last_poll is None:
+                # Give the other queries a chance to register before the first poll
+                await asyncio.sleep(0)
+            else:
+                delay = self._last_poll + self._interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            waiters, self._waiters = self._waiters, {}
+            self._last_poll = loop.time()
+            self.polls += 1
+            try:
+                statuses = await self._poll(list(waiters))
+            except Exception as e:
+                for futures in waiters.values():
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(e)
+                self._interval = self.polling_strategy.next_interval(
+                    self._interval, False
+                )
+                continue
+
+            changed = False
+            for request_id, futures in waiters.items():
+                status = statuses[request_id]
+                if isinstance(status, BaseException):
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(status)
+                    continue
+                changed |= status_changed(self._statuses.get(request_id), status)
+                self._statuses[request_id] = status
+                for future in futures:
+                    if not future.done():
+                        future.set_result(status)
+            self._interval = self.polling_strategy.next_interval(
+                self._interval, changed
+            )
+
+    async def _poll_each(self, request_ids: List[str]) -> Dict[str, _StatusOrError]:
+        results = await asyncio.gather(
+            *[self.servicex.get_transform_status(r) for r in request_ids],
+            return_exceptions=True,
+        )
+        return dict(zip(request_ids, results))
+
+    async def _poll(self, request_ids: List[str]) -> Dict[str, _StatusOrError]:
+        new_ids = [r for r in request_ids if r not in self._details]
+        known_ids = [r for r in request_ids if r in self._details]
+
+        statuses = await self._poll_each(new_ids)
+        for request_id, status in statuses.items():
+            if not isinstance(status, BaseException):
+                self._details[request_id] = status
+
+        if known_ids:
+            try:
+                bulk = await self.servicex.get_transform_statuses(known_ids)
+            except Exception as e:
+                logger.warning(
+                    f"Unable to get the status of {len(known_ids)} transforms at "
+                    f"once, asking for each: {e}"
+                )
+                bulk = {}
+            missing = [r for r in known_ids if r not in bulk]
+            bulk.update(await self._poll_each(missing) if missing else {})
+            for request_id in known_ids:
+                details = self._details[request_id]
+                status = bulk[request_id]
+                if isinstance(status, BaseException):
+                    statuses[request_id] = status
+                    continue
+                statuses[request_id] = status.model_copy(
+                    update={
+                        f: getattr(details, f)
+                        for f in _DETAIL_FIELDS
+                        if getattr(status, f) is None
+                    }
+                )
+        return statuses
@@ -91,6 +91,15 @@ class UprootRawQuery(QueryStringGenerator):
             final_query = self.query
         return json.dumps([json.loads(_.model_dump_json()) for _ in final_query])
 
+    def canonical_selection_string(self):
+        import json
+
+        return json.dumps(
+            json.loads(self.generate_selection_string()),
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+
     @classmethod
     def from_yaml(cls, _, node):
         code = node.value
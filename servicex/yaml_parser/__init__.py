@@ -27,5 +27,6 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 from .parser import YAML
+from .spec_cache import load_spec
 
-__all__ = ["YAML"]
+__all__ = ["YAML", "load_spec"]
@@ -51,7 +51,7 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import types
-from typing import Union, Any, Protocol
+from typing import Union, Any, List, Protocol
 from pathlib import Path
 import os
 
@@ -149,6 +149,8 @@ class YAML(ruamel.yaml.YAML):
         super().__init__(*args, **kwargs)
         self.Composer = CompositingComposer
         self.Constructor = ExcludingConstructor
+        # Absolute paths of the files !included while composing, at any depth
+        self.included_files: List[str] = []
 
     def compose(self, stream: Union[Path, str, bytes, TextFileLike]) -> Any:
         """
@@ -173,14 +175,19 @@ class YAML(ruamel.yaml.YAML):
                 pass
 
     def fork(self):
-        return type(self)(typ=self.typ, pure=self.pure)
+        forked = type(self)(typ=self.typ, pure=self.pure)
+        forked.included_files = self.included_files
+        return forked
 
 
 def include_compositor(self, anchor):
     event = self.parser.get_event()
     yaml = self.loader.fork()
-    path = os.path.join(os.path.dirname(self.loader.reader.name), event.value)
-    with open(os.path.abspath(path)) as f:
+    path = os.path.abspath(
+        os.path.join(os.path.dirname(self.loader.reader.name), event.value)
+    )
+    self.loader.included_files.append(path)
+    with open(path) as f:
         rv = yaml.compose(f)
         self.loader.composer.anchors.update(yaml.composer.anchors)
         return rv
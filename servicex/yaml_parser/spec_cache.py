@@ -0,0 +1,184 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Cache of loaded YAML specs, so that a spec and the files it includes are read, composed
+and validated again only once one of them changes. The validated spec is pickled, kept
+for the process and saved in the temporary directory, keyed by the path of the spec,
+along with the content hash of the spec and of every file it includes. Each load
+unpickles a new copy, so that changes to one do not show up in the next.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import stat
+import tempfile
+from getpass import getuser
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from ..databinder_models import ServiceXSpec
+from ..plugins import environment_fingerprint
+from .parser import YAML
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of the saved entries changes
+_CACHE_VERSION = 2
+
+# Entries loaded by this process, by path of the spec
+_documents: Dict[str, Dict[str, Any]] = {}
+
+
+def _cache_dir() -> Optional[Path]:
+    try:
+        return Path(tempfile.gettempdir()) / f"servicex_{getuser()}" / "specs"
+    except Exception:  # getuser fails when the user has no name
+        return None
+
+
+def _file_hash(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _entry_path(path: str) -> Optional[Path]:
+    cache_dir = _cache_dir()
+    if cache_dir is None:
+        return None
+    return cache_dir / f"{hashlib.sha256(path.encode('utf-8')).hexdigest()}.pickle"
+
+
+def _private(path: Path) -> bool:
+    "Can only this user have written the file? Others could plant a pickle otherwise"
+    if not hasattr(os, "getuid"):  # Windows temporary directories are per user
+        return True
+    st = path.stat()
+    return st.st_uid == os.getuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _read_entry(path: str) -> Optional[Dict[str, Any]]:
+    entry_path = _entry_path(path)
+    if entry_path is None:
+        return None
+    try:
+        if not (_private(entry_path.parent) and _private(entry_path)):
+            return None
+        with open(entry_path, "rb") as f:
+            entry = pickle.load(f)
+    except Exception:
+        return None
+    if (
+        not isinstance(entry, dict)
+        or entry.get("version") != _CACHE_VERSION
+        or entry.get("path") != path
+        # The classes of the pickled spec are those of the installed distributions
+        or entry.get("environment") != environment_fingerprint()
+    ):
+        return None
+    return entry
+
+
+def _write_entry(path: str, entry: Dict[str, Any]) -> None:
+    entry_path = _entry_path(path)
+    if entry_path is None:
+        return
+    try:
+        entry_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp = entry_path.with_name(f"{entry_path.name}.{os.getpid()}")
+        with open(
+            os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb"
+        ) as f:
+            pickle.dump(
+                {**entry, "environment": environment_fingerprint()},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp, entry_path)
+    except OSError as e:
+        logger.debug(f"Unable to save the loaded spec {path}: {e}")
+
+
+def _unchanged(entry: Dict[str, Any], spec_hash: Optional[str]) -> bool:
+    return entry["hash"] == spec_hash and all(
+        _file_hash(included) == included_hash
+        for included, included_hash in entry["includes"].items()
+    )
+
+
+def _cached_spec(entry: Dict[str, Any]) -> Optional[ServiceXSpec]:
+    try:
+        spec = pickle.loads(entry["spec"])
+    except Exception as e:  # A class of the spec was changed or removed
+        logger.debug(f"Unable to use the saved spec {entry['path']}: {e}")
+        return None
+    return spec if isinstance(spec, ServiceXSpec) else None
+
+
+def load_spec(yaml: YAML, path: Union[str, Path]) -> ServiceXSpec:
+    r"""
+    Load and validate a YAML spec, but read it only if it or a file it includes changed
+    since it was last loaded, by this process or another one
+
+    :param yaml: The loader, with the tags of the spec registered
+    :param path: Path of the YAML file
+    :return: The validated spec
+    """
+    path = os.path.abspath(path)
+    spec_hash = _file_hash(path)
+    entry = _documents.get(path) or _read_entry(path)
+
+    if spec_hash is not None and entry is not None and _unchanged(entry, spec_hash):
+        spec = _cached_spec(entry)
+        if spec is not None:
+            _documents[path] = entry
+            return spec
+
+    yaml.included_files = []
+    spec = ServiceXSpec(**yaml.load(Path(path)))
+    try:
+        entry = {
+            "version": _CACHE_VERSION,
+            "path": path,
+            "hash": spec_hash,
+            "includes": {
+                included: _file_hash(included) for included in yaml.included_files
+            },
+            "spec": pickle.dumps(spec, protocol=pickle.HIGHEST_PROTOCOL),
+        }
+    except Exception as e:  # Not every query a plugin makes can be pickled
+        logger.debug(f"Not caching the loaded spec {path}: {e}")
+        _documents.pop(path, None)
+    else:
+        _documents[path] = entry
+        _write_entry(path, entry)
+    return spec
@@ -26,6 +26,9 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import csv
+import io
+import json
 import os
 from datetime import datetime, timezone
 from pathlib import Path
@@ -107,6 +110,7 @@ def test_cache_list(script_runner, tmp_path) -> None:
     with patch("servicex.app.cache.ServiceXClient") as mock_servicex:
         cache_mock = Mock()
         cache_mock.cached_queries.return_value = [record_r]
+        cache_mock.get_transforms_by_hash.return_value = [record_r]
         cache_mock.queries_in_state.return_value = [record_s]
         mock_servicex.return_value.query_cache = cache_mock
         result = script_runner.run(["servicex", "cache", "list", "--size"])
@@ -138,6 +142,7 @@ def test_cache_list_size(script_runner, tmp_path) -> None:
     with patch("servicex.app.cache.ServiceXClient") as mock_servicex:
         cache_mock = Mock()
         cache_mock.cached_queries.return_value = [record]
+        cache_mock.get_transforms_by_hash.return_value = [record]
         cache_mock.queries_in_state.return_value = []
         mock_servicex.return_value.query_cache = cache_mock
         result = script_runner.run(["servicex", "cache", "list", "--size"])
@@ -200,12 +205,13 @@ def test_cache_list_size_gb(script_runner, tmp_path) -> None:
     with (
         patch("servicex.app.cache.ServiceXClient") as mock_servicex,
         patch(
-            "servicex.app.cache.Path.stat",
+            "servicex.query_cache.Path.stat",
             return_value=Mock(st_size=size_bytes),
         ),
     ):
         cache_mock = Mock()
         cache_mock.cached_queries.return_value = [record]
+        cache_mock.get_transforms_by_hash.return_value = [record]
         cache_mock.queries_in_state.return_value = []
         mock_servicex.return_value.query_cache = cache_mock
         result = script_runner.run(["servicex", "cache", "list", "--size"])
@@ -236,12 +242,13 @@ def test_cache_list_size_tb(script_runner, tmp_path) -> None:
     with (
         patch("servicex.app.cache.ServiceXClient") as mock_servicex,
         patch(
-            "servicex.app.cache.Path.stat",
+            "servicex.query_cache.Path.stat",
             return_value=Mock(st_size=size_bytes),
         ),
     ):
         cache_mock = Mock()
         cache_mock.cached_queries.return_value = [record]
+        cache_mock.get_transforms_by_hash.return_value = [record]
         cache_mock.queries_in_state.return_value = []
         mock_servicex.return_value.query_cache = cache_mock
         result = script_runner.run(["servicex", "cache", "list", "--size"])
@@ -251,6 +258,118 @@ def test_cache_list_size_tb(script_runner, tmp_path) -> None:
     assert result_row[-1].strip() == "3.00 TB"
 
 
+def _sized_record(tmp_path, total_size=None) -> TransformedResults:
+    return TransformedResults(
+        hash="hash",
+        title="Test",
+        codegen="code",
+        request_id="id",
+        submit_time=datetime(2024, 1, 2, tzinfo=timezone.utc),
+        data_dir=str(tmp_path),
+        file_list=[],
+        signed_url_list=[],
+        files=1,
+        result_format=ResultFormat.parquet,
+        total_size=total_size,
+    )
+
+
+def test_cache_list_recorded_size(script_runner, tmp_path) -> None:
+    with (
+        patch("servicex.app.cache.ServiceXClient") as mock_servicex,
+        patch("servicex.app.cache.measure_transforms") as measure,
+    ):
+        cache_mock = Mock()
+        cache_mock.cached_queries.return_value = [_sized_record(tmp_path, 2 * 1024**3)]
+        cache_mock.queries_in_state.return_value = []
+        mock_servicex.return_value.query_cache = cache_mock
+        result = script_runner.run(["servicex", "cache", "list", "--size"])
+
+    assert result.returncode == 0
+    assert result.stdout.split("  ")[-1].strip() == "2.00 GB"
+    measure.assert_not_called()
+    cache_mock.cached_queries.assert_called_once_with(with_files=False)
+
+
+def test_cache_list_measured_size_saved(script_runner, tmp_path) -> None:
+    dummy_file: Path = tmp_path / "data.parquet"
+    dummy_file.write_bytes(b"0" * 1000)
+    record = _sized_record(tmp_path)
+    record.file_list = [str(dummy_file)]
+
+    with patch("servicex.app.cache.ServiceXClient") as mock_servicex:
+        cache_mock = Mock()
+        cache_mock.cached_queries.return_value = [record]
+        cache_mock.get_transforms_by_hash.return_value = [record]
+        cache_mock.queries_in_state.return_value = []
+        mock_servicex.return_value.query_cache = cache_mock
+        result = script_runner.run(["servicex", "cache", "list", "--size"])
+
+    assert result.returncode == 0
+    cache_mock.get_transforms_by_hash.assert_called_once_with({"hash"})
+    cache_mock.save_total_sizes.assert_called_once_with({"hash": 1000})
+
+
+def test_cache_list_json(script_runner, tmp_path) -> None:
+    with patch("servicex.app.cache.ServiceXClient") as mock_servicex:
+        cache_mock = Mock()
+        cache_mock.cached_queries.return_value = [_sized_record(tmp_path, 1234)]
+        cache_mock.queries_in_state.return_value = [
+            {"title": "Test2", "codegen": "code2", "request_id": "id2"}
+        ]
+        mock_servicex.return_value.query_cache = cache_mock
+        result = script_runner.run(
+            ["servicex", "cache", "list", "--size", "--format", "json"]
+        )
+
+    assert result.returncode == 0
+    assert json.loads(result.stdout) == [
+        {
+            "title": "Test",
+            "codegen": "code",
+            "request_id": "id",
+            "status": "complete",
+            "submit_time": "2024-01-02T00:00:00+00:00",
+            "files": 1,
+            "result_format": "parquet",
+            "size": 1234,
+        },
+        {
+            "title": "Test2",
+            "codegen": "code2",
+            "request_id": "id2",
+            "status": "submitted",
+            "submit_time": None,
+            "files": None,
+            "result_format": "",
+            "size": None,
+        },
+    ]
+
+
+def test_cache_list_csv(script_runner, tmp_path) -> None:
+    with patch("servicex.app.cache.ServiceXClient") as mock_servicex:
+        cache_mock = Mock()
+        cache_mock.cached_queries.return_value = [_sized_record(tmp_path, 1234)]
+        cache_mock.queries_in_state.return_value = []
+        mock_servicex.return_value.query_cache = cache_mock
+        result = script_runner.run(["servicex", "cache", "list", "--format", "csv"])
+
+    assert result.returncode == 0
+    rows = list(csv.DictReader(io.StringIO(result.stdout)))
+    assert rows == [
+        {
+            "title": "Test",
+            "codegen": "code",
+            "request_id": "id",
+            "status": "complete",
+            "submit_time": "2024-01-02T00:00:00+00:00",
+            "files": "1",
+            "result_format": "parquet",
+        }
+    ]
+
+
 def test_cache_clear_force(script_runner, tmp_path):
     """Ensure the cache clear command with force (-y) calls close and rmtree."""
     # Prepare a fake cache path
@@ -305,3 +424,43 @@ def test_cache_delete(script_runner, tmp_path) -> None:
 
         assert result.returncode == 0
         delete_mock.assert_called_once_with("id")
+
+
+def test_cache_gc(script_runner, tmp_path) -> None:
+    record_r = TransformedResults(
+        hash="hash",
+        title="Test",
+        codegen="code",
+        request_id="id",
+        submit_time=datetime.now(timezone.utc),
+        data_dir=str(tmp_path),
+        file_list=[],
+        signed_url_list=[],
+        files=1,
+        result_format=ResultFormat.parquet,
+    )
+
+    with patch("servicex.app.cache.ServiceXClient") as mock_servicex:
+        cache_mock = Mock()
+        cache_mock.collect_garbage.return_value = [record_r]
+        mock_servicex.return_value.query_cache = cache_mock
+        result = script_runner.run(
+            ["servicex", "cache", "gc", "--max-size", "2GB", "--max-age", "7"]
+        )
+
+    assert result.returncode == 0
+    cache_mock.collect_garbage.assert_called_once_with(
+        max_size=2_000_000_000, max_age=7.0
+    )
+    assert "Deleted Test (id)" in result.stdout
+
+
+def test_cache_gc_without_limits(script_runner) -> None:
+    with patch("servicex.app.cache.ServiceXClient") as mock_servicex:
+        mock_servicex.return_value.config.cache_max_size = None
+        mock_servicex.return_value.config.cache_max_age = None
+        result = script_runner.run(["servicex", "cache", "gc"])
+
+    assert result.returncode == 0
+    mock_servicex.return_value.query_cache.collect_garbage.assert_not_called()
+    assert "nothing to do" in result.stdout
@@ -0,0 +1,103 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Latency of a delivery whose samples are all in the local cache. Such a delivery
+must not make a single HTTP request: the transport is made to fail on any use.
+
+Run with ``pytest -s tests/benchmarks`` to see the numbers.
+"""
+
+import statistics
+import time
+
+import pytest
+
+from servicex import ProgressBarFormat, ServiceXSpec
+from servicex.dataset import Rucio
+from servicex.servicex_client import _build_datasets, deliver_async
+
+N_SAMPLES = 50
+N_RUNS = 10
+# Slowest acceptable cache-hit delivery, in seconds
+THRESHOLD = 2.0
+
+
+def _spec() -> ServiceXSpec:
+    return ServiceXSpec.model_validate(
+        {
+            "General": {"Codegen": "uproot-raw"},
+            "Sample": [
+                {
+                    "Name": f"sample{i}",
+                    "Dataset": Rucio(f"user.bench:sample{i}"),
+                    "Query": "[{'treename': 'nominal'}]",
+                }
+                for i in range(N_SAMPLES)
+            ],
+        }
+    )
+
+
+@pytest.mark.benchmark
+async def test_cached_delivery_latency(tmp_path, transformed_result, mocker):
+    queries = await _build_datasets(
+        _spec(), "tests/example_config.yaml", None, True, str(tmp_path)
+    )
+    for query in queries:
+        query.cache.cache_transform(
+            transformed_result.model_copy(
+                update={
+                    "hash": query.transform_request.compute_hash(),
+                    "request_id": query.title,
+                }
+            )
+        )
+    queries[0].cache.close()
+
+    send = mocker.patch(
+        "httpx.AsyncClient.send", side_effect=AssertionError("HTTP request made")
+    )
+
+    timings = []
+    for _ in range(N_RUNS):
+        start = time.perf_counter()
+        results = await deliver_async(
+            _spec(),
+            config_path="tests/example_config.yaml",
+            cache_dir=str(tmp_path),
+            progress_bar=ProgressBarFormat.none,
+        )
+        timings.append(time.perf_counter() - start)
+        assert all(results[f"sample{i}"].valid() for i in range(N_SAMPLES))
+
+    print(
+        f"\n{N_SAMPLES} cached samples: median {statistics.median(timings) * 1000:.1f} "
+        f"ms, slowest {max(timings) * 1000:.1f} ms over {N_RUNS} deliveries"
+    )
+    send.assert_not_called()
+    assert max(timings) < THRESHOLD
@@ -0,0 +1,92 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Cost of constructing a ServiceXClient from deep inside a directory tree, which the CLI
+and every delivery do: searching for the configuration file up the tree, once the
+configuration is remembered, and with the file named by ``SERVICEX_CONFIG``.
+
+Run with ``pytest -s tests/benchmarks`` to see the numbers.
+"""
+
+import statistics
+import time
+from unittest.mock import patch
+
+import pytest
+
+from servicex import configuration
+from servicex.servicex_client import ServiceXClient
+
+DEPTH = 25
+N_RUNS = 20
+# Slowest acceptable construction, in seconds
+THRESHOLD = 0.5
+
+
+def _construct(forget: bool) -> float:
+    if forget:
+        configuration._read_cache.clear()
+    start = time.perf_counter()
+    ServiceXClient()
+    return time.perf_counter() - start
+
+
+@pytest.mark.benchmark
+def test_client_construction(tmp_path, monkeypatch):
+    (tmp_path / "servicex.yaml").write_text(f"""
+api_endpoints:
+  - endpoint: http://localhost:5000
+    name: localhost
+cache_path: {tmp_path / "cache"}
+""")
+    work = tmp_path.joinpath(*(f"d{i}" for i in range(DEPTH)))
+    work.mkdir(parents=True)
+    monkeypatch.chdir(work)
+    monkeypatch.delenv(configuration.CONFIG_FILE_ENV, raising=False)
+
+    searched = [_construct(forget=True) for _ in range(N_RUNS)]
+
+    _construct(forget=True)
+    with patch("servicex.configuration.yaml.safe_load") as safe_load:
+        memoized = [_construct(forget=False) for _ in range(N_RUNS)]
+        safe_load.assert_not_called()
+
+    monkeypatch.setenv(configuration.CONFIG_FILE_ENV, str(tmp_path / "servicex.yaml"))
+    from_environment = [_construct(forget=True) for _ in range(N_RUNS)]
+
+    for name, timings in [
+        (f"searched {DEPTH} directories up", searched),
+        ("configuration remembered", memoized),
+        (f"from {configuration.CONFIG_FILE_ENV}", from_environment),
+    ]:
+        print(
+            f"\nClient construction, {name}: median "
+            f"{statistics.median(timings) * 1000:.2f} ms, "
+            f"slowest {max(timings) * 1000:.2f} ms"
+        )
+        assert max(timings) < THRESHOLD
@@ -0,0 +1,222 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Event loop responsiveness during a large delivery, with a slow filesystem and a
+contended cache database, and while a failed transform is dropped from that database.
+The loop runs in asyncio debug mode, which logs every callback that holds it for
+longer than ``slow_callback_duration``; a heartbeat task measures the longest stall.
+The delivery runs against the local moto S3 server.
+
+Run with ``pytest -s tests/benchmarks`` to see the numbers.
+"""
+
+import asyncio
+import logging
+import time
+import urllib.parse
+from pathlib import PurePath
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import servicex.minio_adapter
+from servicex.configuration import Configuration
+from servicex.dataset_identifier import FileListDataset
+from servicex.expandable_progress import ExpandableProgress
+from servicex.func_adl.func_adl_dataset import FuncADLQuery_Uproot
+from servicex.download_manifest import DownloadManifest
+from servicex.download_scheduler import DownloadScheduler
+from servicex.minio_adapter import MinioAdapter, shared_s3_clients
+from servicex.models import DownloadState, ResultFormat, Status
+from servicex.query_cache import QueryCache
+from servicex.query_core import Query, ServiceXException
+
+N_FILES = 200
+# Longest time a single callback may hold the event loop
+THRESHOLD = 0.2
+# Simulated cost of a stat on a network filesystem, and of waiting for the cache lock
+SLOW_STAT = 0.05
+SLOW_CACHE_WRITE = 0.5
+
+
+@pytest.fixture
+async def populated_adapter(moto_services, moto_patch_session):
+    urlinfo = urllib.parse.urlparse(moto_services["s3"])
+    adapter = MinioAdapter(
+        urlinfo.netloc, False, "access_key", "secret_key", "bench-loop"
+    )
+    async with adapter.minio.client("s3", endpoint_url=adapter.endpoint_host) as s3:
+        await s3.create_bucket(Bucket=adapter.bucket)
+        for i in range(N_FILES):
+            await s3.put_object(
+                Bucket=adapter.bucket, Key=f"file{i}.root", Body=b"\x01" * 1024
+            )
+    return adapter
+
+
+def _watch_event_loop(caplog):
+    loop = asyncio.get_running_loop()
+    loop.set_debug(True)
+    loop.slow_callback_duration = THRESHOLD
+    caplog.set_level(logging.WARNING, logger="asyncio")
+
+
+def _slow_callbacks(caplog):
+    asyncio.get_running_loop().set_debug(False)
+    return [r for r in caplog.records if r.getMessage().startswith("Executing")]
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_delivery_does_not_block_event_loop(
+    populated_adapter, tmp_path, mocker, caplog
+):
+    cache = QueryCache(Configuration(cache_path=str(tmp_path), api_endpoints=[]))
+    save = cache.save_download_manifest
+
+    def contended_save(*args):
+        time.sleep(SLOW_CACHE_WRITE)
+        save(*args)
+
+    local_size = servicex.minio_adapter._local_size
+
+    def slow_stat(path):
+        time.sleep(SLOW_STAT)
+        return local_size(path)
+
+    mocker.patch.object(cache, "save_download_manifest", side_effect=contended_save)
+    mocker.patch("servicex.minio_adapter._local_size", side_effect=slow_stat)
+
+    _watch_event_loop(caplog)
+
+    longest_stall = 0.0
+    stop = asyncio.Event()
+
+    async def heartbeat():
+        nonlocal longest_stall
+        while not stop.is_set():
+            before = time.perf_counter()
+            await asyncio.sleep(0.01)
+            longest_stall = max(longest_stall, time.perf_counter() - before - 0.01)
+
+    manifest = DownloadManifest(cache, "bench", flush_interval=0)
+    scheduler = DownloadScheduler(max_connections=20)
+
+    async def download(i: int):
+        name = f"file{i}.root"
+        await manifest.update_async(name, DownloadState.pending, size=1024)
+        async with scheduler.slot("bench", 1024):
+            path = await populated_adapter.download_file(
+                name, str(tmp_path / "data"), expected_size=1024
+            )
+        await manifest.update_async(
+            name, DownloadState.done, local_path=path.as_posix()
+        )
+
+    beat = asyncio.create_task(heartbeat())
+    start = time.perf_counter()
+    try:
+        async with shared_s3_clients():
+            await asyncio.gather(*[download(i) for i in range(N_FILES)])
+        await manifest.flush_async()
+    finally:
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await beat
+        cache.close()
+
+    slow = _slow_callbacks(caplog)
+    print(
+        f"\n{N_FILES} files in {elapsed:.2f}s, longest event loop stall "
+        f"{longest_stall * 1000:.1f} ms, {len(slow)} callbacks over "
+        f"{THRESHOLD * 1000:.0f} ms"
+    )
+    assert slow == [], [r.getMessage() for r in slow]
+    assert len(list((tmp_path / "data").iterdir())) == N_FILES
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_failed_transform_does_not_block_event_loop(
+    completed_status, mocker, caplog
+):
+    status = completed_status.model_copy(
+        update={
+            "request_id": "bench-failed",
+            "status": Status.fatal,
+            "files_completed": 0,
+            "files_failed": 1,
+        }
+    )
+    servicex = AsyncMock()
+    servicex.get_code_generators_async.return_value = {"uproot": "image"}
+    servicex.submit_transform.return_value = "bench-failed"
+    servicex.get_transform_status.return_value = status
+    mocker.patch("servicex.minio_adapter.MinioAdapter", return_value=AsyncMock())
+
+    cache = MagicMock(QueryCache)
+    cache.get_transform_by_hash.return_value = None
+    cache.is_transform_request_submitted.return_value = False
+    cache.cache_path_for_transform.return_value = PurePath(".")
+
+    def contended_delete(*args):
+        time.sleep(SLOW_CACHE_WRITE)
+
+    cache.delete_record_by_request_id.side_effect = contended_delete
+
+    query = Query(
+        dataset_identifier=FileListDataset("/foo/bar/baz.root"),
+        title="bench",
+        codegen="uproot",
+        sx_adapter=servicex,
+        query_cache=cache,
+        config=Configuration(api_endpoints=[]),
+        servicex_polling_interval=0,
+        minio_polling_interval=0,
+    )
+    query.query_string_generator = FuncADLQuery_Uproot().FromTree("nominal")
+    query.result_format = ResultFormat.parquet
+
+    _watch_event_loop(caplog)
+    start = time.perf_counter()
+    try:
+        with ExpandableProgress(display_progress=False) as progress:
+            with pytest.raises(ServiceXException):
+                await query.submit_and_download(
+                    signed_urls_only=False, expandable_progress=progress
+                )
+    finally:
+        elapsed = time.perf_counter() - start
+        slow = _slow_callbacks(caplog)
+
+    print(
+        f"\nFailed transform dropped from the cache in {elapsed:.2f}s, "
+        f"{len(slow)} callbacks over {THRESHOLD * 1000:.0f} ms"
+    )
+    cache.delete_record_by_request_id.assert_called_once_with("bench-failed")
+    assert slow == [], [r.getMessage() for r in slow]
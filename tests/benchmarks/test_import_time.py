@@ -0,0 +1,100 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Start-up cost of ``import servicex`` and of the ``servicex`` command line. Each is
+imported in a fresh interpreter; the time of an interpreter that imports nothing is
+taken off. The heavy libraries must only be imported once they are needed.
+
+Run with ``pytest -s tests/benchmarks`` to see the numbers.
+"""
+
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+
+N_RUNS = 3
+# Seconds each import may take, on top of starting the interpreter
+IMPORT_BUDGET = 0.5
+CLI_BUDGET = 1.5
+# Slow to import, and only needed to download files or to translate queries
+HEAVY_MODULES = ["aioboto3", "boto3", "botocore.session", "func_adl", "qastle"]
+
+
+def _run(code: str) -> float:
+    "Fastest of a few runs of code in a fresh interpreter"
+    timings = []
+    for _ in range(N_RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _imported(statement: str) -> list:
+    "The heavy modules loaded by statement"
+    out = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import json, sys; {statement}; "
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    "statement, budget",
+    [
+        ("import servicex", IMPORT_BUDGET),
+        ("from servicex.app.main import app", CLI_BUDGET),
+    ],
+)
+def test_import_time(statement, budget):
+    baseline = _run("pass")
+    elapsed = _run(statement) - baseline
+
+    print(f"\n{statement}: {elapsed * 1000:.0f} ms (budget {budget * 1000:.0f} ms)")
+    assert _imported(statement) == []
+    assert elapsed < budget
+
+
+def test_lazy_names_resolve():
+    import servicex
+
+    assert servicex.OutputFormat is servicex.General.OutputFormatEnum
+    assert "deliver" in dir(servicex)
+    with pytest.raises(AttributeError):
+        servicex.not_a_name
@@ -0,0 +1,91 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Download throughput with a private S3 client per call versus the shared, pooled
+clients opened by ``shared_s3_clients``. Runs against the local moto S3 server.
+
+Run with ``pytest -s tests/benchmarks`` to see the numbers.
+"""
+
+import asyncio
+import time
+import urllib.parse
+
+import pytest
+
+from servicex.minio_adapter import MinioAdapter, shared_s3_clients
+
+N_FILES = 40
+
+
+@pytest.fixture
+async def populated_adapter(moto_services, moto_patch_session):
+    urlinfo = urllib.parse.urlparse(moto_services["s3"])
+    adapter = MinioAdapter(
+        urlinfo.netloc, False, "access_key", "secret_key", "bench-pool"
+    )
+    async with adapter.minio.client("s3", endpoint_url=adapter.endpoint_host) as s3:
+        await s3.create_bucket(Bucket=adapter.bucket)
+        for i in range(N_FILES):
+            await s3.put_object(
+                Bucket=adapter.bucket, Key=f"file{i}.root", Body=b"\x01" * 1024
+            )
+    return adapter
+
+
+async def _download_all(adapter: MinioAdapter, local_dir) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[
+            adapter.download_file(f"file{i}.root", local_dir, expected_size=1024)
+            for i in range(N_FILES)
+        ]
+    )
+    return N_FILES / (time.perf_counter() - start)
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_shared_client_files_per_second(populated_adapter, tmp_path, mocker):
+    created = mocker.spy(populated_adapter.minio, "client")
+
+    per_call_rate = await _download_all(populated_adapter, tmp_path / "per_call")
+    per_call_clients = created.call_count
+
+    created.reset_mock()
+    async with shared_s3_clients() as pool:
+        pooled_rate = await _download_all(populated_adapter, tmp_path / "pooled")
+    pooled_clients = created.call_count
+
+    print(
+        f"\nper-call clients: {per_call_rate:8.1f} files/s ({per_call_clients} clients)"
+        f"\nshared client:    {pooled_rate:8.1f} files/s ({pooled_clients} client)"
+    )
+    assert per_call_clients == N_FILES
+    assert pooled_clients == pool.clients_created == 1
+    assert len(list((tmp_path / "pooled").iterdir())) == N_FILES
@@ -0,0 +1,125 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
+import threading
+
+import pytest
+
+from servicex.background_loop import BackgroundLoop, make_sync_method
+from servicex.minio_adapter import _s3_client_pools
+
+
+@pytest.fixture
+def background_loop():
+    loop = BackgroundLoop()
+    yield loop
+    loop.close()
+
+
+async def _running_loop():
+    return asyncio.get_running_loop(), threading.current_thread()
+
+
+def test_calls_share_one_loop(background_loop):
+    loop1, thread1 = background_loop.run(_running_loop())
+    loop2, thread2 = background_loop.run(_running_loop())
+    assert loop1 is loop2 is background_loop.loop
+    assert thread1 is thread2 is not threading.current_thread()
+
+
+def test_s3_clients_kept_between_calls(background_loop):
+    pool = _s3_client_pools.get(background_loop.loop)
+    assert pool is not None
+    background_loop.run(asyncio.sleep(0))
+    assert _s3_client_pools.get(background_loop.loop) is pool
+
+    background_loop.close()
+    assert background_loop.closed
+    assert _s3_client_pools.get(background_loop.loop) is None
+
+
+@pytest.mark.asyncio
+async def test_works_while_a_loop_is_running(background_loop):
+    # As in Jupyter: the caller's thread already runs an event loop
+    loop, _ = background_loop.run(_running_loop())
+    assert loop is not asyncio.get_running_loop()
+
+
+def test_exceptions_raised_in_caller(background_loop):
+    async def fail():
+        raise ValueError("bad")
+
+    with pytest.raises(ValueError, match="bad"):
+        background_loop.run(fail())
+
+
+def test_sync_call_from_its_own_loop_refused(background_loop):
+    async def nested():
+        background_loop.run(asyncio.sleep(0))
+
+    with pytest.raises(RuntimeError, match="await the async version"):
+        background_loop.run(nested())
+
+
+def test_close_cancels_pending_work():
+    background_loop = BackgroundLoop()
+    started = threading.Event()
+    cancelled = threading.Event()
+
+    async def forever():
+        started.set()
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    asyncio.run_coroutine_threadsafe(forever(), background_loop.loop)
+    assert started.wait(5)
+    background_loop.close()
+    assert cancelled.is_set()
+    assert not background_loop._thread.is_alive()
+
+    coro = asyncio.sleep(0)
+    with pytest.raises(RuntimeError, match="closed"):
+        background_loop.run(coro)
+
+
+def test_make_sync_method(background_loop):
+    class Thing:
+        def __init__(self, loop):
+            self.background_loop = loop
+
+        async def where_async(self, offset):
+            return threading.current_thread().name, offset
+
+        where = make_sync_method(where_async)
+
+    assert Thing(background_loop).where(1) == ("servicex-event-loop", 1)
+    name, offset = Thing(None).where(2)
+    assert name != "servicex-event-loop" and offset == 2
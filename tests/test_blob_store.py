@@ -0,0 +1,94 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import base64
+import hashlib
+import os
+
+from servicex.blob_store import BlobStore
+
+
+def test_key():
+    assert BlobStore.key('"abc-2"', 10) == "etag-abc-2-10"
+    assert BlobStore.key(None, 10) is None
+    checksum = base64.b64encode(hashlib.sha256(b"data").digest()).decode()
+    assert BlobStore.key('"abc"', 4, checksum) == (
+        "sha256-" + hashlib.sha256(b"data").hexdigest()
+    )
+    # An unusable checksum falls back to the ETag
+    assert BlobStore.key('"abc"', 4, "not base64!") == "etag-abc-4"
+
+
+def test_add_and_fetch(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    first = tmp_path / "request1" / "file.root"
+    first.parent.mkdir()
+    first.write_bytes(b"data")
+
+    store.add("etag-abc-4", first)
+    blob = store.path("etag-abc-4")
+    assert blob.read_bytes() == b"data"
+    assert os.path.samefile(blob, first)
+
+    second = tmp_path / "request2" / "file.root"
+    second.parent.mkdir()
+    assert store.fetch("etag-abc-4", 4, second)
+    assert os.path.samefile(blob, second)
+
+    assert not store.fetch("etag-abc-4", 5, tmp_path / "wrong_size")
+    assert not store.fetch("etag-other-4", 4, tmp_path / "missing")
+    assert not (tmp_path / "wrong_size").exists()
+
+
+def test_add_existing_blob(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    first = tmp_path / "first"
+    first.write_bytes(b"data")
+    store.add("key", first)
+
+    # The same content downloaded again is replaced by a link to the stored copy
+    second = tmp_path / "second"
+    second.write_bytes(b"data")
+    store.add("key", second)
+    assert os.path.samefile(store.path("key"), second)
+
+
+def test_symlink_without_hard_links(tmp_path, mocker):
+    mocker.patch("servicex.blob_store.os.link", side_effect=OSError("not supported"))
+    store = BlobStore(tmp_path / "blobs")
+    first = tmp_path / "first"
+    first.write_bytes(b"data")
+
+    store.add("key", first)
+    assert first.is_symlink()
+    assert first.read_bytes() == b"data"
+    assert store.path("key").read_bytes() == b"data"
+
+    second = tmp_path / "second"
+    assert store.fetch("key", 4, second)
+    assert second.is_symlink()
+    assert os.path.samefile(store.path("key"), second)
@@ -68,3 +68,40 @@ async def test_codegen_list_skipped_when_cached(mocker):
 
     sx_adapter.get_code_generators_async.assert_not_called()
     assert result is cached
+
+
+@pytest.mark.asyncio
+async def test_codegen_list_refreshed_when_codegen_missing(mocker):
+    """A saved list of code generators may predate the one requested."""
+    sx_adapter = AsyncMock(spec=ServiceXAdapter)
+    sx_adapter.get_code_generators_async = AsyncMock(
+        side_effect=[{"xaod": "img"}, {"xaod": "img", "uproot": "img"}]
+    )
+    sx_adapter.submit_transform.return_value = "123-456"
+    sx_adapter.get_transform_status.side_effect = [transform_status1, transform_status3]
+    sx_adapter.url = "http://example.com"
+
+    mocker.patch("servicex.minio_adapter.MinioAdapter", return_value=AsyncMock())
+
+    cache = MagicMock(spec=QueryCache)
+    cache.get_transform_by_hash.return_value = None
+    cache.is_transform_request_submitted.return_value = False
+    cache.cache_path_for_transform.return_value = Path("/tmp")
+    cache.transformed_results.return_value = MagicMock()
+
+    client = ServiceXClient(config_path="tests/example_config.yaml")
+    client.servicex = sx_adapter
+    client.query_cache = cache
+
+    q = client.generic_query(
+        dataset_identifier=FileListDataset("file.root"),
+        query=GenericQueryStringGenerator("1", "uproot"),
+    )
+    mocker.patch.object(Query, "download_files", AsyncMock(return_value=[]))
+
+    await q.as_files_async(display_progress=False)
+
+    assert sx_adapter.get_code_generators_async.call_args_list[-1].kwargs == {
+        "refresh": True
+    }
+    sx_adapter.submit_transform.assert_called_once()
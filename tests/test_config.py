@@ -30,7 +30,7 @@ from pathlib import Path
 from unittest.mock import MagicMock, patch
 import pytest
 
-from servicex.configuration import Configuration
+from servicex.configuration import Configuration, parse_size
 
 
 @patch("servicex.configuration.getuser", return_value="cache_user")
@@ -111,3 +111,80 @@ api_endpoints:
 
     c = Configuration.read()
     assert c.api_endpoints[0].endpoint == "http://localhost:5012"
+
+
+@pytest.mark.parametrize(
+    "size, expected",
+    [
+        (1024, 1024),
+        ("1024", 1024),
+        ("500MB", 500_000_000),
+        ("2 GiB", 2 * 1024**3),
+        ("1.5k", 1500),
+    ],
+)
+def test_parse_size(size, expected):
+    assert parse_size(size) == expected
+
+
+def test_cache_limits(tmp_path):
+    config = Configuration(
+        api_endpoints=[],
+        cache_path=str(tmp_path),
+        cache_max_size="20GB",
+        cache_max_age=30,
+    )
+    assert config.cache_max_size == 20_000_000_000
+    assert config.cache_max_age == 30
+
+    with pytest.raises(ValueError):
+        Configuration(api_endpoints=[], cache_path=str(tmp_path), cache_max_size="lots")
+
+
+def _write_config(path: Path, port: int) -> None:
+    path.write_text(f"""
+api_endpoints:
+  - endpoint: http://localhost:{port}
+    name: localhost
+""")
+
+
+def test_read_memoized(monkeypatch, tmp_path):
+    _write_config(tmp_path / "servicex.yaml", 5000)
+    work = tmp_path / "a" / "b"
+    work.mkdir(parents=True)
+    monkeypatch.chdir(work)
+
+    first = Configuration.read()
+    with patch("servicex.configuration.yaml.safe_load") as safe_load:
+        again = Configuration.read()
+        safe_load.assert_not_called()
+    assert again == first
+    assert again is not first
+
+    # Edited file
+    _write_config(tmp_path / "servicex.yaml", 50001)
+    assert Configuration.read().api_endpoints[0].endpoint == "http://localhost:50001"
+
+    # A file that the search would now find first
+    _write_config(tmp_path / "a" / ".servicex", 5002)
+    assert Configuration.read().api_endpoints[0].endpoint == "http://localhost:5002"
+
+
+def test_read_from_environment(monkeypatch, tmp_path):
+    _write_config(cfg := tmp_path / "elsewhere.yaml", 5003)
+    monkeypatch.setenv("SERVICEX_CONFIG", str(cfg))
+    monkeypatch.chdir(tmp_path)
+
+    with patch.object(
+        Configuration, "_add_from_path", wraps=Configuration._add_from_path
+    ) as add:
+        c = Configuration.read()
+    assert add.call_args.args[1] is False  # No walk up the tree
+    assert c.api_endpoints[0].endpoint == "http://localhost:5003"
+    assert c.config_file == str(cfg)
+
+    # An explicit path still wins
+    example = Path(__file__).parent / "example_config.yaml"
+    c = Configuration.read(config_path=str(example))
+    assert c.config_file == str(example.resolve())
@@ -1,4 +1,5 @@
 import pytest
+import os
 from pytest_asyncio import fixture
 from unittest.mock import patch
 from pydantic import ValidationError
@@ -645,6 +646,99 @@ Sample:
         _load_ServiceXSpec(path2)
 
 
+@pytest.fixture
+def spec_cache(tmp_path):
+    from servicex.yaml_parser import spec_cache
+
+    spec_cache._documents.clear()
+    with patch(
+        "servicex.yaml_parser.spec_cache._cache_dir",
+        return_value=tmp_path / "specs",
+    ):
+        yield spec_cache
+    spec_cache._documents.clear()
+
+
+def _write_spec_with_include(tmp_path, treename):
+    (tmp_path / "definitions.yaml").write_text(f"""
+- &DEF_query !UprootRaw '[{{"treename": "{treename}"}}]'
+""")
+    (path := tmp_path / "parent.yaml").write_text("""
+Definitions:
+    !include definitions.yaml
+
+General:
+  OutputFormat: root-ttree
+  Delivery: LocalCache
+
+Sample:
+  - Name: ttH
+    Dataset: !FileList ["/path/to/file1.root", "/path/to/file2.root"]
+    Query: *DEF_query
+""")
+    return path
+
+
+def test_yaml_spec_cached(tmp_path, spec_cache):
+    from servicex.servicex_client import _load_ServiceXSpec
+
+    path = _write_spec_with_include(tmp_path, "nominal")
+    first = _load_ServiceXSpec(path)
+
+    first.Sample[0].Dataset.files.append("/path/to/file3.root")
+
+    # Neither from this process, nor from the file saved for others, and without
+    # validating the spec again
+    for clear in (False, True):
+        if clear:
+            spec_cache._documents.clear()
+        with (
+            patch(
+                "servicex.yaml_parser.parser.YAML.compose", side_effect=AssertionError
+            ),
+            patch(
+                "servicex.yaml_parser.spec_cache.ServiceXSpec.__init__",
+                side_effect=AssertionError,
+            ),
+        ):
+            again = _load_ServiceXSpec(path)
+        assert again.Sample[0].Query.generate_selection_string() == (
+            first.Sample[0].Query.generate_selection_string()
+        )
+        # Each load is a copy of its own
+        assert again.Sample[0].Dataset.files == [
+            "/path/to/file1.root",
+            "/path/to/file2.root",
+        ]
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="file owners are POSIX")
+def test_yaml_spec_cache_ignores_shared_file(tmp_path, spec_cache):
+    from servicex.servicex_client import _load_ServiceXSpec
+
+    path = _write_spec_with_include(tmp_path, "nominal")
+    _load_ServiceXSpec(path)
+    spec_cache._documents.clear()
+
+    # A file others could have written is not unpickled
+    (entry_path,) = (tmp_path / "specs").iterdir()
+    entry_path.chmod(0o666)
+    with patch("servicex.yaml_parser.spec_cache.pickle.load") as load:
+        _load_ServiceXSpec(path)
+    load.assert_not_called()
+
+
+def test_yaml_spec_cache_invalidated_by_include(tmp_path, spec_cache):
+    from servicex.servicex_client import _load_ServiceXSpec
+
+    path = _write_spec_with_include(tmp_path, "nominal")
+    _load_ServiceXSpec(path)
+
+    _write_spec_with_include(tmp_path, "CollectionTree")
+    result = _load_ServiceXSpec(path)
+    assert "CollectionTree" in result.Sample[0].Query.generate_selection_string()
+
+
 def test_funcadl_query(transformed_result, network_patches, with_event_loop):
     from servicex import deliver
     from servicex.query import FuncADL_Uproot  # type: ignore
@@ -988,3 +1082,124 @@ def test_deliver_progress_options(transformed_result, network_patches, with_even
 def test_entrypoint_import():
     """This will check that we have at least the Python transformer defined in servicex.query"""
     from servicex.query import PythonFunction  # type: ignore # noqa: F401
+
+
+def _two_sample_spec():
+    return ServiceXSpec.model_validate(
+        {
+            "General": {"Codegen": "uproot-raw"},
+            "Sample": [
+                {
+                    "Name": "sampleA",
+                    "RucioDID": "user.ivukotic:user.ivukotic.single_top_tW__nominal",
+                    "Query": "[{'treename': 'nominal'}]",
+                },
+                {
+                    "Name": "sampleB",
+                    "RucioDID": "user.ivukotic:user.ivukotic.single_top_tW__nominal",
+                    "Query": "[{'treename': 'other'}]",
+                },
+            ],
+        }
+    )
+
+
+async def _cache_samples(cache_dir, names, result, spec=None):
+    "Save result in the cache for the samples of the spec with these names"
+    from servicex.servicex_client import _build_datasets
+
+    spec = spec or _two_sample_spec()
+    queries = await _build_datasets(
+        spec, "tests/example_config.yaml", None, True, cache_dir
+    )
+    for query in queries:
+        if query.title in names:
+            query.cache.cache_transform(
+                result.model_copy(
+                    update={
+                        "hash": query.transform_request.compute_hash(),
+                        "request_id": query.title,
+                    }
+                )
+            )
+    queries[0].cache.close()
+
+
+async def test_deliver_fully_cached_without_network(tmp_path, transformed_result):
+    from servicex.servicex_client import deliver_async
+
+    await _cache_samples(str(tmp_path), ["sampleA", "sampleB"], transformed_result)
+    with (
+        patch(
+            "servicex.servicex_adapter.ServiceXAdapter._get_authorization"
+        ) as get_authorization,
+        patch("servicex.servicex_adapter.ServiceXAdapter.get_servicex_info") as info,
+        patch("servicex.dataset_group.DatasetGroup.as_files_async") as as_files,
+    ):
+        results = await deliver_async(
+            _two_sample_spec(),
+            config_path="tests/example_config.yaml",
+            cache_dir=str(tmp_path),
+        )
+
+    get_authorization.assert_not_called()
+    info.assert_not_called()
+    as_files.assert_not_called()
+    assert list(results["sampleA"]) == transformed_result.file_list
+    assert list(results["sampleB"]) == transformed_result.file_list
+
+
+async def test_deliver_only_sends_misses(tmp_path, transformed_result, network_patches):
+    from servicex.servicex_client import deliver_async
+
+    await _cache_samples(str(tmp_path), ["sampleB"], transformed_result)
+    fetched = transformed_result.model_copy(update={"file_list": ["fetched.parquet"]})
+    with patch(
+        "servicex.dataset_group.DatasetGroup.as_files_async", return_value=[fetched]
+    ) as as_files:
+        results = await deliver_async(
+            _two_sample_spec(),
+            config_path="tests/example_config.yaml",
+            cache_dir=str(tmp_path),
+        )
+
+    as_files.assert_called_once()
+    assert list(results["sampleA"]) == ["fetched.parquet"]
+    assert list(results["sampleB"]) == transformed_result.file_list
+
+
+async def test_deliver_long_title_same_key_cached_or_not(
+    tmp_path, transformed_result, network_patches
+):
+    from servicex.servicex_client import deliver_async
+
+    long_name = "sample" * 40
+
+    def spec():
+        spec = _two_sample_spec()
+        spec.Sample[0].Name = long_name
+        return spec
+
+    keys = []
+    for cached in (False, True):
+        if cached:
+            await _cache_samples(
+                str(tmp_path), [long_name, "sampleB"], transformed_result, spec()
+            )
+        with (
+            patch(
+                "servicex.servicex_adapter.ServiceXAdapter.get_servicex_capabilities",
+                return_value=["poll_local_transformation_results"],
+            ),
+            patch(
+                "servicex.dataset_group.DatasetGroup.as_files_async",
+                return_value=[transformed_result] * 2,
+            ) as as_files,
+        ):
+            results = await deliver_async(
+                spec(), config_path="tests/example_config.yaml", cache_dir=str(tmp_path)
+            )
+        assert as_files.called != cached
+        keys.append(sorted(results))
+
+    assert keys[0] == keys[1] == sorted([long_name[:128], "sampleB"])
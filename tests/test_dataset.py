@@ -25,6 +25,7 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
 import pytest
 import tempfile
 import os
@@ -34,6 +35,7 @@ from unittest.mock import AsyncMock, Mock, patch
 from servicex.dataset_identifier import FileListDataset
 from servicex.configuration import Configuration
 from servicex.minio_adapter import MinioAdapter
+from servicex.polling import AdaptivePolling
 from servicex.query_core import Query
 from servicex.query_cache import QueryCache
 from servicex.expandable_progress import ExpandableProgress
@@ -41,8 +43,12 @@ from servicex.query_core import ServiceXException
 from servicex.models import CachedDataset
 
 from pathlib import Path
+from servicex.download_manifest import DownloadManifest
 from servicex.models import (
+    DownloadState,
+    ResultFile,
     Status,
+    TransformRequest,
 )
 from rich.progress import Progress
 
@@ -117,6 +123,7 @@ async def test_as_files_happy(transformed_result):
 @pytest.mark.asyncio
 async def test_as_files_cached(transformed_result, python_dataset):
     python_dataset.cache = AsyncMock()
+    python_dataset.cache.adopt_legacy_hash = Mock(return_value=False)
     python_dataset.cache.get_transform_by_hash = Mock()
     python_dataset.cache.get_transform_by_hash.return_value = transformed_result
     result = python_dataset.as_files(display_progress=True, provided_progress=None)
@@ -155,7 +162,7 @@ async def test_download_files(python_dataset):
     ]
 
     minio_mock.download_file.return_value = Path("/path/to/downloaded_file")
-    minio_mock.get_signed_url.return_value = Path("http://example.com/signed_url")
+    minio_mock.get_signed_urls.return_value = ["http://example.com/signed_url"] * 2
 
     progress_mock = Mock()
     python_dataset.minio_polling_interval = 0
@@ -167,10 +174,207 @@ async def test_download_files(python_dataset):
         signed_urls_only, progress_mock, download_progress, None
     )
     minio_mock.download_file.assert_awaited()
-    minio_mock.get_signed_url.assert_not_awaited()
+    minio_mock.get_signed_urls.assert_not_awaited()
     assert result_uris == ["/path/to/downloaded_file", "/path/to/downloaded_file"]
 
 
+@pytest.mark.asyncio
+async def test_download_files_records_sizes(python_dataset, tmp_path):
+    python_dataset.configuration = Configuration(
+        cache_path=str(tmp_path), api_endpoints=[]
+    )
+    python_dataset.servicex = _sx_mock()
+    python_dataset.servicex.get_servicex_capabilities = AsyncMock(
+        return_value=["poll_local_transformation_results"]
+    )
+    python_dataset.servicex.get_transformation_results = AsyncMock(
+        return_value=[
+            ServiceXFile(
+                filename=f"file{i}.txt",
+                created_at=datetime.datetime.now(datetime.timezone.utc),
+                total_bytes=100 * i,
+            )
+            for i in (1, 2)
+        ]
+    )
+    minio_mock = AsyncMock()
+    minio_mock.download_file.side_effect = lambda name, *_, **__: Path(f"/d/{name}")
+    python_dataset.minio_polling_interval = 0
+    python_dataset.minio = minio_mock
+    python_dataset.current_status = Mock(status="Complete", files_completed=2)
+    python_dataset.downloaded_sizes = {}
+
+    result_uris = await python_dataset.download_files(False, Mock(), "task", None)
+
+    assert python_dataset._downloaded_total(result_uris) == 300
+    assert python_dataset._downloaded_total(result_uris + ["/d/other"]) is None
+
+
+@pytest.mark.asyncio
+async def test_download_files_resumes_from_manifest(python_dataset, tmp_path):
+    config = Configuration(cache_path=str(tmp_path), api_endpoints=[])
+    cache = QueryCache(config)
+    python_dataset.configuration = config
+    python_dataset.cache = cache
+    python_dataset.request_id = "123-456"
+    python_dataset.download_path = tmp_path
+
+    # Left behind by an interrupted delivery
+    manifest = DownloadManifest(cache, "123-456")
+    manifest.update("file1.txt", DownloadState.done, local_path="/cache/file1.txt")
+    manifest.update("file2.txt", DownloadState.downloading, size=100)
+    manifest.flush()
+
+    python_dataset.servicex = _sx_mock()
+    python_dataset.servicex.get_servicex_capabilities = AsyncMock(
+        return_value=["poll_local_transformation_results"]
+    )
+    python_dataset.servicex.get_transformation_results = AsyncMock()
+    minio_mock = AsyncMock()
+    minio_mock.download_file.return_value = Path("/cache/file2.txt")
+    python_dataset.minio_polling_interval = 0
+    python_dataset.minio = minio_mock
+    python_dataset.current_status = Mock(status="Complete", files_completed=2)
+
+    result_uris = await python_dataset.download_files(False, Mock(), "task", None)
+
+    assert sorted(result_uris) == ["/cache/file1.txt", "/cache/file2.txt"]
+    python_dataset.servicex.get_transformation_results.assert_not_awaited()
+    minio_mock.download_file.assert_awaited_once()
+    assert minio_mock.download_file.call_args.args[0] == "file2.txt"
+    assert minio_mock.download_file.call_args.kwargs["expected_size"] == 100
+    entries = cache.get_download_manifest("123-456")
+    assert entries["file2.txt"].state == DownloadState.done
+    cache.close()
+
+
+def _bucket(names, listings, streamed):
+    "Mock of MinioAdapter.iter_bucket over a bucket with the given keys"
+
+    async def iter_bucket(start_after=None):
+        listings.append(start_after)
+        for name in sorted(names):
+            if start_after is None or name > start_after:
+                streamed.append(name)
+                yield ResultFile(filename=name, size=10, extension="txt")
+
+    return iter_bucket
+
+
+@pytest.mark.asyncio
+async def test_download_files_bucket_listing_continues(python_dataset, tmp_path):
+    python_dataset.servicex = _sx_mock()
+    python_dataset.servicex.get_servicex_capabilities = AsyncMock(return_value=[])
+    python_dataset.configuration = Configuration(
+        cache_path=str(tmp_path), api_endpoints=[]
+    )
+    python_dataset.minio_polling_interval = 0
+    python_dataset.current_status = Mock(status="Running", files_completed=1)
+
+    names = ["b.txt"]
+    listings, streamed = [], []
+    list_bucket = _bucket(names, listings, streamed)
+
+    async def iter_bucket(start_after=None):
+        async for file in list_bucket(start_after):
+            yield file
+        if len(listings) == 1:
+            # "a.txt" lands after "b.txt" was listed: continuing from "b.txt" misses it
+            names.extend(["a.txt", "c.txt"])
+            python_dataset.current_status = Mock(status="Complete", files_completed=3)
+
+    minio_mock = AsyncMock()
+    minio_mock.iter_bucket = iter_bucket
+    minio_mock.download_file = AsyncMock(
+        side_effect=lambda a, _, shorten_filename, expected_size: Path(a)
+    )
+    python_dataset.minio = minio_mock
+
+    result_uris = await python_dataset.download_files(False, Mock(), "task", None)
+
+    assert listings == [None, "b.txt", None]
+    assert sorted(result_uris) == ["a.txt", "b.txt", "c.txt"]
+    assert minio_mock.download_file.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_download_files_out_of_order_found_while_running(
+    python_dataset, tmp_path
+):
+    python_dataset.servicex = _sx_mock()
+    python_dataset.servicex.get_servicex_capabilities = AsyncMock(return_value=[])
+    python_dataset.configuration = Configuration(
+        cache_path=str(tmp_path), api_endpoints=[]
+    )
+    python_dataset.minio_polling_interval = 0
+    python_dataset.current_status = Mock(status="Running", files_completed=2)
+
+    names = ["b.txt"]
+    listings, streamed = [], []
+    list_bucket = _bucket(names, listings, streamed)
+
+    async def iter_bucket(start_after=None):
+        async for file in list_bucket(start_after):
+            yield file
+        if len(listings) == 1:
+            names.append("a.txt")
+
+    async def download_file(name, _, shorten_filename, expected_size):
+        if name == "a.txt":
+            python_dataset.current_status = Mock(status="Complete", files_completed=2)
+        return Path(name)
+
+    minio_mock = AsyncMock()
+    minio_mock.iter_bucket = iter_bucket
+    minio_mock.download_file = AsyncMock(side_effect=download_file)
+    python_dataset.minio = minio_mock
+
+    result_uris = await python_dataset.download_files(False, Mock(), "task", None)
+
+    # Listed again from the start while the transform runs, only until the missing
+    # file is found
+    assert listings == [None, "b.txt", None]
+    assert streamed == ["b.txt", "a.txt"]
+    assert sorted(result_uris) == ["a.txt", "b.txt"]
+
+
+@pytest.mark.asyncio
+async def test_download_files_woken_by_status_change(
+    python_dataset, tmp_path, completed_status
+):
+    python_dataset.servicex = _sx_mock()
+    python_dataset.servicex.get_servicex_capabilities = AsyncMock(return_value=[])
+    python_dataset.servicex.get_transform_status = AsyncMock(
+        return_value=completed_status.model_copy(
+            update={"status": Status.complete, "files_completed": 1}
+        )
+    )
+    python_dataset.configuration = Configuration(
+        cache_path=str(tmp_path), api_endpoints=[]
+    )
+    python_dataset.polling_strategy = AdaptivePolling(
+        min_interval=0.01, max_interval=60
+    )
+    python_dataset.current_status = completed_status.model_copy(
+        update={"status": Status.running, "files_completed": 0}
+    )
+    minio_mock = AsyncMock()
+    minio_mock.iter_bucket = _bucket(["a.txt"], [], [])
+    minio_mock.download_file = AsyncMock(
+        side_effect=lambda a, _, shorten_filename, expected_size: Path(a)
+    )
+    python_dataset.minio = minio_mock
+
+    downloads = asyncio.create_task(
+        python_dataset.download_files(False, Mock(), "task", None)
+    )
+    # Long enough for the listing loop to back off to a wait of over a second
+    await asyncio.sleep(1.5)
+    await python_dataset.retrieve_current_transform_status()
+
+    assert await asyncio.wait_for(downloads, 0.5) == ["a.txt"]
+
+
 @pytest.mark.asyncio
 async def test_download_files_with_signed_urls(python_dataset):
     signed_urls_only = True
@@ -179,7 +383,10 @@ async def test_download_files_with_signed_urls(python_dataset):
     config = Configuration(cache_path="temp_dir", api_endpoints=[])
     python_dataset.configuration = config
     minio_mock.download_file.return_value = "/path/to/downloaded_file"
-    minio_mock.get_signed_url.return_value = "http://example.com/signed_url"
+    minio_mock.get_signed_urls.return_value = [
+        "http://example.com/signed_url1",
+        "http://example.com/signed_url2",
+    ]
     progress_mock = Mock()
 
     python_dataset.servicex = _sx_mock()
@@ -210,10 +417,13 @@ async def test_download_files_with_signed_urls(python_dataset):
         signed_urls_only, progress_mock, download_progress, None
     )
     minio_mock.download_file.assert_not_called()
-    minio_mock.get_signed_url.assert_called()
+    # Both files are signed in a single batch
+    minio_mock.get_signed_urls.assert_awaited_once_with(
+        ["file1.txt", "file2.txt"], config.signed_url_expiration
+    )
     assert result_uris == [
-        "http://example.com/signed_url",
-        "http://example.com/signed_url",
+        "http://example.com/signed_url1",
+        "http://example.com/signed_url2",
     ]
 
 
@@ -399,6 +609,29 @@ async def test_retrieve_current_transform_status_status_none(
         cache.close()
 
 
+@pytest.mark.asyncio
+async def test_retrieve_current_transform_status_from_poller(
+    python_dataset, completed_status
+):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        python_dataset.current_status = None
+        python_dataset.servicex = _sx_mock()
+        config = Configuration(cache_path=temp_dir, api_endpoints=[])
+        cache = QueryCache(config)
+        python_dataset.cache = cache
+        python_dataset.configuration = config
+        python_dataset.status_poller = AsyncMock()
+        python_dataset.status_poller.get_status.return_value = completed_status
+
+        await python_dataset.retrieve_current_transform_status()
+        assert python_dataset.current_status == completed_status
+        python_dataset.status_poller.get_status.assert_awaited_once_with(
+            python_dataset.request_id
+        )
+        python_dataset.servicex.get_transform_status.assert_not_awaited()
+        cache.close()
+
+
 @pytest.mark.asyncio
 async def test_retrieve_current_transform_status_status_not(
     python_dataset, completed_status
@@ -453,6 +686,7 @@ async def test_submit_and_download_cache_miss(python_dataset, completed_status):
         )
         assert result is not None
         assert result.request_id == "b8c508d0-ccf2-4deb-a1f7-65c839eebabf"
+        assert result.total_size == 0
         cache.close()
 
 
@@ -692,3 +926,92 @@ async def test_submit_and_download_get_request_id_from_previous_submitted_reques
         assert result is not None
         assert result.request_id == "b8c508d0-ccf2-4deb-a1f7-65c839eebabf"
         cache.close()
+
+
+def test_transform_request_remembered(python_dataset, mocker):
+    compute_hash = mocker.spy(TransformRequest, "_compute_hash")
+
+    request = python_dataset.transform_request
+    assert python_dataset.transform_request.compute_hash() == request.compute_hash()
+    assert compute_hash.call_count == 1
+
+    # The request handed out can be changed without affecting the query
+    request.title = "changed"
+    assert python_dataset.transform_request.title == "Test submission"
+
+    python_dataset.title = "New title"
+    assert python_dataset.transform_request.title == "New title"
+
+    python_dataset.query_string_generator.with_uproot_function("def f(): pass")
+    assert python_dataset.transform_request.compute_hash() != request.compute_hash()
+
+
+def test_transform_request_query_changed_in_place(python_dataset):
+    from servicex.uproot_raw.uproot_raw import CopyHistogramSubQuery, UprootRawQuery
+
+    query = UprootRawQuery([{"treename": "a", "aliases": {"x": "1"}}])
+    python_dataset.query_string_generator = query
+    request = python_dataset.transform_request
+
+    query.query.append(CopyHistogramSubQuery(copy_histograms="h"))
+    appended = python_dataset.transform_request
+    assert "copy_histograms" in appended.selection
+    assert appended.compute_hash() != request.compute_hash()
+
+    query.query[0].aliases["x"] = "2"
+    edited = python_dataset.transform_request
+    assert '"x": "2"' in edited.selection
+    assert edited.compute_hash() != appended.compute_hash()
+
+
+def test_transform_request_hash_canonical(python_dataset):
+    from servicex.uproot_raw.uproot_raw import UprootRawQuery
+
+    python_dataset.query_string_generator = UprootRawQuery(
+        [{"treename": "a", "aliases": {"x": "1", "y": "2"}}]
+    )
+    request = python_dataset.transform_request
+    python_dataset.query_string_generator = UprootRawQuery(
+        [{"treename": "a", "aliases": {"y": "2", "x": "1"}}]
+    )
+    reordered = python_dataset.transform_request
+
+    assert request.selection != reordered.selection
+    assert request.compute_hash() == reordered.compute_hash()
+    # Still found under the hash it had before canonical selections
+    assert request.legacy_hashes() != reordered.legacy_hashes()
+    assert request.compute_hash() not in request.legacy_hashes()
+
+
+def test_transform_request_hash_without_canonical_form(python_dataset):
+    from servicex.query_core import GenericQueryStringGenerator
+
+    python_dataset.query_string_generator = GenericQueryStringGenerator(
+        "(call EventDataset)", "uproot"
+    )
+    request = python_dataset.transform_request
+
+    # Query types without a canonical form keep the hash they always had
+    assert request.legacy_hashes() == []
+    plain = request.model_copy()
+    plain.selection = request.selection
+    assert request.compute_hash() == plain.compute_hash()
+
+
+@pytest.mark.asyncio
+async def test_cached_results_adopt_legacy_hash(
+    python_dataset, transformed_result, tmp_path
+):
+    config = Configuration(cache_path=str(tmp_path), api_endpoints=[])
+    python_dataset.cache = QueryCache(config)
+    python_dataset.configuration = config
+    request = python_dataset.transform_request
+    python_dataset.cache.cache_transform(
+        transformed_result.model_copy(update={"hash": request.legacy_hashes()[0]})
+    )
+
+    record = await python_dataset.cached_results_async(signed_urls_only=False)
+    assert record.request_id == transformed_result.request_id
+    assert record.hash == request.compute_hash()
+    assert not python_dataset.cache.contains_hash(request.legacy_hashes()[0])
+    python_dataset.cache.close()
@@ -25,13 +25,15 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
 from unittest.mock import AsyncMock
 
 import pytest
 
 from servicex.models import ResultFormat
+from servicex.download_scheduler import DownloadScheduler
 from servicex.dataset_group import DatasetGroup
-from servicex.query_core import ServiceXException
+from servicex.query_core import Query, ServiceXException
 
 
 def test_set_result_format(mocker):
@@ -99,3 +101,109 @@ async def test_failure(mocker, transformed_result):
     assert len(results) == 2
     assert results[0].request_id == "123-45-6789"
     assert isinstance(results[1], ServiceXException)
+
+
+@pytest.mark.asyncio
+async def test_queries_share_status_poller(mocker, transformed_result):
+    servicex = mocker.Mock()
+    servicex._get_authorization = AsyncMock()
+    pollers = []
+
+    def make_query(polling_interval):
+        query = mocker.Mock(spec=Query)
+        query.servicex = servicex
+        query.servicex_polling_interval = polling_interval
+        query.polling_strategy = None
+
+        async def as_files_async(**kwargs):
+            pollers.append(query.status_poller)
+            return transformed_result
+
+        query.as_files_async = as_files_async
+        return query
+
+    ds1 = make_query(5)
+    ds2 = make_query(2)
+    group = DatasetGroup([ds1, ds2])
+    await group.as_files_async()
+
+    assert pollers[0] is pollers[1]
+    assert pollers[0].polling_strategy.interval == 2
+    assert ds1.status_poller is None
+    assert ds2.status_poller is None
+
+
+@pytest.mark.asyncio
+async def test_queries_share_download_scheduler(mocker, transformed_result):
+    servicex = mocker.Mock()
+    servicex._get_authorization = AsyncMock()
+    schedulers = []
+
+    def make_query():
+        query = mocker.Mock(spec=Query)
+        query.servicex = servicex
+        query.servicex_polling_interval = 5
+        query.polling_strategy = None
+
+        async def as_files_async(**kwargs):
+            schedulers.append(query.download_scheduler)
+            return transformed_result
+
+        query.as_files_async = as_files_async
+        return query
+
+    ds1 = make_query()
+    ds2 = make_query()
+    scheduler = DownloadScheduler(max_connections=4)
+    group = DatasetGroup([ds1, ds2], download_scheduler=scheduler)
+    await group.as_files_async()
+
+    assert schedulers == [scheduler, scheduler]
+    assert ds1.download_scheduler is None
+    assert ds2.download_scheduler is None
+
+
+@pytest.mark.asyncio
+async def test_iter_files(mocker, transformed_result):
+    def make_query(title, files):
+        query = mocker.Mock()
+        query.servicex._get_authorization = AsyncMock()
+
+        async def submit_and_download(result_stream, **kwargs):
+            for f in files:
+                await result_stream.reserve()
+                await asyncio.sleep(0)
+                result_stream.put(title, f)
+            return transformed_result
+
+        query.submit_and_download = submit_and_download
+        return query
+
+    group = DatasetGroup([make_query("ds1", ["a", "b"]), make_query("ds2", ["c"])])
+    seen = [item async for item in group.iter_files_async(display_progress=False)]
+    assert sorted(seen) == [("ds1", "a"), ("ds1", "b"), ("ds2", "c")]
+
+
+@pytest.mark.asyncio
+async def test_iter_files_failure(mocker):
+    query = mocker.Mock()
+    query.servicex._get_authorization = AsyncMock()
+    query.submit_and_download = AsyncMock(side_effect=ServiceXException("dummy"))
+    other = mocker.Mock()
+    cancelled = asyncio.Event()
+
+    async def never_finishes(**kwargs):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    other.submit_and_download = never_finishes
+
+    group = DatasetGroup([query, other])
+    with pytest.raises(ServiceXException):
+        async for _ in group.iter_files_async(display_progress=False):
+            pass
+    # The other sample's transform is abandoned rather than awaited
+    assert cancelled.is_set()
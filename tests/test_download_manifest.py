@@ -0,0 +1,123 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import sqlite3
+import threading
+
+import pytest
+
+from servicex.configuration import Configuration
+from servicex.download_manifest import DownloadManifest
+from servicex.models import DownloadState
+from servicex.query_cache import QueryCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = QueryCache(Configuration(cache_path=str(tmp_path), api_endpoints=[]))
+    yield cache
+    cache.close()
+
+
+def test_updates_are_buffered(cache, mocker):
+    save = mocker.spy(cache, "save_download_manifest")
+    manifest = DownloadManifest(cache, "123-456", flush_interval=3600)
+    manifest.update("file1", DownloadState.pending, size=100, checksum='"abc"')
+    manifest.update("file1", DownloadState.downloading)
+    manifest.update("file2", DownloadState.pending, size=200)
+    save.assert_not_called()
+    assert cache.get_download_manifest("123-456") == {}
+
+    manifest.flush()
+    save.assert_called_once()
+    entries = cache.get_download_manifest("123-456")
+    assert entries["file1"].state == DownloadState.downloading
+    assert entries["file1"].size == 100
+    assert entries["file1"].checksum == '"abc"'
+    assert entries["file2"].state == DownloadState.pending
+
+
+def test_updates_flushed_when_due(cache):
+    manifest = DownloadManifest(cache, "123-456", flush_interval=0)
+    manifest.update("file1", DownloadState.done, local_path="/tmp/file1")
+    assert cache.get_download_manifest("123-456")["file1"].local_path == "/tmp/file1"
+
+
+def test_manifest_reloaded(cache):
+    manifest = DownloadManifest(cache, "123-456")
+    manifest.update("file1", DownloadState.done, size=10, local_path="/tmp/file1")
+    manifest.flush()
+
+    reloaded = DownloadManifest(cache, "123-456")
+    assert reloaded.entries["file1"].state == DownloadState.done
+    assert DownloadManifest(cache, "other-transform").entries == {}
+
+
+def test_manifest_deleted_with_record(cache, transform_request):
+    cache.cache_submitted_transform(transform_request, "123-456")
+    manifest = DownloadManifest(cache, "123-456")
+    manifest.update("file1", DownloadState.pending)
+    manifest.flush()
+
+    cache.delete_record_by_request_id("123-456")
+    assert cache.get_download_manifest("123-456") == {}
+
+
+@pytest.mark.asyncio
+async def test_async_updates_written_off_the_event_loop(cache, mocker):
+    threads = []
+    save = cache.save_download_manifest
+
+    def record_thread(*args):
+        threads.append(threading.current_thread())
+        save(*args)
+
+    mocker.patch.object(cache, "save_download_manifest", side_effect=record_thread)
+    manifest = DownloadManifest(cache, "123-456", flush_interval=3600)
+    await manifest.update_async("file1", DownloadState.pending, size=100)
+    assert threads == []
+
+    await manifest.update_async("file1", DownloadState.done, local_path="/tmp/file1")
+    await manifest.flush_async()
+    assert len(threads) == 1
+    assert threads[0] is not threading.current_thread()
+    assert cache.get_download_manifest("123-456")["file1"].state == DownloadState.done
+
+
+@pytest.mark.asyncio
+async def test_failed_async_write_kept_for_next_flush(cache, mocker):
+    manifest = DownloadManifest(cache, "123-456", flush_interval=3600)
+    await manifest.update_async("file1", DownloadState.done, local_path="/tmp/file1")
+    mocker.patch.object(
+        cache, "save_download_manifest", side_effect=sqlite3.OperationalError("locked")
+    )
+    with pytest.raises(sqlite3.OperationalError):
+        await manifest.flush_async()
+
+    mocker.stopall()
+    await manifest.flush_async()
+    assert cache.get_download_manifest("123-456")["file1"].state == DownloadState.done
@@ -0,0 +1,296 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from servicex.download_scheduler import (
+    AdaptiveConcurrency,
+    ByteRateLimiter,
+    DownloadScheduler,
+    SchedulingPolicy,
+    current_scheduler,
+    set_default_max_connections,
+    shared_scheduler,
+)
+
+
+async def run_downloads(scheduler, files):
+    "Queue every (sample, size, created_at) behind one held slot, return the run order"
+    order = []
+    gate = asyncio.Event()
+
+    async def hold():
+        async with scheduler.slot("blocker"):
+            await gate.wait()
+
+    async def download(sample, size, created_at, name):
+        async with scheduler.slot(sample, size, created_at):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    blocker = asyncio.ensure_future(hold())
+    await asyncio.sleep(0)
+    tasks = [
+        asyncio.ensure_future(download(sample, size, created_at, name))
+        for name, (sample, size, created_at) in files.items()
+    ]
+    await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(blocker, *tasks)
+    return order
+
+
+@pytest.mark.asyncio
+async def test_connection_budget():
+    scheduler = DownloadScheduler(max_connections=3)
+    running = 0
+    peak = 0
+
+    async def download():
+        nonlocal running, peak
+        async with scheduler.slot("sample"):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*[download() for _ in range(10)])
+    assert peak == 3
+    assert scheduler.active == 0
+    assert scheduler.completed == {"sample": 10}
+
+
+@pytest.mark.asyncio
+async def test_samples_take_turns():
+    scheduler = DownloadScheduler(max_connections=1)
+    files = {f"a{i}": ("a", 10, None) for i in range(4)}
+    files.update({f"b{i}": ("b", 10, None) for i in range(2)})
+    order = await run_downloads(scheduler, files)
+    # "a" queued all its files first, but "b" doesn't wait for them
+    assert order == ["a0", "b0", "a1", "b1", "a2", "a3"]
+
+
+@pytest.mark.asyncio
+async def test_smallest_first():
+    scheduler = DownloadScheduler(
+        max_connections=1, policy=SchedulingPolicy.smallest_first
+    )
+    files = {"big": ("a", 1000, None), "unknown": ("a", None, None)}
+    files["small"] = ("a", 1, None)
+    order = await run_downloads(scheduler, files)
+    assert order == ["small", "big", "unknown"]
+
+
+@pytest.mark.asyncio
+async def test_oldest_first():
+    scheduler = DownloadScheduler(max_connections=1, policy="oldest_first")
+    files = {
+        "new": ("a", None, datetime(2024, 3, 1, tzinfo=timezone.utc)),
+        "old": ("a", None, datetime(2024, 1, 1, tzinfo=timezone.utc)),
+    }
+    order = await run_downloads(scheduler, files)
+    assert order == ["old", "new"]
+
+
+@pytest.mark.asyncio
+async def test_queue_depths():
+    scheduler = DownloadScheduler(max_connections=1)
+    gate = asyncio.Event()
+
+    async def download(sample):
+        async with scheduler.slot(sample):
+            await gate.wait()
+
+    tasks = [asyncio.ensure_future(download(s)) for s in ["a", "a", "a", "b"]]
+    await asyncio.sleep(0)
+    assert scheduler.active == 1
+    assert scheduler.queue_depths() == {"a": 2, "b": 1}
+    assert scheduler.queued == 3
+    assert scheduler.max_queued == 3
+
+    gate.set()
+    await asyncio.gather(*tasks)
+    assert scheduler.queue_depths() == {}
+    assert scheduler.max_queued == 3
+
+
+@pytest.mark.asyncio
+async def test_cancelled_while_queued():
+    scheduler = DownloadScheduler(max_connections=1)
+    gate = asyncio.Event()
+    ran = []
+
+    async def download(name):
+        async with scheduler.slot("a"):
+            ran.append(name)
+            await gate.wait()
+
+    first = asyncio.ensure_future(download("first"))
+    second = asyncio.ensure_future(download("second"))
+    third = asyncio.ensure_future(download("third"))
+    await asyncio.sleep(0)
+    second.cancel()
+    await asyncio.sleep(0)
+    assert scheduler.queued == 1
+
+    gate.set()
+    await asyncio.gather(first, third)
+    assert ran == ["first", "third"]
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_is_visible_inside_slot():
+    scheduler = DownloadScheduler()
+    assert current_scheduler() is None
+    async with scheduler.slot("a"):
+        assert current_scheduler() is scheduler
+    assert current_scheduler() is None
+
+
+@pytest.mark.asyncio
+async def test_transferred_applies_rate_limit(mocker):
+    scheduler = DownloadScheduler(max_bytes_per_second=1000)
+    consume = mocker.patch.object(scheduler.rate_limiter, "consume")
+    await scheduler.transferred(10)
+    consume.assert_awaited_once_with(10)
+
+
+@pytest.mark.asyncio
+async def test_byte_rate_limiter(mocker):
+    sleep = mocker.patch(
+        "servicex.download_scheduler.asyncio.sleep", new_callable=mocker.AsyncMock
+    )
+    limiter = ByteRateLimiter(1000)
+    # A full bucket covers the first second of transfer
+    await limiter.consume(1000)
+    sleep.assert_not_called()
+    await limiter.consume(500)
+    assert sleep.await_args.args[0] == pytest.approx(0.5, abs=0.01)
+
+
+def test_adaptive_increases_while_throughput_improves(mocker):
+    clock = mocker.patch("servicex.download_scheduler.time.monotonic", return_value=0)
+    adaptive = AdaptiveConcurrency(initial=2, maximum=4, interval=1)
+
+    def window(nbytes):
+        clock.return_value += 1
+        return adaptive.record_bytes(nbytes)
+
+    assert window(100)
+    assert adaptive.limit == 3
+    assert window(200)
+    assert adaptive.limit == 4
+    # Already at the maximum
+    assert not window(300)
+    assert adaptive.limit == 4
+
+    adaptive.limit = 3
+    # No better than the last window: hold
+    assert not window(300)
+    assert adaptive.limit == 3
+    # Within a window nothing changes
+    assert not adaptive.record_bytes(10_000)
+
+
+def test_adaptive_cuts_on_congestion(mocker):
+    clock = mocker.patch("servicex.download_scheduler.time.monotonic", return_value=0)
+    adaptive = AdaptiveConcurrency(initial=16, minimum=2, interval=1)
+
+    adaptive.record_congestion()
+    assert adaptive.limit == 8
+    # The other requests failing in the same burst don't cut it again
+    adaptive.record_congestion()
+    assert adaptive.limit == 8
+
+    for expected in [4, 2, 2]:
+        clock.return_value += 1
+        adaptive.record_congestion()
+        assert adaptive.limit == expected
+
+
+@pytest.mark.asyncio
+async def test_adaptive_scheduler_opens_connections(mocker):
+    clock = mocker.patch("servicex.download_scheduler.time.monotonic", return_value=0)
+    scheduler = DownloadScheduler(adaptive=AdaptiveConcurrency(initial=1, interval=1))
+    gate = asyncio.Event()
+
+    async def download():
+        async with scheduler.slot("a"):
+            await gate.wait()
+
+    tasks = [asyncio.ensure_future(download()) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert (scheduler.active, scheduler.queued) == (1, 2)
+
+    clock.return_value = 1
+    await scheduler.transferred(100)
+    # The raised limit lets a queued file start right away
+    assert scheduler.connection_limit == 2
+    await asyncio.sleep(0)
+    assert (scheduler.active, scheduler.queued) == (2, 1)
+
+    scheduler.congested()
+    assert scheduler.connection_limit == 1
+    gate.set()
+    await asyncio.gather(*tasks)
+    assert scheduler.active == 0
+
+
+def test_shared_scheduler():
+    async def get():
+        return shared_scheduler(), shared_scheduler()
+
+    first, again = asyncio.run(get())
+    assert first is again
+    # Futures can't be shared between event loops
+    assert asyncio.run(get())[0] is not first
+
+    async def budget():
+        set_default_max_connections(3)
+        try:
+            return shared_scheduler().max_connections
+        finally:
+            set_default_max_connections(10)
+
+    assert asyncio.run(budget()) == 3
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        DownloadScheduler(max_connections=0)
+    with pytest.raises(ValueError):
+        ByteRateLimiter(0)
+    with pytest.raises(ValueError):
+        DownloadScheduler(policy="largest_first")
+    with pytest.raises(ValueError):
+        AdaptiveConcurrency(initial=100, maximum=10)
+    with pytest.raises(ValueError):
+        AdaptiveConcurrency(decrease=1)
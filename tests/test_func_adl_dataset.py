@@ -85,3 +85,31 @@ def test_type_any():
     "Test the type is any if no type is given"
     datasource = FuncADLQuery()
     assert datasource.item_type == Any
+
+
+def test_canonical_selection_string():
+    query = (
+        FuncADLQuery_Uproot()
+        .FromTree("nominal")
+        .Select(lambda e: e.jets.Select(lambda j: (e.run, j.pt)))
+    )
+    renamed = (
+        FuncADLQuery_Uproot()
+        .FromTree("nominal")
+        .Select(lambda evt: evt.jets.Select(lambda jet: (evt.run, jet.pt)))
+    )
+    assert query.generate_selection_string() != renamed.generate_selection_string()
+    assert query.canonical_selection_string() == renamed.canonical_selection_string()
+
+    spaced = FuncADLQuery_Uproot()
+    spaced.set_provided_qastle(
+        "(call  Select (call EventDataset 'bogus.root' 'nominal')\n"
+        "  (lambda (list x) (call (attr (attr x 'jets') 'Select')"
+        " (lambda (list y) (list (attr x 'run') (attr y 'pt'))))))"
+    )
+    assert spaced.canonical_selection_string() == query.canonical_selection_string()
+
+    # Qastle that doesn't parse is left as it is
+    broken = FuncADLQuery_Uproot()
+    broken.set_provided_qastle("(call Select")
+    assert broken.canonical_selection_string() == "(call Select"
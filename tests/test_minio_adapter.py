@@ -25,30 +25,24 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import time
 import urllib.parse
+from contextlib import asynccontextmanager
 
 import pytest
+from botocore.exceptions import ClientError
 from pytest_asyncio import fixture
 
-from servicex.minio_adapter import MinioAdapter
+from servicex import minio_adapter as minio_adapter_module
+from servicex.blob_store import BlobStore
+from servicex.download_scheduler import AdaptiveConcurrency, DownloadScheduler
+from servicex.minio_adapter import MinioAdapter, init_s3_config, shared_s3_clients
 from servicex.models import ResultFile
-from pathlib import Path
-
-DOWNLOAD_PATCH_COUNTER = 0
-
-
-def make_mock_downloader(target: Path):
-    def mock_downloader(**args):
-        global DOWNLOAD_PATCH_COUNTER
-        DOWNLOAD_PATCH_COUNTER += 1
-        if DOWNLOAD_PATCH_COUNTER == 1:
-            raise Exception("lol")
-        elif DOWNLOAD_PATCH_COUNTER == 2:
-            open(target, "wb").write(b"\x01" * 5)
-        elif DOWNLOAD_PATCH_COUNTER == 3:
-            open(target, "wb").write(b"\x01" * 10)
-
-    return mock_downloader
 
 
 @fixture
@@ -91,11 +85,38 @@ async def test_initialize_from_status(completed_status):
 @pytest.mark.parametrize("populate_bucket", ["test.txt"], indirect=True)
 @pytest.mark.asyncio
 async def test_list_bucket(minio_adapter, populate_bucket):
-    files = [ResultFile(filename="test.txt", size=10, extension="txt")]
+    etag = '"' + hashlib.md5(b"\x01" * 10).hexdigest() + '"'
+    files = [ResultFile(filename="test.txt", size=10, extension="txt", etag=etag)]
     result = await minio_adapter.list_bucket()
     assert result == files
 
 
+@pytest.mark.asyncio
+async def test_list_bucket_start_after(minio_adapter):
+    adapter = MinioAdapter(
+        minio_adapter.endpoint_host.split("://")[1],
+        False,
+        "access_key",
+        "secret_key",
+        "listing",
+    )
+    async with adapter.minio.client("s3", endpoint_url=adapter.endpoint_host) as s3:
+        await s3.create_bucket(Bucket="listing")
+        for key in ["b.txt", "a.txt", "c.txt", "dir/"]:
+            await s3.put_object(Bucket="listing", Key=key, Body=b"")
+
+    assert [f.filename for f in await adapter.list_bucket()] == [
+        "a.txt",
+        "b.txt",
+        "c.txt",
+    ]
+    assert [f.filename async for f in adapter.iter_bucket(start_after="a.txt")] == [
+        "b.txt",
+        "c.txt",
+    ]
+    assert await adapter.list_bucket(start_after="c.txt") == []
+
+
 @pytest.mark.parametrize("populate_bucket", ["test.txt"], indirect=True)
 @pytest.mark.asyncio
 async def test_download_file(minio_adapter, populate_bucket, tmp_path):
@@ -198,13 +219,309 @@ async def test_get_signed_url(minio_adapter, moto_services, populate_bucket):
 
 @pytest.mark.parametrize("populate_bucket", ["test.txt"], indirect=True)
 @pytest.mark.asyncio
-async def test_download_file_retry(minio_adapter, populate_bucket, mocker, tmp_path):
-    download_patch = mocker.patch(
-        "aioboto3.s3.inject.download_file",
-        side_effect=make_mock_downloader(tmp_path / "test.txt"),
+async def test_download_file_rate_limited(
+    minio_adapter, populate_bucket, mocker, tmp_path
+):
+    scheduler = DownloadScheduler(max_bytes_per_second=1000)
+    consume = mocker.patch.object(scheduler.rate_limiter, "consume")
+    async with scheduler.slot("sample"):
+        result = await minio_adapter.download_file("test.txt", local_dir=tmp_path)
+
+    assert result.read_bytes() == (b"\x01" * 10)
+    assert sum(call.args[0] for call in consume.await_args_list) == 10
+
+
+@pytest.mark.asyncio
+async def test_throttled_range_reports_congestion(minio_adapter, mocker, tmp_path):
+    adaptive = AdaptiveConcurrency(initial=8)
+    scheduler = DownloadScheduler(adaptive=adaptive)
+    s3 = mocker.Mock()
+    s3.get_object = mocker.AsyncMock(
+        side_effect=ClientError({"Error": {"Code": "SlowDown"}}, "GetObject")
+    )
+
+    with open(tmp_path / "out", "wb") as f:
+        async with scheduler.slot("sample"):
+            with pytest.raises(ClientError):
+                await minio_adapter._get_range(s3, "test.txt", f, 0, 10, None)
+
+    assert adaptive.limit == 4
+
+
+def test_is_congestion():
+    assert minio_adapter_module._is_congestion(
+        ClientError({"Error": {"Code": "SlowDown"}}, "GetObject")
+    )
+    assert minio_adapter_module._is_congestion(
+        ClientError({"ResponseMetadata": {"HTTPStatusCode": 503}}, "GetObject")
+    )
+    assert minio_adapter_module._is_congestion(asyncio.TimeoutError())
+    assert not minio_adapter_module._is_congestion(
+        ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+    )
+    assert not minio_adapter_module._is_congestion(ValueError())
+
+
+def test_streams_for_size():
+    chunk = minio_adapter_module._transferconfig.multipart_chunksize
+    streams = minio_adapter_module._streams_for_size
+    assert streams(0) == 1
+    assert streams(4 * chunk) == 1
+    assert streams(4 * chunk + 1) == 2
+    assert streams(1000 * chunk) == minio_adapter_module._transferconfig.max_concurrency
+
+
+@pytest.mark.parametrize("populate_bucket", ["test.txt"], indirect=True)
+@pytest.mark.asyncio
+async def test_download_size_based_streams(
+    minio_adapter, populate_bucket, mocker, tmp_path
+):
+    mocker.patch.object(minio_adapter_module._transferconfig, "multipart_chunksize", 1)
+    semaphore = mocker.spy(minio_adapter_module.asyncio, "Semaphore")
+    async with DownloadScheduler(size_based_streams=True).slot("sample"):
+        result = await minio_adapter.download_file("test.txt", local_dir=tmp_path)
+
+    assert result.read_bytes() == (b"\x01" * 10)
+    # Ten one-byte chunks: three streams rather than the TransferConfig maximum
+    semaphore.assert_called_with(3)
+
+
+@pytest.mark.asyncio
+async def test_get_signed_urls(minio_adapter, moto_services, mocker):
+    client = mocker.spy(minio_adapter.minio, "client")
+    result = await minio_adapter.get_signed_urls(["a.txt", "b/c.txt"], expires_in=600)
+
+    assert [urllib.parse.urlparse(url).path for url in result] == [
+        "/bucket/a.txt",
+        "/bucket/b/c.txt",
+    ]
+    for url in result:
+        expires = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)["Expires"]
+        assert int(expires[0]) == pytest.approx(time.time() + 600, abs=60)
+    # One client signs the whole batch
+    assert client.call_count == 1
+
+
+@pytest.mark.parametrize("populate_bucket", ["test.txt"], indirect=True)
+@pytest.mark.asyncio
+async def test_download_deduplicated(minio_adapter, populate_bucket, mocker, tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    minio_adapter.blob_store = store
+    first = await minio_adapter.download_file(
+        "test.txt", local_dir=tmp_path / "request1", expected_size=10
     )
+    assert first.read_bytes() == (b"\x01" * 10)
+
+    # The same object under another transform is linked, not fetched again
+    get_range = mocker.patch.object(MinioAdapter, "_get_range")
+    second = await minio_adapter.download_file(
+        "test.txt", local_dir=tmp_path / "request2", expected_size=10
+    )
+    get_range.assert_not_called()
+    assert os.path.samefile(first, second)
+    assert len(list(store.root.glob("*/*"))) == 1
+
+
+@pytest.mark.asyncio
+async def test_download_deduplicated_by_checksum(minio_adapter, mocker, tmp_path):
+    content = b"\x01" * 10
+    digest = hashlib.sha256(content).digest()
+    store = BlobStore(tmp_path / "blobs")
+    minio_adapter.blob_store = store
+    blob = store.path("sha256-" + digest.hex())
+    blob.parent.mkdir(parents=True)
+    blob.write_bytes(content)
+
+    s3 = mocker.MagicMock()
+    s3.head_object = mocker.AsyncMock(
+        return_value={
+            "ContentLength": 10,
+            "ETag": '"not-the-blob-etag"',
+            "ChecksumSHA256": base64.b64encode(digest).decode(),
+        }
+    )
+
+    @asynccontextmanager
+    async def s3_client():
+        yield s3
+
+    mocker.patch.object(minio_adapter, "_s3_client", s3_client)
+    result = await minio_adapter.download_file(
+        "test.txt", local_dir=tmp_path / "request", expected_size=10
+    )
+    s3.head_object.assert_awaited_once_with(
+        Bucket="bucket", Key="test.txt", ChecksumMode="ENABLED"
+    )
+    assert os.path.samefile(result, blob)
+
+
+@pytest.mark.parametrize("populate_bucket", ["test.txt"], indirect=True)
+@pytest.mark.asyncio
+async def test_download_file_retry(minio_adapter, populate_bucket, mocker, tmp_path):
+    mocker.patch.object(minio_adapter_module._transferconfig, "multipart_chunksize", 4)
+    get_range = MinioAdapter._get_range
+    starts = []
+
+    async def flaky_get_range(self, s3, object_name, f, start, end, etag):
+        starts.append(start)
+        if start == 4 and starts.count(4) == 1:
+            raise Exception("lol")
+        return await get_range(self, s3, object_name, f, start, end, etag)
+
+    mocker.patch.object(MinioAdapter, "_get_range", flaky_get_range)
     result = await minio_adapter.download_file("test.txt", local_dir=tmp_path)
     assert str(result).endswith("test.txt")
-    assert result.exists()
-    assert download_patch.call_count == 3
+    assert result.read_bytes() == (b"\x01" * 10)
+
+    # The retry resumed after the first, verified, range
+    assert starts[0] == 0
+    assert sorted(starts[1:]) == [4, 4, 8, 8]
+    assert not (tmp_path / "test.txt.part").exists()
+    assert not (tmp_path / "test.txt.part.json").exists()
     result.unlink()
+
+
+async def _etag(minio_adapter, key):
+    async with minio_adapter.minio.client(
+        "s3", endpoint_url=minio_adapter.endpoint_host
+    ) as s3:
+        return (await s3.head_object(Bucket=minio_adapter.bucket, Key=key))["ETag"]
+
+
+@pytest.mark.parametrize("populate_bucket", ["test.txt"], indirect=True)
+@pytest.mark.asyncio
+async def test_download_resumes_part_file(minio_adapter, populate_bucket, tmp_path):
+    # Left behind by a killed process: 7 bytes on disk, only 6 of them verified
+    (tmp_path / "test.txt.part").write_bytes(b"\x02" * 7)
+    (tmp_path / "test.txt.part.json").write_text(
+        json.dumps({"offset": 6, "etag": await _etag(minio_adapter, "test.txt")})
+    )
+
+    result = await minio_adapter.download_file("test.txt", local_dir=tmp_path)
+    assert result.read_bytes() == b"\x02" * 6 + b"\x01" * 4
+    assert not (tmp_path / "test.txt.part").exists()
+    assert not (tmp_path / "test.txt.part.json").exists()
+
+
+@pytest.mark.parametrize("populate_bucket", ["test.txt"], indirect=True)
+@pytest.mark.asyncio
+async def test_download_part_file_changed_object(
+    minio_adapter, populate_bucket, tmp_path
+):
+    (tmp_path / "test.txt.part").write_bytes(b"\x02" * 6)
+    (tmp_path / "test.txt.part.json").write_text(
+        json.dumps({"offset": 6, "etag": '"not-the-current-etag"'})
+    )
+
+    result = await minio_adapter.download_file("test.txt", local_dir=tmp_path)
+    assert result.read_bytes() == b"\x01" * 10
+
+
+@pytest.mark.parametrize("populate_bucket", ["test.txt"], indirect=True)
+@pytest.mark.asyncio
+async def test_download_part_file_without_sidecar(
+    minio_adapter, populate_bucket, tmp_path
+):
+    (tmp_path / "test.txt.part").write_bytes(b"\x02" * 6)
+
+    result = await minio_adapter.download_file("test.txt", local_dir=tmp_path)
+    assert result.read_bytes() == b"\x01" * 10
+
+
+@pytest.mark.parametrize("populate_bucket", ["test.txt"], indirect=True)
+@pytest.mark.asyncio
+async def test_shared_client_reused(minio_adapter, populate_bucket, tmp_path):
+    async with shared_s3_clients() as pool:
+        await minio_adapter.list_bucket()
+        await minio_adapter.download_file("test.txt", local_dir=tmp_path)
+        await minio_adapter.get_signed_url("test.txt")
+
+        # A second adapter on the same endpoint with the same credentials shares it
+        second = MinioAdapter(
+            minio_adapter.endpoint_host.split("://")[1],
+            False,
+            "access_key",
+            "secret_key",
+            "bucket",
+        )
+        await second.list_bucket()
+        assert pool.clients_created == 1
+
+        # Different credentials get their own client
+        other = MinioAdapter(
+            minio_adapter.endpoint_host.split("://")[1],
+            False,
+            "other_key",
+            "secret_key",
+            "bucket",
+        )
+        await other.get_signed_url("test.txt")
+        assert pool.clients_created == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_clients_nested_scope(minio_adapter):
+    async with shared_s3_clients() as outer:
+        async with shared_s3_clients() as inner:
+            assert inner is outer
+        # Still open for the outer scope
+        assert await outer.get_client(
+            minio_adapter.minio, minio_adapter.endpoint_host, minio_adapter._pool_key
+        )
+        assert outer.clients_created == 1
+    assert outer._clients == {}
+
+    async with shared_s3_clients() as fresh:
+        assert fresh is not outer
+
+
+def test_init_s3_config_pool_size():
+    import servicex.minio_adapter as ma
+
+    init_s3_config(concurrency=4)
+    assert ma._max_pool_connections == 20
+    init_s3_config(concurrency=4, pool_size=7)
+    assert ma._max_pool_connections == 7
+    init_s3_config()
+
+
+def test_init_s3_config_scheduler_default():
+    init_s3_config(concurrency=4)
+    assert DownloadScheduler().max_connections == 4
+    init_s3_config()
+    assert DownloadScheduler().max_connections == 10
+
+
+@pytest.mark.asyncio
+async def test_download_file_without_slot_bounded(minio_adapter, mocker, tmp_path):
+    init_s3_config(concurrency=2)
+    active = []
+    most = 0
+
+    async def download(*args):
+        nonlocal most
+        active.append(args[0])
+        most = max(most, len(active))
+        await asyncio.sleep(0.01)
+        active.remove(args[0])
+        return tmp_path / args[0]
+
+    mocker.patch.object(minio_adapter, "_download_file", side_effect=download)
+    try:
+        await asyncio.gather(
+            *(minio_adapter.download_file(f"f{i}", tmp_path) for i in range(6))
+        )
+        assert most == 2
+
+        # A caller holding a slot is not held up a second time
+        most = 0
+        scheduler = DownloadScheduler(max_connections=6)
+
+        async def in_slot(name):
+            async with scheduler.slot("sample"):
+                return await minio_adapter.download_file(name, tmp_path)
+
+        await asyncio.gather(*(in_slot(f"f{i}") for i in range(6)))
+        assert most == 6
+    finally:
+        init_s3_config()
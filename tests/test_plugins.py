@@ -0,0 +1,192 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from servicex import plugins
+from servicex.plugins import DATASET_GROUP, QUERY_GROUP
+
+
+@pytest.fixture
+def registry_path(tmp_path):
+    path = tmp_path / "plugins.json"
+    plugins._registry.cache_clear()
+    plugins._declared_tags.cache_clear()
+    with patch("servicex.plugins._registry_path", return_value=path):
+        yield path
+    plugins._registry.cache_clear()
+    plugins._declared_tags.cache_clear()
+
+
+def test_plugins_discovered_once(registry_path):
+    with patch("servicex.plugins.entry_points", wraps=plugins.entry_points) as ep:
+        assert "UprootRaw" in plugins.plugins(QUERY_GROUP)
+        assert "Rucio" in plugins.plugins(DATASET_GROUP)
+        plugins.plugins(QUERY_GROUP)
+        assert ep.call_count == 2  # One scan for each group
+
+
+def test_yaml_tags(registry_path):
+    tags = plugins.yaml_tags()
+    assert tags["!FuncADL_Uproot"].name == "FuncADL_Uproot"
+    assert tags["!UprootRaw"].group == QUERY_GROUP
+    assert tags["!Rucio"].group == DATASET_GROUP
+
+
+def test_yaml_tags_found_without_loading_plugins(registry_path):
+    with patch.object(plugins.EntryPoint, "load", side_effect=AssertionError):
+        assert "!TopCP" in plugins.yaml_tags()
+
+
+def test_query_registry_read_when_used(monkeypatch):
+    import servicex
+
+    monkeypatch.delitem(sys.modules, "servicex.query", raising=False)
+    monkeypatch.delattr(servicex, "query", raising=False)
+    with patch("servicex.plugins._registry", side_effect=AssertionError):
+        import servicex.query as query
+    assert "UprootRaw" in query.__all__
+    assert query.UprootRaw.yaml_tag == "!UprootRaw"
+
+
+def test_registry_saved_and_reused(registry_path):
+    tags = plugins.yaml_tags()
+    assert registry_path.exists()
+
+    plugins._registry.cache_clear()
+    with patch("servicex.plugins.entry_points", side_effect=AssertionError):
+        assert plugins.yaml_tags() == tags
+
+
+def test_registry_rescanned_when_environment_changes(registry_path):
+    plugins.yaml_tags()
+
+    plugins._registry.cache_clear()
+    with (
+        patch("servicex.plugins.environment_fingerprint", return_value="changed"),
+        patch("servicex.plugins.entry_points", wraps=plugins.entry_points) as ep,
+    ):
+        plugins.yaml_tags()
+        assert ep.call_count == 2
+
+
+def test_environment_fingerprint(tmp_path, monkeypatch):
+    site_packages = tmp_path / "site-packages"
+    site_packages.mkdir()
+    monkeypatch.setattr("sys.path", ["", str(site_packages)])
+    monkeypatch.chdir(tmp_path)
+    before = plugins.environment_fingerprint()
+
+    # Unrelated files, and anything in the working directory, don't count
+    (site_packages / "module.py").write_text("")
+    (tmp_path / "notes.txt").write_text("")
+    (tmp_path / "local-1.0.dist-info").mkdir()
+    assert plugins.environment_fingerprint() == before
+
+    (site_packages / "plugin-1.0.dist-info").mkdir()
+    installed = plugins.environment_fingerprint()
+    assert installed != before
+
+    (site_packages / "plugin-1.0.dist-info").rename(
+        site_packages / "plugin-2.0.dist-info"
+    )
+    assert plugins.environment_fingerprint() not in (before, installed)
+
+
+def test_corrupt_registry_rescanned(registry_path):
+    registry_path.write_text("not json")
+    assert "!UprootRaw" in plugins.yaml_tags()
+    assert "!UprootRaw" in registry_path.read_text()
+
+
+def test_broken_plugin_fails_only_when_used(registry_path):
+    from servicex.yaml_parser import YAML
+
+    broken = plugins.EntryPoint("Broken", "servicex_no_such_module:Broken", QUERY_GROUP)
+    scan = plugins.entry_points
+
+    def entry_points(group):
+        found = list(scan(group=group))
+        return found + [broken] if group == QUERY_GROUP else found
+
+    with patch("servicex.plugins.entry_points", side_effect=entry_points):
+        assert plugins.yaml_tags()["!Broken"] == broken
+
+    yaml = YAML()
+    plugins.register_yaml_tags(yaml)
+    assert yaml.load('Query: !UprootRaw \'[{"treename": "nominal"}]\'')["Query"]
+    with pytest.raises(ModuleNotFoundError):
+        yaml.load("Query: !Broken 'x'")
+
+
+def test_plugin_loaded_only_when_tag_used(registry_path):
+    from servicex.yaml_parser import YAML
+
+    plugins.yaml_tags()
+    loaded = []
+    load = plugins.EntryPoint.load
+
+    def record_load(self):
+        loaded.append(self.name)
+        return load(self)
+
+    yaml = YAML()
+    plugins.register_yaml_tags(yaml)
+    with patch.object(plugins.EntryPoint, "load", record_load):
+        yaml.load('Query: !UprootRaw \'[{"treename": "nominal"}]\'')
+    assert loaded == ["UprootRaw"]
+
+
+class _OtherTag:
+    yaml_tag = "!Other"
+
+    @classmethod
+    def from_yaml(cls, constructor, node):
+        return node.value
+
+
+def test_plugin_with_other_tag_loaded_when_tag_met(registry_path):
+    from servicex.yaml_parser import YAML
+
+    other = plugins.EntryPoint("Named", f"{__name__}:_OtherTag", QUERY_GROUP)
+    scan = plugins.entry_points
+
+    def entry_points(group):
+        found = list(scan(group=group))
+        return found + [other] if group == QUERY_GROUP else found
+
+    with patch("servicex.plugins.entry_points", side_effect=entry_points):
+        plugins.yaml_tags()
+
+    yaml = YAML()
+    plugins.register_yaml_tags(yaml)
+    assert yaml.load("Query: !Other 'x'")["Query"] == "x"
+    with pytest.raises(Exception, match="could not determine a constructor"):
+        yaml.load("Query: !Unknown 'x'")
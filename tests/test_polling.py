@@ -0,0 +1,77 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import pytest
+
+from servicex.models import Status
+from servicex.polling import AdaptivePolling, FixedPolling, status_changed
+
+
+def test_fixed_polling():
+    polling = FixedPolling(3)
+    assert polling.next_interval(None, True) == 3
+    assert polling.next_interval(3, False) == 3
+
+
+def test_adaptive_polling_backs_off():
+    polling = AdaptivePolling(min_interval=1, max_interval=10, backoff=2)
+    intervals = []
+    interval = None
+    for changed in [True, False, False, False, False, False, True, False]:
+        interval = polling.next_interval(interval, changed)
+        intervals.append(interval)
+    assert intervals == [1, 2, 4, 8, 10, 10, 1, 2]
+
+
+def test_adaptive_polling_starts_fast():
+    polling = AdaptivePolling(min_interval=0.5)
+    assert polling.next_interval(None, False) == 0.5
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"min_interval": 0},
+        {"min_interval": 5, "max_interval": 1},
+        {"backoff": 0.5},
+    ],
+)
+def test_adaptive_polling_bad_arguments(kwargs):
+    with pytest.raises(ValueError):
+        AdaptivePolling(**kwargs)
+
+
+def test_status_changed(completed_status):
+    assert status_changed(None, completed_status)
+    assert not status_changed(completed_status, completed_status.model_copy())
+    assert status_changed(
+        completed_status, completed_status.model_copy(update={"files_completed": 1})
+    )
+    assert status_changed(
+        completed_status,
+        completed_status.model_copy(update={"status": Status.complete}),
+    )
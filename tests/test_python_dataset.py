@@ -25,6 +25,7 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import inspect
 from base64 import b64decode
 
 import pytest
@@ -66,3 +67,36 @@ def test_function_as_string():
     print(selection)
     print("==============")
     print(b64decode(selection))
+
+
+def test_selection_string_remembered(mocker):
+    def run_query(input_filenames=None):
+        return []
+
+    getsource = mocker.patch(
+        "servicex.python_dataset.inspect.getsource", wraps=inspect.getsource
+    )
+    datasource = PythonFunction(run_query)
+    selection = datasource.generate_selection_string()
+    assert datasource.generate_selection_string() == selection
+    assert getsource.call_count == 1
+
+    # Changing the function gives a new selection string
+    datasource.with_uproot_function("def run_query(input_filenames=None): pass")
+    assert datasource.generate_selection_string() != selection
+
+
+def test_canonical_selection_string():
+    spaced = PythonFunction("""
+        def run_query(input_filenames=None):
+            # Say hello
+            print( 'Greetings from your query' )
+
+            return []
+    """)
+    compact = PythonFunction(
+        'def run_query(input_filenames=None):\n  print("Greetings from your query")\n'
+        "  return []\n"
+    )
+    assert spaced.generate_selection_string() != compact.generate_selection_string()
+    assert spaced.canonical_selection_string() == compact.canonical_selection_string()
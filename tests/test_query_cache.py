@@ -26,13 +26,26 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 import os
+import shutil
+import sqlite3
 import tempfile
+import threading
+import time
 import json
+from datetime import datetime, timezone
+from pathlib import Path
+
 import pytest
 
 from servicex.configuration import Configuration
-from servicex.models import ResultFormat
-from servicex.query_cache import QueryCache, CacheException
+from servicex.models import (
+    ResultDestination,
+    ResultFormat,
+    ServiceXInfo,
+    TransformRequest,
+    TransformedResults,
+)
+from servicex.query_cache import QueryCache, CacheException, measure_transforms
 
 file_uris = ["/tmp/foo1.root", "/tmp/foo2.root"]
 
@@ -74,6 +87,49 @@ def test_hash(transform_request):
     assert request1.compute_hash() != request2.compute_hash()
 
 
+def test_hash_canonical_selection(transform_request):
+    request1 = transform_request.model_copy()
+    request2 = transform_request.model_copy()
+    request2.selection = "(call  EventDataset)"
+    assert request1.compute_hash() != request2.compute_hash()
+
+    request1.set_canonical_selection(transform_request.selection)
+    request2.set_canonical_selection(transform_request.selection)
+    assert request1.compute_hash() == request2.compute_hash()
+    # The hashes from before canonical selections are kept, to find old records
+    assert request1.legacy_hashes() == [transform_request.compute_hash()]
+    assert request1.legacy_hashes() != request2.legacy_hashes()
+
+    # Without a canonical form the hash is the one from before
+    assert transform_request.legacy_hashes() == []
+
+    # Setting the selection forgets its canonical form
+    request2.selection = "(call  EventDataset)"
+    assert request1.compute_hash() != request2.compute_hash()
+
+
+def test_adopt_legacy_hash(tmp_path, transform_request, completed_status):
+    cache = QueryCache(Configuration(cache_path=str(tmp_path), api_endpoints=[]))
+    transform_request.set_canonical_selection("(call EventDataset)")
+    legacy_hash = transform_request.legacy_hashes()[0]
+    record = cache.transformed_results(
+        transform_request, completed_status, "/foo/bar", file_uris, []
+    )
+    cache.cache_transform(record.model_copy(update={"hash": legacy_hash}))
+
+    current_hash = transform_request.compute_hash()
+    assert cache.get_transform_by_hash(current_hash) is None
+    assert cache.adopt_legacy_hash(current_hash, [legacy_hash])
+    assert cache.get_transform_by_hash(current_hash).file_list == file_uris
+    assert not cache.contains_hash(legacy_hash)
+
+    # Records under the current hash win over older ones
+    cache.cache_transform(record.model_copy(update={"hash": legacy_hash}))
+    assert not cache.adopt_legacy_hash(current_hash, [legacy_hash])
+    assert cache.contains_hash(legacy_hash)
+    cache.close()
+
+
 def test_cache_transform(transform_request, completed_status):
     with tempfile.TemporaryDirectory() as temp_dir:
         config = Configuration(cache_path=temp_dir, api_endpoints=[])  # type: ignore
@@ -129,7 +185,7 @@ def test_cache_transform(transform_request, completed_status):
         )
         record["hash"] = transform_request.compute_hash()
         record["status"] = "COMPLETE"
-        cache.db.insert(record)
+        cache._insert(record)
 
         with pytest.raises(CacheException):
             cache.get_transform_by_hash(transform_request.compute_hash())
@@ -302,3 +358,391 @@ def test_cache_queries_in_state(transform_request):
         )
 
         cache.close()
+
+
+def test_file_lists_stored_in_order(transform_request, completed_status):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = Configuration(cache_path=temp_dir, api_endpoints=[])  # type: ignore
+        cache = QueryCache(config)
+        files = [f"/tmp/foo{i}.root" for i in range(12)]
+        cache.cache_transform(
+            cache.transformed_results(
+                transform=transform_request,
+                completed_status=completed_status,
+                data_dir="/foo/bar",
+                file_list=files,
+                signed_urls=[],
+            )
+        )
+        assert cache.get_transform_by_hash(
+            transform_request.compute_hash()
+        ).file_list == (files)
+        (count,) = cache.db.execute("SELECT COUNT(*) FROM transform_files").fetchone()
+        assert count == 12
+
+        # Replacing the record replaces its file list
+        cache.cache_transform(
+            cache.transformed_results(
+                transform=transform_request,
+                completed_status=completed_status,
+                data_dir="/foo/bar",
+                file_list=files[:2],
+                signed_urls=["https://minio/foo0.root"],
+            )
+        )
+        record = cache.get_transform_by_hash(transform_request.compute_hash())
+        assert record.file_list == files[:2]
+        assert record.signed_url_list == ["https://minio/foo0.root"]
+
+        cache.delete_record_by_hash(transform_request.compute_hash())
+        (count,) = cache.db.execute("SELECT COUNT(*) FROM transform_files").fetchone()
+        assert count == 0
+        cache.close()
+
+
+def test_cache_uses_wal(transform_request):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = Configuration(cache_path=temp_dir, api_endpoints=[])  # type: ignore
+        cache = QueryCache(config)
+        (mode,) = cache.db.execute("PRAGMA journal_mode").fetchone()
+        assert mode == "wal"
+
+        # A second connection sees the first one's writes
+        cache.cache_submitted_transform(transform_request, "123456")
+        other = QueryCache(config)
+        assert other.is_transform_request_submitted(transform_request.compute_hash())
+        other.close()
+        cache.close()
+
+
+def test_blob_store(tmp_path):
+    config = Configuration(cache_path=str(tmp_path), api_endpoints=[])
+    cache = QueryCache(config)
+    assert cache.blob_store() is None
+
+    config.deduplicate_downloads = True
+    assert cache.blob_store().root == tmp_path / ".blobs"
+    cache.close()
+
+
+def test_migrate_tinydb_cache(transform_request, completed_status):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        completed = json.loads(
+            TransformedResults(
+                hash=transform_request.compute_hash(),
+                title="Test submission",
+                codegen="uproot",
+                request_id=completed_status.request_id,
+                submit_time=completed_status.submit_time,
+                data_dir="/foo/bar",
+                file_list=file_uris,
+                signed_url_list=[],
+                files=2,
+                result_format=ResultFormat.parquet,
+            ).model_dump_json()
+        )
+        completed["status"] = "COMPLETE"
+        submitted = {
+            "hash": "submitted-hash",
+            "title": "Submitted",
+            "codegen": "uproot",
+            "result_format": "parquet",
+            "request_id": "123456",
+            "status": "SUBMITTED",
+            "submit_time": "2023-05-25T20:05:05.564137Z",
+        }
+        os.makedirs(os.path.join(temp_dir, ".servicex"))
+        legacy_db = os.path.join(temp_dir, ".servicex", "db.json")
+        with open(legacy_db, "w") as f:
+            json.dump({"_default": {"1": completed, "2": submitted}}, f)
+
+        config = Configuration(cache_path=temp_dir, api_endpoints=[])  # type: ignore
+        cache = QueryCache(config)
+        assert not os.path.exists(legacy_db)
+        assert os.path.exists(legacy_db + ".migrated")
+
+        record = cache.get_transform_by_hash(transform_request.compute_hash())
+        assert record.request_id == "b8c508d0-ccf2-4deb-a1f7-65c839eebabf"
+        assert record.file_list == file_uris
+        assert cache.is_transform_request_submitted("submitted-hash")
+        assert len(cache.queries_in_state("SUBMITTED")) == 1
+        cache.close()
+
+        # Opening the cache again doesn't migrate a second time
+        cache = QueryCache(config)
+        assert len(cache.cached_queries()) == 1
+        cache.close()
+
+
+def _cached_transform(cache, tmp_path, name, size, last_access):
+    data_dir = tmp_path / name
+    data_dir.mkdir()
+    data_file = data_dir / "out.parquet"
+    data_file.write_bytes(b"x" * size)
+    record = TransformedResults(
+        hash=f"hash-{name}",
+        title=name,
+        codegen="uproot",
+        request_id=name,
+        submit_time=datetime.now(timezone.utc),
+        data_dir=str(data_dir),
+        file_list=[str(data_file)],
+        signed_url_list=[],
+        files=1,
+        result_format=ResultFormat.parquet,
+    )
+    cache.cache_transform(record)
+    cache.db.execute(
+        "UPDATE transforms SET last_access = ? WHERE request_id = ?",
+        (last_access, name),
+    )
+    return record
+
+
+def test_cache_hit_records_access(tmp_path, mocker):
+    config = Configuration(cache_path=str(tmp_path), api_endpoints=[])
+    cache = QueryCache(config)
+    _cached_transform(cache, tmp_path, "a", 10, 100.0)
+
+    mocker.patch("servicex.query_cache.time.time", return_value=5000.0)
+    assert cache.get_transform_by_hash("hash-a")
+    (last_access,) = cache.db.execute("SELECT last_access FROM transforms").fetchone()
+    assert last_access == 5000.0
+    cache.close()
+
+
+def test_total_sizes(tmp_path):
+    config = Configuration(cache_path=str(tmp_path), api_endpoints=[])
+    cache = QueryCache(config)
+    a = _cached_transform(cache, tmp_path, "a", 10, 100.0)
+    _cached_transform(cache, tmp_path, "b", 20, 100.0)
+
+    # Without the file lists
+    records = cache.cached_queries(with_files=False)
+    assert [r.file_list for r in records] == [[], []]
+    assert [r.total_size for r in records] == [None, None]
+
+    a.file_list.append(str(tmp_path / "missing.parquet"))
+    assert measure_transforms([a]) == {"hash-a": 10}
+    sizes = measure_transforms(cache.cached_queries())
+    assert sizes == {"hash-a": 10, "hash-b": 20}
+
+    cache.save_total_sizes(sizes)
+    records = cache.cached_queries(with_files=False)
+    assert [r.total_size for r in records] == [10, 20]
+    assert cache.get_transform_by_hash("hash-a").file_list == a.file_list[:1]
+    cache.close()
+
+
+def test_get_transforms_by_hash(tmp_path, mocker):
+    config = Configuration(cache_path=str(tmp_path), api_endpoints=[])
+    cache = QueryCache(config)
+    for name, last_access in [("a", 1.0), ("b", 2.0), ("c", 3.0)]:
+        _cached_transform(cache, tmp_path, name, 10, last_access)
+    mocker.patch("servicex.query_cache._HASHES_PER_QUERY", 1)
+
+    records = cache.get_transforms_by_hash(["hash-c", "hash-a", "hash-x"])
+    assert [r.request_id for r in records] == ["a", "c"]
+    assert [len(r.file_list) for r in records] == [1, 1]
+    assert cache.get_transforms_by_hash([]) == []
+    # Not a use of the transforms
+    assert [
+        row[0]
+        for row in cache.db.execute("SELECT last_access FROM transforms ORDER BY id")
+    ] == [1.0, 2.0, 3.0]
+    cache.close()
+
+
+def test_collect_garbage_uses_recorded_sizes(tmp_path):
+    config = Configuration(cache_path=str(tmp_path), api_endpoints=[])
+    cache = QueryCache(config)
+    _cached_transform(cache, tmp_path, "old", 100, 1.0)
+    _cached_transform(cache, tmp_path, "new", 100, 2.0)
+    cache.save_total_sizes({"hash-old": 10})
+
+    assert cache.collect_garbage(max_size=150) == []
+    cache.close()
+
+
+def test_collect_garbage_lru(tmp_path):
+    config = Configuration(cache_path=str(tmp_path), api_endpoints=[])
+    cache = QueryCache(config)
+    _cached_transform(cache, tmp_path, "old", 100, 1.0)
+    _cached_transform(cache, tmp_path, "used", 100, 3.0)
+    _cached_transform(cache, tmp_path, "new", 100, 2.0)
+    cache.cache_submitted_transform(
+        TransformRequest(
+            title="pending",
+            did="rucio://foo.bar",
+            selection="(call EventDataset)",
+            codegen="uproot",
+            result_destination=ResultDestination.object_store,
+            result_format=ResultFormat.parquet,
+        ),
+        "pending",
+    )
+
+    evicted = cache.collect_garbage(max_size=150)
+
+    assert [r.request_id for r in evicted] == ["old", "new"]
+    assert [r.request_id for r in cache.cached_queries()] == ["used"]
+    assert len(cache.queries_in_state("SUBMITTED")) == 1
+    assert not (tmp_path / "old").exists()
+    assert not (tmp_path / "new").exists()
+    assert (tmp_path / "used" / "out.parquet").exists()
+    assert not any((tmp_path / ".servicex" / "trash").iterdir())
+
+    # Within budget: nothing to do
+    assert cache.collect_garbage(max_size=150) == []
+    cache.close()
+
+
+def test_collect_garbage_empties_trash(tmp_path, mocker):
+    config = Configuration(cache_path=str(tmp_path), api_endpoints=[])
+    cache = QueryCache(config)
+    _cached_transform(cache, tmp_path, "a", 100, 1.0)
+    # Left behind by a collection interrupted in the middle of deleting
+    leftover = tmp_path / ".servicex" / "trash" / "7-gone"
+    leftover.mkdir(parents=True)
+    (leftover / "out.parquet").write_bytes(b"\x00" * 100)
+
+    assert cache.collect_garbage(max_size=150) == []
+    assert not leftover.exists()
+
+    # What can't be deleted still takes room
+    leftover.mkdir()
+    (leftover / "out.parquet").write_bytes(b"\x00" * 100)
+    mocker.patch("servicex.query_cache.shutil.rmtree")
+    evicted = cache.collect_garbage(max_size=150)
+    assert [r.request_id for r in evicted] == ["a"]
+    cache.close()
+
+
+def test_collect_garbage_max_age(tmp_path, mocker):
+    config = Configuration(cache_path=str(tmp_path), api_endpoints=[], cache_max_age=1)
+    cache = QueryCache(config)
+    _cached_transform(cache, tmp_path, "stale", 10, 0.0)
+    _cached_transform(cache, tmp_path, "fresh", 10, 86400.0)
+
+    mocker.patch("servicex.query_cache.time.time", return_value=1.5 * 86400)
+    evicted = cache.collect_garbage()
+    assert [r.request_id for r in evicted] == ["stale"]
+    cache.close()
+
+
+def test_collect_garbage_keeps_records_used_meanwhile(tmp_path, mocker):
+    config = Configuration(cache_path=str(tmp_path), api_endpoints=[])
+    cache = QueryCache(config)
+    _cached_transform(cache, tmp_path, "a", 100, 1.0)
+    other = QueryCache(config)
+
+    evict = cache._evict
+
+    def read_then_evict(*args):
+        # Another process gets a cache hit after the transform was picked
+        other.get_transform_by_hash("hash-a")
+        return evict(*args)
+
+    mocker.patch.object(cache, "_evict", side_effect=read_then_evict)
+    assert cache.collect_garbage(max_size=0) == []
+    assert (tmp_path / "a" / "out.parquet").exists()
+    assert cache.get_transform_by_hash("hash-a")
+    other.close()
+    cache.close()
+
+
+def test_cache_hit_not_evicted_while_read(tmp_path, mocker):
+    config = Configuration(cache_path=str(tmp_path), api_endpoints=[])
+    cache = QueryCache(config)
+    _cached_transform(cache, tmp_path, "old", 100, 1.0)
+    _cached_transform(cache, tmp_path, "new", 100, 2.0)
+    other = QueryCache(config)
+    evicted = []
+    select = cache._select
+
+    def select_while_collecting(*args):
+        records = select(*args)
+        # Another process collects garbage in the middle of the lookup
+        collector = threading.Thread(
+            target=lambda: evicted.extend(other.collect_garbage(max_size=150))
+        )
+        collector.start()
+        collector.join(timeout=0.5)
+        select_while_collecting.collector = collector
+        return records
+
+    mocker.patch.object(cache, "_select", side_effect=select_while_collecting)
+    record = cache.get_transform_by_hash("hash-old")
+    select_while_collecting.collector.join()
+
+    assert record.request_id == "old"
+    assert [r.request_id for r in evicted] == ["new"]
+    assert (tmp_path / "old" / "out.parquet").exists()
+    other.close()
+    cache.close()
+
+
+def test_collect_garbage_unlinked_blobs(tmp_path, mocker):
+    config = Configuration(
+        cache_path=str(tmp_path), api_endpoints=[], deduplicate_downloads=True
+    )
+    cache = QueryCache(config)
+    store = cache.blob_store()
+    shared = _cached_transform(cache, tmp_path, "a", 10, 1.0)
+    store.add("shared", Path(shared.file_list[0]))
+    other = _cached_transform(cache, tmp_path, "b", 10, 2.0)
+    store.fetch("shared", 10, Path(other.file_list[0]))
+    orphan = _cached_transform(cache, tmp_path, "c", 10, 3.0)
+    store.add("orphan", Path(orphan.file_list[0]))
+    cache.delete_record_by_request_id("c")
+    shutil.rmtree(tmp_path / "c")
+
+    mocker.patch("servicex.query_cache.time.time", return_value=time.time() + 7200)
+    evicted = cache.collect_garbage(max_size=10)
+
+    assert [r.request_id for r in evicted] == ["a"]
+    # Still linked from "b"
+    assert store.path("shared").exists()
+    assert not store.path("orphan").exists()
+    cache.close()
+
+
+def test_last_access_added_to_old_cache(tmp_path):
+    db_dir = tmp_path / ".servicex"
+    db_dir.mkdir()
+    db = sqlite3.connect(db_dir / "db.sqlite")
+    db.execute(
+        "CREATE TABLE transforms (id INTEGER PRIMARY KEY, hash TEXT NOT NULL, "
+        "request_id TEXT, status TEXT, doc TEXT NOT NULL)"
+    )
+    db.execute("INSERT INTO transforms (hash, doc) VALUES ('h', '{}')")
+    db.commit()
+    db.close()
+
+    cache = QueryCache(Configuration(cache_path=str(tmp_path), api_endpoints=[]))
+    (last_access,) = cache.db.execute("SELECT last_access FROM transforms").fetchone()
+    assert last_access == pytest.approx(time.time(), abs=60)
+    cache.close()
+
+
+def test_server_info(tmp_path):
+    cache = QueryCache(Configuration(cache_path=str(tmp_path), api_endpoints=[]))
+    assert cache.get_server_info("https://servicex.org") is None
+
+    info = ServiceXInfo(
+        **{
+            "app-version": "1.0",
+            "code-gen-image": {"uproot": "image"},
+            "capabilities": ["a"],
+        }
+    )
+    cache.save_server_info("https://servicex.org", info)
+    saved, fetched_at = cache.get_server_info("https://servicex.org")
+    assert saved == info
+    assert fetched_at == pytest.approx(time.time(), abs=60)
+    assert cache.get_server_info("https://other.org") is None
+
+    # Unreadable info is fetched again rather than failing
+    cache.db.execute("UPDATE server_info SET info = '{}'")
+    assert cache.get_server_info("https://servicex.org") is None
+    cache.close()
@@ -0,0 +1,98 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
+
+import pytest
+
+from servicex.result_stream import ResultStream
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_throttles_producer():
+    stream = ResultStream(max_pending=2)
+    produced = []
+
+    async def producer():
+        for i in range(5):
+            await stream.reserve()
+            produced.append(i)
+            stream.put("sample", f"file{i}")
+
+    task = asyncio.ensure_future(producer())
+    await asyncio.sleep(0.01)
+    # Nothing consumed yet, so only max_pending files were fetched
+    assert produced == [0, 1]
+
+    seen = []
+    async for sample, uri in stream.iterate([task]):
+        seen.append(uri)
+        await asyncio.sleep(0)
+        assert len(produced) - len(seen) <= 2
+
+    assert seen == [f"file{i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_items_from_several_producers():
+    stream = ResultStream()
+
+    async def producer(sample, count):
+        for i in range(count):
+            await stream.reserve()
+            await asyncio.sleep(0)
+            stream.put(sample, f"{sample}{i}")
+
+    tasks = [
+        asyncio.ensure_future(producer("a", 3)),
+        asyncio.ensure_future(producer("b", 2)),
+    ]
+    seen = [item async for item in stream.iterate(tasks)]
+    assert sorted(seen) == [
+        ("a", "a0"),
+        ("a", "a1"),
+        ("a", "a2"),
+        ("b", "b0"),
+        ("b", "b1"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_producer_failure_stops_iteration():
+    stream = ResultStream()
+
+    async def producer():
+        await stream.reserve()
+        stream.put("sample", "file0")
+        raise RuntimeError("transform failed")
+
+    task = asyncio.ensure_future(producer())
+    seen = []
+    with pytest.raises(RuntimeError, match="transform failed"):
+        async for _, uri in stream.iterate([task]):
+            seen.append(uri)
+    assert seen == ["file0"]
@@ -25,6 +25,7 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
 import os
 import tempfile
 import time
@@ -36,12 +37,15 @@ import pytest
 from json import JSONDecodeError
 from pytest_asyncio import fixture
 
+from servicex.configuration import Configuration
 from servicex.models import (
     TransformRequest,
     ResultDestination,
     ResultFormat,
     ServiceXInfo,
+    TransformStatus,
 )
+from servicex.query_cache import QueryCache
 from servicex.servicex_adapter import ServiceXAdapter, AuthorizationError
 
 
@@ -74,6 +78,52 @@ async def test_get_transforms(mock_get, servicex, transform_status_response):
     )
 
 
+@pytest.mark.asyncio
+@patch("servicex.servicex_adapter.AsyncClient.get")
+async def test_get_transform_statuses_bulk(
+    mock_get, servicex, transform_status_response
+):
+    servicex.get_servicex_capabilities = AsyncMock(
+        return_value=["bulk_transform_status"]
+    )
+    mock_get.return_value = MagicMock()
+    mock_get.return_value.json.return_value = transform_status_response
+    mock_get.return_value.status_code = 200
+    t = await servicex.get_transform_statuses(["b8c508d0-ccf2-4deb-a1f7-65c839eebabf"])
+    assert list(t) == ["b8c508d0-ccf2-4deb-a1f7-65c839eebabf"]
+    mock_get.assert_called_once_with(
+        url="https://servicex.org/servicex/transformation",
+        headers={},
+        params={"request_id": ["b8c508d0-ccf2-4deb-a1f7-65c839eebabf"]},
+    )
+
+
+@pytest.mark.asyncio
+@patch("servicex.servicex_adapter.AsyncClient.get")
+async def test_get_transform_statuses_filtered(
+    mock_get, servicex, transform_status_response
+):
+    servicex.get_servicex_capabilities = AsyncMock(return_value=[])
+    missing = transform_status_response["requests"][0].copy()
+    missing["request_id"] = "missing-from-listing"
+    servicex.get_transform_status = AsyncMock(return_value=TransformStatus(**missing))
+    transform_status_response["requests"].append(
+        dict(transform_status_response["requests"][0], request_id="not-wanted")
+    )
+    mock_get.return_value = MagicMock()
+    mock_get.return_value.json.return_value = transform_status_response
+    mock_get.return_value.status_code = 200
+
+    t = await servicex.get_transform_statuses(
+        ["b8c508d0-ccf2-4deb-a1f7-65c839eebabf", "missing-from-listing"]
+    )
+    assert set(t) == {"b8c508d0-ccf2-4deb-a1f7-65c839eebabf", "missing-from-listing"}
+    mock_get.assert_called_once_with(
+        url="https://servicex.org/servicex/transformation", headers={}
+    )
+    servicex.get_transform_status.assert_awaited_once_with("missing-from-listing")
+
+
 @pytest.mark.asyncio
 @patch("servicex.servicex_adapter.AsyncClient.get")
 async def test_get_transforms_error(mock_get, servicex, transform_status_response):
@@ -947,3 +997,236 @@ async def test_verify_authentication_no_token_exception(mock_get, servicex):
     mock_get.side_effect = Exception("Connection refused")
     result = await servicex.verify_authentication()
     assert result is False
+
+
+@pytest.mark.asyncio
+@patch("servicex.servicex_adapter.AsyncClient.get")
+async def test_calls_share_pooled_transport(mock_get, transform_status_response):
+    mock_get.return_value = MagicMock()
+    mock_get.return_value.json.return_value = transform_status_response
+    mock_get.return_value.status_code = 200
+
+    async with ServiceXAdapter("https://servicex.org", max_connections=7) as sx:
+        await sx.get_transforms()
+        transport = sx._transport
+        client = sx._clients["default"]
+        await sx.get_transforms()
+        assert sx._transport is transport
+        assert sx._clients["default"] is client
+
+        # A different retry policy gets its own client over the same connections
+        assert sx._client("basic") is not client
+        assert sx._client("basic")._transport is transport
+        assert transport._pool._max_connections == 7
+    assert sx._transport is None
+
+
+@pytest.mark.asyncio
+async def test_close_releases_transport():
+    sx = ServiceXAdapter("https://servicex.org")
+    transport = sx._client("default")._transport._async_transport
+    with patch.object(transport, "aclose", AsyncMock()) as aclose:
+        await sx.close()
+        aclose.assert_awaited_once()
+    assert sx._clients == {}
+
+    # The adapter can still be used after closing
+    assert sx._client("default") is not None
+
+
+def test_pool_rebuilt_for_new_event_loop():
+    import asyncio
+
+    sx = ServiceXAdapter("https://servicex.org")
+
+    async def get_transport():
+        sx._client("basic")
+        return sx._transport
+
+    first = asyncio.run(get_transport())
+    second = asyncio.run(get_transport())
+    assert first is not second
+
+
+def test_stale_transport_closed_with_its_loop_gone():
+    sx = ServiceXAdapter("https://servicex.org")
+    sock = MagicMock()
+
+    async def open_connection():
+        sx._client("basic")
+        connection = MagicMock()
+        connection._connection._network_stream.get_extra_info.return_value = sock
+        sx._transport._pool._connections = [connection]
+
+    asyncio.run(open_connection())
+    asyncio.run(open_connection())
+    sock.close.assert_called_once()
+
+
+class _TrackedTransport(httpx.AsyncHTTPTransport):
+    opened = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.closed = False
+        _TrackedTransport.opened.append(self)
+
+    async def aclose(self):
+        self.closed = True
+        await super().aclose()
+
+
+@patch("servicex.servicex_adapter.AsyncHTTPTransport", _TrackedTransport)
+@patch("servicex.servicex_adapter.AsyncClient.get")
+def test_sync_calls_leave_no_transport_open(mock_get, transform_status_response):
+    from servicex.servicex_client import ServiceXClient
+
+    _TrackedTransport.opened = []
+    _mock_info_response(mock_get)
+    sx = ServiceXAdapter("https://servicex.org")
+    for _ in range(3):
+        assert sx.get_code_generators(refresh=True) == {"uproot": "image"}
+
+    mock_get.return_value.json = MagicMock(return_value=transform_status_response)
+    client = ServiceXClient(
+        url="https://servicex.org",
+        config_path=os.path.join(os.path.dirname(__file__), "example_config.yaml"),
+    )
+    for _ in range(3):
+        assert len(client.get_transforms()) == 1
+    mock_get.return_value.json = MagicMock(return_value={"datasets": []})
+    assert client.get_datasets() == []
+    assert len(_TrackedTransport.opened) == 7
+    assert all(t.closed for t in _TrackedTransport.opened)
+
+
+@pytest.mark.asyncio
+async def test_http2_transport():
+    pytest.importorskip("h2")
+    sx = ServiceXAdapter("https://servicex.org", http2=True)
+    assert sx._client("basic")._transport._pool._http2
+    await sx.close()
+
+
+@pytest.fixture
+def info_cache(tmp_path):
+    cache = QueryCache(Configuration(cache_path=str(tmp_path), api_endpoints=[]))
+    yield cache
+    cache.close()
+
+
+def _mock_info_response(mock_get, version="1.0"):
+    mock_get.return_value.status_code = 200
+    mock_get.return_value.json = MagicMock(
+        return_value={
+            "capabilities": ["long_sample_titles_256"],
+            "app-version": version,
+            "code-gen-image": {"uproot": "image"},
+        }
+    )
+
+
+@pytest.mark.asyncio
+@patch("servicex.servicex_adapter.AsyncClient.get")
+async def test_servicex_info_saved_across_adapters(mock_get, info_cache):
+    _mock_info_response(mock_get)
+    first = ServiceXAdapter("https://servicex.org", server_info_cache=info_cache)
+    assert await first.get_servicex_sample_title_limit() == 256
+    assert mock_get.call_count == 1
+
+    second = ServiceXAdapter("https://servicex.org", server_info_cache=info_cache)
+    assert await second.get_servicex_sample_title_limit() == 256
+    assert await second.get_code_generators_async() == {"uproot": "image"}
+    assert mock_get.call_count == 1
+
+    # Saved per endpoint
+    other = ServiceXAdapter("https://other.org", server_info_cache=info_cache)
+    await other.get_servicex_info()
+    assert mock_get.call_count == 2
+
+
+async def _save_stale_info(info_cache, mock_get) -> ServiceXAdapter:
+    "Save version 1.0 of the server info, and answer 2.0 from now on"
+    _mock_info_response(mock_get, "1.0")
+    await ServiceXAdapter(
+        "https://servicex.org", server_info_cache=info_cache
+    ).get_servicex_info()
+    _mock_info_response(mock_get, "2.0")
+    return ServiceXAdapter(
+        "https://servicex.org", server_info_cache=info_cache, server_info_ttl=1e-6
+    )
+
+
+@pytest.mark.asyncio
+@patch("servicex.servicex_adapter.AsyncClient.get")
+async def test_stale_servicex_info_refreshed(mock_get, info_cache):
+    servicex = await _save_stale_info(info_cache, mock_get)
+    # Nothing would be left to finish a refresh after this loop: it's done inline
+    assert (await servicex.get_servicex_info()).app_version == "2.0"
+    assert info_cache.get_server_info("https://servicex.org")[0].app_version == "2.0"
+
+    # Still usable while the server can't be reached
+    servicex = ServiceXAdapter(
+        "https://servicex.org", server_info_cache=info_cache, server_info_ttl=1e-6
+    )
+    mock_get.side_effect = httpx.ConnectError("down")
+    assert (await servicex.get_servicex_info()).app_version == "2.0"
+
+
+@pytest.mark.asyncio
+@patch("servicex.servicex_adapter.in_background_loop", return_value=True)
+@patch("servicex.servicex_adapter.AsyncClient.get")
+async def test_stale_servicex_info_refreshed_in_background(
+    mock_get, _background, info_cache
+):
+    servicex = await _save_stale_info(info_cache, mock_get)
+    info = await servicex.get_servicex_info()
+    # The stale info is returned straight away
+    assert info.app_version == "1.0"
+
+    await servicex._revalidation
+    assert mock_get.call_count == 2
+    assert info_cache.get_server_info("https://servicex.org")[0].app_version == "2.0"
+
+
+@pytest.mark.asyncio
+@patch("servicex.servicex_adapter.in_background_loop", return_value=True)
+@patch("servicex.servicex_adapter.AsyncClient.get")
+async def test_close_cancels_servicex_info_refresh(mock_get, _background, info_cache):
+    servicex = await _save_stale_info(info_cache, mock_get)
+    server_hangs = asyncio.Event()
+
+    async def hang(*args, **kwargs):
+        await server_hangs.wait()
+
+    mock_get.side_effect = hang
+    assert (await servicex.get_servicex_info()).app_version == "1.0"
+    revalidation = servicex._revalidation
+    await asyncio.sleep(0)
+
+    await asyncio.wait_for(servicex.close(), 1)
+    assert revalidation.cancelled()
+    assert info_cache.get_server_info("https://servicex.org")[0].app_version == "1.0"
+
+
+@pytest.mark.asyncio
+@patch("servicex.servicex_adapter.AsyncClient.get")
+async def test_servicex_info_refresh(mock_get, info_cache):
+    _mock_info_response(mock_get, "1.0")
+    servicex = ServiceXAdapter("https://servicex.org", server_info_cache=info_cache)
+    await servicex.get_servicex_info()
+
+    _mock_info_response(mock_get, "2.0")
+    assert (await servicex.get_servicex_info(refresh=True)).app_version == "2.0"
+    assert info_cache.get_server_info("https://servicex.org")[0].app_version == "2.0"
+
+
+@pytest.mark.asyncio
+@patch("servicex.servicex_adapter.AsyncClient.get")
+async def test_servicex_info_not_saved_without_ttl(mock_get, info_cache):
+    _mock_info_response(mock_get)
+    servicex = ServiceXAdapter(
+        "https://servicex.org", server_info_cache=info_cache, server_info_ttl=0
+    )
+    await servicex.get_servicex_info()
+    assert info_cache.get_server_info("https://servicex.org") is None
@@ -25,6 +25,7 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
 from datetime import datetime
 from pathlib import Path
 from unittest.mock import MagicMock, patch
@@ -35,7 +36,8 @@ from pytest_asyncio import fixture
 from servicex.models import TransformedResults, ResultFormat
 from servicex.query_cache import QueryCache
 from servicex.servicex_adapter import ServiceXAdapter
-from servicex.servicex_client import ServiceXClient
+from servicex.dataset_identifier import FileListDataset
+from servicex.servicex_client import ServiceXClient, deliver, deliver_async
 
 
 @fixture
@@ -186,3 +188,93 @@ async def test_deliver_async_invalid_delivery_config():
                     "unexpected value for config.general.Delivery: INVALID_DELIVERY"
                     in str(exc_info.value)
                 )
+
+
+@pytest.mark.asyncio
+async def test_deliver_async_adaptive_concurrency():
+    from servicex import AdaptiveConcurrency
+    from servicex.servicex_client import deliver_async
+    from unittest.mock import patch, MagicMock
+
+    adaptive = AdaptiveConcurrency(maximum=32)
+    with patch("servicex.servicex_client._load_ServiceXSpec") as mock_load_spec:
+        with patch("servicex.servicex_client._build_datasets") as mock_build_datasets:
+            with patch("servicex.minio_adapter.init_s3_config") as mock_init:
+                with patch("servicex.servicex_client.DatasetGroup") as mock_group:
+                    mock_config = MagicMock()
+                    mock_config.General.Delivery = "INVALID_DELIVERY"
+                    mock_config.General.IgnoreLocalCache = False
+                    mock_config.Sample = []
+                    mock_load_spec.return_value = mock_config
+                    mock_build_datasets.return_value = []
+
+                    with pytest.raises(ValueError):
+                        await deliver_async("test_spec.yaml", concurrency=adaptive)
+
+    mock_init.assert_called_once_with(32)
+    scheduler = mock_group.call_args.kwargs["download_scheduler"]
+    assert scheduler.adaptive is adaptive
+    assert scheduler.size_based_streams
+
+
+def test_collect_garbage_in_background(tmp_path):
+    from servicex.configuration import Configuration
+    from servicex.query_cache import QueryCache
+    from servicex.servicex_client import _collect_garbage_in_background
+
+    config = Configuration(cache_path=str(tmp_path), api_endpoints=[], cache_max_size=0)
+    with patch.object(QueryCache, "collect_garbage") as collect:
+        thread = _collect_garbage_in_background(config)
+        # Finished, not killed, when the interpreter exits
+        assert not thread.daemon
+        thread.join(timeout=30)
+    collect.assert_called_once_with()
+
+
+def test_background_loop_shared_between_calls(mock_cache, servicex_adaptor):
+    loops = []
+
+    async def record_loop(*args):
+        loops.append(asyncio.get_running_loop())
+        return []
+
+    servicex_adaptor.get_datasets.side_effect = record_loop
+    servicex_adaptor.get_dataset.side_effect = record_loop
+    with ServiceXClient(
+        config_path="tests/example_config.yaml", background_loop=True
+    ) as sx:
+        sx.get_datasets()
+        sx.get_dataset("123")
+        assert loops[0] is loops[1] is sx.background_loop.loop
+
+        query = sx.generic_query(
+            dataset_identifier=FileListDataset("file.root"),
+            query="1",
+            codegen="uproot",
+        )
+        assert query.background_loop is sx.background_loop
+
+    assert sx.background_loop.closed
+    servicex_adaptor.close.assert_awaited_once()
+
+
+def test_deliver_runs_on_client_loop(mock_cache, servicex_adaptor, mocker):
+    loops = []
+
+    async def fake_deliver(spec, **kwargs):
+        loops.append(asyncio.get_running_loop())
+        return kwargs["client"]
+
+    mocker.patch("servicex.servicex_client.deliver_async", side_effect=fake_deliver)
+    with ServiceXClient(
+        config_path="tests/example_config.yaml", background_loop=True
+    ) as sx:
+        assert deliver({}, client=sx) is sx
+        assert loops == [sx.background_loop.loop]
+
+
+@pytest.mark.asyncio
+async def test_deliver_client_excludes_config_options(mock_cache, servicex_adaptor):
+    sx = ServiceXClient(config_path="tests/example_config.yaml")
+    with pytest.raises(ValueError, match="cannot be given with a client"):
+        await deliver_async({}, client=sx, servicex_name="other")
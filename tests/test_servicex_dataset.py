@@ -25,10 +25,11 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
 import datetime
 import tempfile
 from typing import List
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from pathlib import PurePath
 import pytest
 from itertools import cycle
@@ -36,6 +37,7 @@ from itertools import cycle
 from servicex.configuration import Configuration
 from servicex.dataset_identifier import FileListDataset
 from servicex.expandable_progress import ExpandableProgress
+from servicex.polling import AdaptivePolling
 from servicex.func_adl.func_adl_dataset import FuncADLQuery_Uproot
 from servicex.models import (
     TransformStatus,
@@ -61,6 +63,16 @@ def _sx_mock() -> AsyncMock:
     return mock
 
 
+def _bucket_listings(*listings) -> MagicMock:
+    """Mock of MinioAdapter.iter_bucket, streaming the next listing at each call."""
+
+    async def stream(files):
+        for f in files:
+            yield f
+
+    return MagicMock(side_effect=[stream(files) for files in listings])
+
+
 transform_status = TransformStatus(
     **{
         "request_id": "b8c508d0-ccf2-4deb-a1f7-65c839eebabf",
@@ -263,7 +275,7 @@ async def test_submit(mocker, use_s3_polling):
     )
 
     if use_s3_polling:
-        mock_minio.list_bucket = AsyncMock(side_effect=[[file1], [file1, file2]])
+        mock_minio.iter_bucket = _bucket_listings([file1], [file1, file2])
 
     mock_cache = mocker.MagicMock(QueryCache)
     mock_cache.get_transform_by_hash = mocker.MagicMock(return_value=None)
@@ -337,7 +349,7 @@ async def test_submit_partial_success(mocker, use_s3_polling):
     )
 
     if use_s3_polling:
-        mock_minio.list_bucket = AsyncMock(side_effect=[[file1], [file1]])
+        mock_minio.iter_bucket = _bucket_listings([file1], [file1])
 
     mock_cache = mocker.MagicMock(QueryCache)
     mock_cache.get_transform_by_hash = mocker.MagicMock(return_value=None)
@@ -404,10 +416,14 @@ async def test_use_of_cache(mocker, use_s3_polling):
     mock_minio.download_file = AsyncMock(
         side_effect=lambda a, _, shorten_filename, expected_size: PurePath(a)
     )
-    mock_minio.get_signed_url = AsyncMock(side_effect=["http://file1", "http://file2"])
+    mock_minio.get_signed_urls = AsyncMock(
+        return_value=["http://file1", "http://file2"]
+    )
 
     if use_s3_polling:
-        mock_minio.list_bucket = AsyncMock(return_value=[file1, file2])
+        mock_minio.iter_bucket = MagicMock(
+            side_effect=lambda start_after: _bucket_listings([file1, file2])()
+        )
 
     mocker.patch("servicex.minio_adapter.MinioAdapter", return_value=mock_minio)
 
@@ -434,15 +450,15 @@ async def test_use_of_cache(mocker, use_s3_polling):
             )
         upd.assert_not_called()
         upd.reset_mock()
-        assert mock_minio.get_signed_url.await_count == 2
+        assert mock_minio.get_signed_urls.await_count == 1
 
         with ExpandableProgress(display_progress=False) as progress:
             servicex2 = _sx_mock()
             if use_s3_polling:
-                mock_minio.list_bucket.reset_mock()
+                mock_minio.iter_bucket.reset_mock()
             else:
                 servicex.get_transformation_results.reset_mock()
-            mock_minio.get_signed_url.reset_mock()
+            mock_minio.get_signed_urls.reset_mock()
             datasource2 = Query(
                 dataset_identifier=did,
                 title="ServiceX Client",
@@ -460,10 +476,10 @@ async def test_use_of_cache(mocker, use_s3_polling):
             )
             servicex2.assert_not_awaited()
             if use_s3_polling:
-                mock_minio.list_bucket.assert_not_awaited()
+                mock_minio.iter_bucket.assert_not_called()
             else:
                 servicex.get_transformation_results.assert_not_awaited()
-            mock_minio.get_signed_url.assert_not_awaited()
+            mock_minio.get_signed_urls.assert_not_awaited()
         upd.assert_not_called()
         assert result1 == result2
         upd.reset_mock()
@@ -471,7 +487,7 @@ async def test_use_of_cache(mocker, use_s3_polling):
         servicex.get_transform_status.return_value = transform_status3
 
         if use_s3_polling:
-            mock_minio.list_bucket.reset_mock(side_effect=True)
+            mock_minio.iter_bucket.reset_mock()
         else:
             servicex.get_transformation_results.reset_mock(side_effect=True)
 
@@ -484,7 +500,7 @@ async def test_use_of_cache(mocker, use_s3_polling):
         upd.assert_called_once()
 
         if use_s3_polling:
-            mock_minio.list_bucket.reset_mock()
+            mock_minio.iter_bucket.reset_mock()
         else:
             servicex.get_transformation_results.reset_mock()
         mock_minio.download_file.reset_mock()
@@ -494,7 +510,7 @@ async def test_use_of_cache(mocker, use_s3_polling):
             )
         servicex.assert_not_awaited()
         if use_s3_polling:
-            mock_minio.list_bucket.assert_not_awaited()
+            mock_minio.iter_bucket.assert_not_called()
         else:
             servicex.get_transformation_results.assert_not_awaited()
         mock_minio.download_file.assert_not_awaited()
@@ -502,6 +518,86 @@ async def test_use_of_cache(mocker, use_s3_polling):
         cache.close()
 
 
+@pytest.mark.asyncio
+async def test_expiring_signed_urls_refreshed(mocker):
+    servicex = _sx_mock()
+    servicex.submit_transform = AsyncMock(return_value={"request_id": "123-456-789"})
+    servicex.get_servicex_capabilities = AsyncMock(
+        return_value=["poll_local_transformation_results"]
+    )
+    servicex.get_transform_status = AsyncMock(
+        side_effect=[transform_status1, transform_status3]
+    )
+    servicex.get_transformation_results = AsyncMock(
+        return_value=[
+            ServiceXFile(
+                filename=f"file{i}.txt",
+                total_bytes=100,
+                created_at=datetime.datetime.now(datetime.timezone.utc),
+            )
+            for i in (1, 2)
+        ]
+    )
+    mock_minio = AsyncMock()
+    mock_minio.get_signed_urls = AsyncMock(return_value=["http://old1", "http://old2"])
+    mocker.patch("servicex.minio_adapter.MinioAdapter", return_value=mock_minio)
+
+    def make_query(cache, config):
+        query = Query(
+            dataset_identifier=FileListDataset("/foo/bar/baz.root"),
+            title="ServiceX Client",
+            codegen="uproot",
+            sx_adapter=servicex,
+            query_cache=cache,
+            config=config,
+        )
+        query.query_string_generator = FuncADLQuery_Uproot().FromTree("nominal")
+        query.result_format = ResultFormat.parquet
+        return query
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = Configuration(
+            cache_path=temp_dir, api_endpoints=[], signed_url_expiration=3600
+        )
+        cache = QueryCache(config)
+        with ExpandableProgress(display_progress=False) as progress:
+            first = await make_query(cache, config).submit_and_download(
+                signed_urls_only=True, expandable_progress=progress
+            )
+        now = datetime.datetime.now(datetime.timezone.utc)
+        assert first.signed_url_expires - now <= datetime.timedelta(seconds=3600)
+        mock_minio.get_signed_urls.assert_awaited_once_with(
+            ["file1.txt", "file2.txt"], 3600
+        )
+
+        # Less than the refresh margin left: all of them are signed again at once
+        servicex.get_transform_status = AsyncMock(return_value=transform_status3)
+        mock_minio.get_signed_urls = AsyncMock(
+            return_value=["http://new1", "http://new2"]
+        )
+        config.signed_url_expiration = 7 * 24 * 3600
+        with ExpandableProgress(display_progress=False) as progress:
+            second = await make_query(cache, config).submit_and_download(
+                signed_urls_only=True, expandable_progress=progress
+            )
+        mock_minio.get_signed_urls.assert_awaited_once()
+        assert second.signed_url_list == ["http://new1", "http://new2"]
+        assert second.signed_url_expires > now + datetime.timedelta(days=6)
+        cached = cache.get_transform_by_hash(second.hash)
+        assert cached.signed_url_list == ["http://new1", "http://new2"]
+        assert cached.signed_url_expires == second.signed_url_expires
+
+        # Still fresh: served from the cache
+        mock_minio.get_signed_urls.reset_mock()
+        with ExpandableProgress(display_progress=False) as progress:
+            third = await make_query(cache, config).submit_and_download(
+                signed_urls_only=True, expandable_progress=progress
+            )
+        mock_minio.get_signed_urls.assert_not_awaited()
+        assert third.signed_url_list == ["http://new1", "http://new2"]
+        cache.close()
+
+
 @pytest.mark.asyncio
 async def test_submit_cancel(mocker):
     servicex = _sx_mock()
@@ -580,6 +676,9 @@ async def test_submit_fatal(mocker):
                 signed_urls_only=False, expandable_progress=progress
             )
     mock_cache.cache_transform.assert_not_called()
+    mock_cache.delete_record_by_request_id.assert_called_once_with(
+        datasource.request_id
+    )
 
 
 @pytest.mark.asyncio
@@ -733,7 +832,9 @@ async def test_use_of_ignore_cache(mocker, servicex):
     ]
     # Prepare Minio
     mock_minio = AsyncMock()
-    mock_minio.get_signed_url = AsyncMock(side_effect=["http://file1", "http://file2"])
+    mock_minio.get_signed_urls = AsyncMock(
+        return_value=["http://file1", "http://file2"]
+    )
     mocker.patch("servicex.minio_adapter.MinioAdapter", return_value=mock_minio)
     did = FileListDataset("/foo/bar/baz.root")
 
@@ -780,11 +881,11 @@ async def test_use_of_ignore_cache(mocker, servicex):
             )  # noqa
         upd.assert_not_called()
         upd.reset_mock()
-        assert mock_minio.get_signed_url.await_count == 2
+        assert mock_minio.get_signed_urls.await_count == 1
 
         # 2nd time sending the same request with ignore_cache (So it will run again)
-        mock_minio.get_signed_url = AsyncMock(
-            side_effect=["http://file1", "http://file2"]
+        mock_minio.get_signed_urls = AsyncMock(
+            return_value=["http://file1", "http://file2"]
         )
         upd = mocker.patch.object(
             cache, "update_record", side_effect=cache.update_record
@@ -795,7 +896,7 @@ async def test_use_of_ignore_cache(mocker, servicex):
             )  # noqa
         upd.assert_not_called()
         upd.reset_mock()
-        assert mock_minio.get_signed_url.await_count == 2
+        assert mock_minio.get_signed_urls.await_count == 1
 
         # 3rd round, should hit the cache (and nothing else)
         servicex.get_transform_status.side_effect = [
@@ -812,3 +913,136 @@ async def test_use_of_ignore_cache(mocker, servicex):
         mock_minio.download_file.assert_not_awaited()
         assert len(res.signed_url_list) == 2
         cache.close()
+
+
+@pytest.mark.asyncio
+async def test_iter_files(mocker):
+    servicex = _sx_mock()
+    servicex.submit_transform = AsyncMock(return_value="123-456-789")
+    servicex.get_servicex_capabilities = AsyncMock(return_value=[])
+    servicex.get_transform_status = AsyncMock(
+        side_effect=[transform_status1, transform_status2, transform_status3]
+    )
+
+    mock_minio = AsyncMock()
+    mock_minio.download_file = AsyncMock(
+        side_effect=lambda a, _, shorten_filename, expected_size: PurePath(a)
+    )
+    mock_minio.iter_bucket = _bucket_listings([file1], [file1, file2])
+    mocker.patch("servicex.minio_adapter.MinioAdapter", return_value=mock_minio)
+
+    mock_cache = mocker.MagicMock(QueryCache)
+    mock_cache.get_transform_by_hash = mocker.MagicMock(return_value=None)
+    mock_cache.is_transform_request_submitted = mocker.MagicMock(return_value=False)
+    mock_cache.transformed_results = mocker.MagicMock(side_effect=transformed_results)
+    mock_cache.cache_path_for_transform = mocker.MagicMock(return_value=PurePath("."))
+
+    datasource = Query(
+        dataset_identifier=FileListDataset("/foo/bar/baz.root"),
+        title="ServiceX Client",
+        codegen="uproot",
+        sx_adapter=servicex,
+        query_cache=mock_cache,
+        config=Configuration(api_endpoints=[]),
+        servicex_polling_interval=0.01,
+        minio_polling_interval=0.01,
+    )
+    datasource.query_string_generator = FuncADLQuery_Uproot().FromTree("nominal")
+    datasource.result_format = ResultFormat.parquet
+
+    seen = []
+    async for title, path in datasource.iter_files_async(display_progress=False):
+        # The cache is only written once the last file has been handed over
+        mock_cache.cache_transform.assert_not_called()
+        seen.append((title, path))
+
+    assert seen == [("ServiceX Client", "file1"), ("ServiceX Client", "file2")]
+    mock_cache.cache_transform.assert_called_once()
+    assert mock_cache.cache_transform.call_args.args[0].file_list == ["file1", "file2"]
+
+
+@pytest.mark.asyncio
+async def test_iter_files_from_cache(mocker):
+    servicex = _sx_mock()
+    did = FileListDataset("/foo/bar/baz.root")
+    datasource = Query(
+        dataset_identifier=did,
+        title="ServiceX Client",
+        codegen="uproot",
+        sx_adapter=servicex,
+        query_cache=mocker.MagicMock(QueryCache),
+        config=Configuration(api_endpoints=[]),
+    )
+    datasource.query_string_generator = FuncADLQuery_Uproot().FromTree("nominal")
+    datasource.result_format = ResultFormat.parquet
+    datasource.cache.get_transform_by_hash.return_value = transformed_results(
+        datasource.transform_request,
+        transform_status3,
+        "/foo/bar",
+        ["/foo/bar/file1", "/foo/bar/file2"],
+        [],
+    )
+
+    seen = [
+        path
+        async for _, path in datasource.iter_files_async(
+            display_progress=False, max_pending=1
+        )
+    ]
+    assert seen == ["/foo/bar/file1", "/foo/bar/file2"]
+    servicex.submit_transform.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_submit_polling_strategy(mocker):
+    servicex = _sx_mock()
+    servicex.submit_transform = AsyncMock(return_value="123-456-789")
+    servicex.get_servicex_capabilities = AsyncMock(return_value=[])
+    servicex.get_transform_status = AsyncMock(
+        side_effect=[transform_status1, transform_status2, transform_status3]
+    )
+
+    mock_minio = AsyncMock()
+    mock_minio.download_file = AsyncMock(
+        side_effect=lambda a, _, shorten_filename, expected_size: PurePath(a)
+    )
+    mock_minio.iter_bucket = _bucket_listings([file1], [file1, file2])
+    mocker.patch("servicex.minio_adapter.MinioAdapter", return_value=mock_minio)
+
+    mock_cache = mocker.MagicMock(QueryCache)
+    mock_cache.get_transform_by_hash = mocker.MagicMock(return_value=None)
+    mock_cache.is_transform_request_submitted = mocker.MagicMock(return_value=False)
+    mock_cache.transformed_results = mocker.MagicMock(side_effect=transformed_results)
+    mock_cache.cache_path_for_transform = mocker.MagicMock(return_value=PurePath("."))
+
+    sleeps = []
+    real_sleep = asyncio.sleep
+
+    async def recording_sleep(delay):
+        sleeps.append(delay)
+        await real_sleep(0)
+
+    mocker.patch("servicex.query_core.asyncio.sleep", side_effect=recording_sleep)
+
+    datasource = Query(
+        dataset_identifier=FileListDataset("/foo/bar/baz.root"),
+        title="ServiceX Client",
+        codegen="uproot",
+        sx_adapter=servicex,
+        query_cache=mock_cache,
+        config=Configuration(api_endpoints=[]),
+        polling_strategy=AdaptivePolling(min_interval=0.25, max_interval=1),
+    )
+    datasource.query_string_generator = FuncADLQuery_Uproot().FromTree("nominal")
+
+    with ExpandableProgress(display_progress=False) as progress:
+        datasource.result_format = ResultFormat.parquet
+        result = await datasource.submit_and_download(
+            signed_urls_only=False, expandable_progress=progress
+        )
+
+    assert result.file_list == ["file1", "file2"]
+    assert datasource.status_polls == 3
+    assert datasource.results_polls == 2
+    # The fixed five second interval is never used
+    assert sleeps and all(0.25 <= s <= 1 for s in sleeps)
@@ -0,0 +1,163 @@
+# Copyright (c) 2026, IRIS-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from servicex.models import Status
+from servicex.polling import AdaptivePolling, FixedPolling
+from servicex.status_poller import TransformStatusPoller
+
+
+def _status(completed_status, request_id, **update):
+    return completed_status.model_copy(update=dict(request_id=request_id, **update))
+
+
+@pytest.fixture
+def servicex(completed_status):
+    servicex = MagicMock()
+    servicex.get_transform_status = AsyncMock(
+        side_effect=lambda r: _status(completed_status, r)
+    )
+    servicex.get_transform_statuses = AsyncMock(
+        side_effect=lambda ids: {
+            r: _status(
+                completed_status,
+                r,
+                status=Status.running,
+                minio_endpoint=None,
+                minio_access_key=None,
+                minio_secret_key=None,
+            )
+            for r in ids
+        }
+    )
+    return servicex
+
+
+@pytest.mark.asyncio
+async def test_first_poll_fetches_each_transform(servicex):
+    poller = TransformStatusPoller(servicex, FixedPolling(0))
+    statuses = await asyncio.gather(poller.get_status("a"), poller.get_status("b"))
+    await poller.close()
+
+    assert [s.request_id for s in statuses] == ["a", "b"]
+    assert servicex.get_transform_status.await_count == 2
+    servicex.get_transform_statuses.assert_not_awaited()
+    assert poller.polls == 1
+
+
+@pytest.mark.asyncio
+async def test_later_polls_are_batched(servicex):
+    poller = TransformStatusPoller(servicex, FixedPolling(0))
+    await asyncio.gather(*[poller.get_status(r) for r in "abc"])
+    statuses = await asyncio.gather(*[poller.get_status(r) for r in "abc"])
+    await poller.close()
+
+    servicex.get_transform_statuses.assert_awaited_once_with(["a", "b", "c"])
+    assert servicex.get_transform_status.await_count == 3
+    assert poller.polls == 2
+
+    # Object store details come from the first, individual status
+    assert all(s.status == Status.running for s in statuses)
+    assert all(s.minio_endpoint == "minio.org:9000" for s in statuses)
+    assert all(s.minio_secret_key == "secret" for s in statuses)
+
+
+@pytest.mark.asyncio
+async def test_polls_are_paced(servicex):
+    poller = TransformStatusPoller(servicex, FixedPolling(0.2))
+    loop = asyncio.get_running_loop()
+    await poller.get_status("a")
+    start = loop.time()
+    await poller.get_status("a")
+    await poller.close()
+    assert loop.time() - start >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter(servicex):
+    servicex.get_transform_status.side_effect = RuntimeError("server down")
+    poller = TransformStatusPoller(servicex, FixedPolling(0))
+    results = await asyncio.gather(
+        poller.get_status("a"), poller.get_status("b"), return_exceptions=True
+    )
+    await poller.close()
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_their_waiter_only(servicex, completed_status):
+    def get_transform_status(r):
+        if r == "bad":
+            raise RuntimeError("Not found")
+        return _status(completed_status, r)
+
+    servicex.get_transform_status.side_effect = get_transform_status
+    poller = TransformStatusPoller(servicex, FixedPolling(0))
+    good, bad = await asyncio.gather(
+        poller.get_status("good"), poller.get_status("bad"), return_exceptions=True
+    )
+    assert good.request_id == "good"
+    assert isinstance(bad, RuntimeError)
+
+    # Later, batched polls too
+    good, bad = await asyncio.gather(
+        poller.get_status("good"), poller.get_status("bad"), return_exceptions=True
+    )
+    await poller.close()
+    assert good.request_id == "good"
+    assert isinstance(bad, RuntimeError)
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_polls_each_transform(servicex):
+    poller = TransformStatusPoller(servicex, FixedPolling(0))
+    await asyncio.gather(*[poller.get_status(r) for r in "ab"])
+    servicex.get_transform_statuses.side_effect = RuntimeError("timeout")
+    statuses = await asyncio.gather(*[poller.get_status(r) for r in "ab"])
+    await poller.close()
+
+    assert [s.request_id for s in statuses] == ["a", "b"]
+    assert servicex.get_transform_status.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_adaptive_polling_backs_off(servicex):
+    poller = TransformStatusPoller(
+        servicex, AdaptivePolling(min_interval=0.01, max_interval=0.04)
+    )
+    intervals = []
+    for _ in range(5):
+        await poller.get_status("a")
+        intervals.append(poller._interval)
+    await poller.close()
+
+    # New transform, then Submitted -> Running, then nothing changes
+    assert intervals == [0.01, 0.01, 0.02, 0.04, 0.04]
@@ -123,3 +123,17 @@ CommonServices:
 
     assert "image" in query, "Missing image key"
     assert query["image"] == docker_image
+
+
+def test_yaml_read_once(tmp_path, mocker):
+    reco_file = tmp_path / "reco.yaml"
+    reco_file.write_text("CommonServices: {}\n")
+    topcp_query = TopCPQuery(reco=reco_file)
+
+    read = mocker.patch("builtins.open", wraps=open)
+    first = topcp_query.generate_selection_string()
+    assert topcp_query.generate_selection_string() == first
+    assert read.call_count == 1
+
+    topcp_query.max_events = 10
+    assert json.loads(topcp_query.generate_selection_string())["max_events"] == 10